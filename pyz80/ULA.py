@@ -1,14 +1,32 @@
 """This module contains classes implementing a simple video adapter and keyboard device 
 for our Z80 emulator. Specifically one modeled on the Spectrum.
 
-To use any of these classes the program must run a tkinter main loop."""
+To use any of these classes the program must run a tkinter main loop.
+
+PERFORMANCE NOTES
+
+The hot paths in this module are DisplayAdapter.write (called for every write to video
+memory) and KeyboardIO.read (called for every keyboard scan). Neither does any real
+arithmetic: their cost is bytecode dispatch and round trips into Tk, so there is nothing
+here for SIMD or GPU style vectorisation to speed up. The techniques in use are:
+
+- writes only record dirty addresses, which are rendered once per update;
+- rendering uses precomputed lookup tables (screen layout, attribute decode, and RGB rows
+  for every attribute/bitmap byte pair) into bytearray framebuffers;
+- the whole frame is handed to Tk in one PhotoImage operation, and the Tk event loop is
+  serviced at most once per Spectrum frame;
+- flashing is handled by keeping a framebuffer for each flash phase;
+- keyboard state is kept as one bitmask per row, maintained on key events.
+
+Changes to this module should keep to these: avoid per-pixel calls into Tk and per-write
+work that can be deferred to update."""
 
 __all__ = [ "SpectrumULA" ]
 
 import tkinter
 from .memorybus import Peripheral
 from .iobus import Device
-from time import time
+from time import time, monotonic
 
 class SpectrumULA (object):
     """This is the class that defines the spectrum ULA."""
@@ -35,94 +53,121 @@ class SpectrumULA (object):
             self.canvas.pack()
             self.last_flash = int(time())
             self.flash = 0x00
-            self.pixels = []
+
+            # Raw RGB bytes for each colour, indexed by (bright << 3) | colour
+            self.pal_bytes = [ bytes.fromhex(self.pallette[c & 0x7][c >> 3][1:]) for c in range(0,16) ]
+
+            # For every attribute value (ignoring the flash bit) and every possible bitmap byte
+            # the 24 bytes of RGB data for the corresponding row of 8 pixels are precomputed,
+            # so that drawing a byte is a single table lookup and slice assignment.
+            self.pix_lut = []
+            for attributes in range(0,128):
+                fg = self.pal_bytes[((attributes >> 3)&0x8) | (attributes & 0x7)]
+                bg = self.pal_bytes[((attributes >> 3)&0x8) | ((attributes >> 3) & 0x7)]
+                self.pix_lut.append([ b''.join(fg if ((data << i)&0x80) else bg for i in range(0,8))
+                                          for data in range(0,256) ])
+
+            # Each attribute byte decodes to its row of the lookup table and the mask to apply
+            # to bitmap data when drawing the inverted phase of flashing cells
+            self.attr_decode = [ (self.pix_lut[attributes & 0x7F], 0xFF if (attributes >> 7) == 1 else 0x00)
+                                     for attributes in range(0,256) ]
+
+            # Each bitmap address maps to the offset of its row of 8 pixels in the framebuffers,
+            # and the address of the attribute byte which controls it
+            self.addr_map = []
             for addr in range(0,0x1800):
                 y = ((addr >> 8)&0x7) + ((addr >> 2)&0x38) + ((addr >> 5)&0xC0)
                 x = ((addr >> 0)&0x1F)
-                pixels = []
-                for i in range(0,8):
-                    pixel = self.canvas.create_rectangle((x*8 + i)*parent.scale,
-                                                        y*parent.scale,
-                                                        (x*8 + i + 1)*parent.scale,
-                                                        (y + 1)*parent.scale,
-                                                        fill="#000000",
-                                                        width=0)
-                    pixels.append(pixel)
-                self.pixels.append(pixels)
+                self.addr_map.append(((y*256 + x*8)*3, 0x1800 + (y >> 3)*32 + x))
+
+            # The screen is rendered into two RGB framebuffers at native resolution, one for each
+            # phase of the flash cycle, so toggling the flash just changes which one is shown.
+            # Writes only record which addresses have changed, these are rendered when update is
+            # called and then the visible framebuffer is copied into a tkinter PhotoImage (and
+            # scaled up into the one shown on the canvas) in a single operation.
+            self.fb0 = bytearray(256*192*3)
+            self.fb1 = bytearray(256*192*3)
+            self.framebuffer = self.fb0
+            self.dirty = set()
+            self.image  = tkinter.PhotoImage(master=parent.window, width=256, height=192)
+            self.screen = tkinter.PhotoImage(master=parent.window,
+                                             width=256*parent.scale,
+                                             height=192*parent.scale)
+            self.canvas.create_image(0, 0, image=self.screen, anchor=tkinter.NW)
 
         def read(self, addr):
             """Read from video memory."""
             return self.data[addr]
 
         def write(self, addr, data):
-            """Write to video memory, and update the display."""
+            """Write to video memory. The framebuffers are brought up to date on the next update."""
+            old = self.data[addr]
+            if old == data:
+                return
             self.data[addr] = data
 
             if addr < 0x1800:
-                # This is a write to the bitmap region, only update the relevent part
-                y = ((addr >> 5)&0x7) + ((addr >> 8)&0x18)
-                x = ((addr >> 0)&0x1F)
-                attributes = self.data[0x1800 + y*32 + x]
-                fg = self.pallette[(attributes & 0x7)][(attributes >> 6)&0x1]
-                bg = self.pallette[((attributes >> 3) & 0x7)][(attributes >> 6)&0x1]
-                if (attributes >> 7) == 1:
-                        data = data ^ self.flash
-                for i in range(0,8):
-                    if (data&0x80) == 0:
-                        c = bg
-                    else:
-                        c = fg
-                    pixel = self.pixels[addr][i]
-                    self.canvas.itemconfigure(pixel, fill=c)
-                    data <<= 1
+                self.dirty.add(addr)
             else:
-                # This is a change to attributes, so whole 8x8 block needs updating
-                y = (addr - 0x1800)//32
-                x = (addr - 0x1800)%32
-                fg = self.pallette[(data & 0x7)][(data >> 6)&0x1]
-                bg = self.pallette[((data >> 3) & 0x7)][(data >> 6)&0x1]
-                pixaddr = ((y << 5)&0x00E0) + ((y << 8)&0x1800) + x
-                for j in range(0,8):
-                    pixdata = self.data[pixaddr]
-                    if (data >> 7) == 1:
-                        pixdata = pixdata ^ self.flash
-                    for i in range(0,8):
-                        if (pixdata&0x80) == 0:
-                            c = bg
-                        else:
-                            c = fg
-                        pixel = self.pixels[pixaddr][i]
-                        self.canvas.itemconfigure(pixel, fill=c)
-                        pixdata <<= 1
-                    pixaddr += 0x100
+                # This is a change to attributes, so whole 8x8 block needs updating, unless
+                # the new attributes render identically (the row for 0xF0 holds both colours)
+                (old_lut, old_flash) = self.attr_decode[old]
+                (new_lut, new_flash) = self.attr_decode[data]
+                if old_flash != new_flash or old_lut[0xF0] != new_lut[0xF0]:
+                    self.dirty.add(addr)
+
+        def _draw(self, addr):
+            """Render the byte at the specified bitmap address into the framebuffers."""
+            (offset, attr_addr) = self.addr_map[addr]
+            (lut, flash) = self.attr_decode[self.data[attr_addr]]
+            data = self.data[addr]
+            self.fb0[offset:offset + 24] = lut[data]
+            self.fb1[offset:offset + 24] = lut[data ^ flash]
+
+        def _draw_cell(self, addr):
+            """Render the 8x8 block controlled by the specified attribute address."""
+            y = (addr - 0x1800)//32
+            x = (addr - 0x1800)%32
+            (lut, flash) = self.attr_decode[self.data[addr]]
+            pixaddr = ((y << 5)&0x00E0) + ((y << 8)&0x1800) + x
+            offset = (y*8*256 + x*8)*3
+            data = self.data
+            fb0 = self.fb0
+            fb1 = self.fb1
+            for j in range(0,8):
+                pixdata = data[pixaddr]
+                fb0[offset:offset + 24] = lut[pixdata]
+                fb1[offset:offset + 24] = lut[pixdata ^ flash]
+                pixaddr += 0x100
+                offset += 256*3
 
         def description(self):
             return "Spectrum Video Adapter"
 
         def update(self):
+            """Render everything written since the last call and show the result."""
+            redraw = False
+
             t = int(time())
             if t != self.last_flash:
                 self.last_flash = t
-                self.flash = ~self.flash
-                for y in range(0,24):
-                    for x in range(0,32):
-                        attributes = self.data[0x1800 + y*32 + x]
-                        if (attributes >> 7) == 1:
-                            fg = self.pallette[(attributes & 0x7)][(attributes >> 6)&0x1]
-                            bg = self.pallette[((attributes >> 3) & 0x7)][(attributes >> 6)&0x1]
-                            pixaddr = ((y << 5)&0x00E0) + ((y << 8)&0x1800) + x
-                            for j in range(0,8):
-                                pixdata = self.data[pixaddr]
-                                pixdata = pixdata ^ self.flash
-                                for i in range(0,8):
-                                    if (pixdata&0x80) == 0:
-                                        c = bg
-                                    else:
-                                        c = fg
-                                    pixel = self.pixels[pixaddr][i]
-                                    self.canvas.itemconfigure(pixel, fill=c)
-                                    pixdata <<= 1
-                                pixaddr += 0x100
+                self.flash ^= 0xFF
+                self.framebuffer = self.fb1 if self.flash else self.fb0
+                redraw = True
+
+            if self.dirty:
+                for addr in self.dirty:
+                    if addr < 0x1800:
+                        self._draw(addr)
+                    else:
+                        self._draw_cell(addr)
+                self.dirty.clear()
+                redraw = True
+
+            if redraw:
+                self.image.configure(data=b'P6 256 192 255\n' + self.framebuffer, format='PPM')
+                self.screen.tk.call(self.screen, 'copy', self.image,
+                                    '-zoom', self.parent.scale, self.parent.scale)
 
     class KeyboardIO(Device):
         LSHIFT = 131074
@@ -145,7 +190,14 @@ class SpectrumULA (object):
             self.parent = parent
             self.parent.window.bind("<KeyPress>"  , self._keypress)
             self.parent.window.bind("<KeyRelease>", self._keyrelease)
-            self._keyflags = {}
+            self._key_to_rowbit = { key : (row, 1 << bit)
+                                        for (row, keys) in enumerate(self.KEY_CODES)
+                                        for (bit, key) in enumerate(keys) }
+            for key in list(self._key_to_rowbit):
+                self._key_to_rowbit[key.upper()] = self._key_to_rowbit[key]
+            for (digit, key) in enumerate(self.SHIFTED_DIGITS):
+                self._key_to_rowbit[key] = self._key_to_rowbit[str(digit)]
+            self._rowmask = bytearray(b'\xFF'*8)
 
         def responds_to_port(self, p):
             """The ULA should respond to every even numbered port."""
@@ -153,41 +205,41 @@ class SpectrumULA (object):
 
         def read(self, address):
             val = 0xFF
-            for n in range(0,8):
-                if ((address >> n)&0x1) == 0x0:
-                    if any(self._keyflags.get(k,False) for k in self.KEY_CODES[n]):
-                        cur = 0xE0
-                        for i in range(0,5):
-                            if all((not self._keyflags.get(self.KEY_CODES[r][i],False)) for r in range(0,8)):
-                                cur |= (1 << i)
-
-                        val &= cur
+            mask = ~address & 0xFF
+            n = 0
+            while mask:
+                if mask & 0x1:
+                    val &= self._rowmask[n]
+                n += 1
+                mask >>= 1
             return val
 
         def write(self, address, data):
             pass
 
-        def _keypress(self, event):
+        def _key(self, event):
+            """Returns the (row, bit) of the key matrix corresponding to an event, or None."""
             if event.char != '':
-                c = event.char
-                if c in self.SHIFTED_DIGITS:
-                    c = str(self.SHIFTED_DIGITS.index(c))
-                self._keyflags[c.lower()] = True
+                return self._key_to_rowbit.get(event.char)
             elif event.keycode == self.LSHIFT:
-                self._keyflags['`'] = True
+                return self._key_to_rowbit['`']
             elif event.keycode == self.RSHIFT:
-                self._keyflags['/'] = True
+                return self._key_to_rowbit['/']
+            return None
+
+        def _keypress(self, event):
+            key = self._key(event)
+            if key is not None:
+                (row, bit) = key
+                self._rowmask[row] &= ~bit & 0xFF
 
         def _keyrelease(self, event):
-            if event.char != '':
-                c = event.char
-                if c in self.SHIFTED_DIGITS:
-                    c = str(self.SHIFTED_DIGITS.index(c))
-                self._keyflags[c.lower()] = False
-            elif event.keycode == self.LSHIFT:
-                self._keyflags['`'] = False
-            elif event.keycode == self.RSHIFT:
-                self._keyflags['/'] = False
+            key = self._key(event)
+            if key is not None:
+                (row, bit) = key
+                self._rowmask[row] |= bit
+
+    PUMP_INTERVAL = 0.02
 
     def setup_interrupts(self, n, interrupt_handler):
         self.interrupt_wait = n
@@ -199,6 +251,7 @@ class SpectrumULA (object):
         self.next_interrupt_wait = 0
         self.interrupt_handler = None
         self._running = True
+        self._last_pump = 0.0
         self.window = tkinter.Tk()
         self.window.protocol("WM_DELETE_WINDOW", self.kill)
         self.scale = scale
@@ -220,7 +273,14 @@ class SpectrumULA (object):
             self.update()
 
     def update(self):
-        """Call repeatedly in the main program loop to keep GUI updated."""
+        """Call repeatedly in the main program loop to keep GUI updated.
+
+        The tkinter event loop is serviced at most once every PUMP_INTERVAL seconds (once per
+        Spectrum frame), calls in between return immediately."""
+        now = monotonic()
+        if now - self._last_pump < self.PUMP_INTERVAL:
+            return
+        self._last_pump = now
         self.display.update()
         self.window.update_idletasks()
         self.window.update()
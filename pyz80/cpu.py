@@ -1,5 +1,6 @@
 from .registers import RegisterFile
 from .machinestates import *
+from collections import deque
 
 class CPUStalled(Exception):
     pass
@@ -10,6 +11,9 @@ class Z80CPU(object):
     def __init__(self, iobus, membus):
         self.iobus  = iobus
         self.membus = membus
+        # Buses which can serve reads from a flat mirror of memory expose read_fast, which machine
+        # states use for opcode, operand and memory reads
+        self._memread = getattr(membus, 'read_fast', membus.read)
         self.iff1 = 0
         self.iff2 = 0
         self.int = False
@@ -23,32 +27,48 @@ class Z80CPU(object):
         self.most_recent_instruction = None
         self.tick_count = 0
 
-        # This member holds all of the active instruction pipelines currently being worked on by the cpu
-        # It starts off with a single pipeline containing a single OCF (Op Code Fetch) machine state
-        self.pipeline = [ OCF()().setcpu(self), ]
+        # Machine states built for each instruction code executed so far (along with its actions combined into one
+        # call) and for each kind of interrupt response, which are reused rather than built again
+        self._state_cache = {}
+
+        # This member holds the pipeline of machine states currently being worked on by the cpu
+        # It starts off containing a single OCF (Op Code Fetch) machine state. It is a deque since
+        # states are retired from the front as they complete.
+        self._ocf = STD_OCF().setcpu(self)
+        self.pipeline = deque([ self._ocf, ])
 
     def clock(self):
         """This method executes a single clock cycle on the CPU's state machine."""
-        self.pipeline[0].clock(self.pipeline)
+        pipeline = self.pipeline
+        # A state's step method returns True on the cycle in which it finishes, at which point it must
+        # hand over to the next one
+        state = pipeline[0]
+        if state.step():
+            state.retire(pipeline)
         self.tick_count += 1
-        if len(self.pipeline) == 0:
-            self.most_recent_instruction = None
-            self.tick_count = 0
-
-            if self.int:
-                if self.nmi:
-                    self.iff1 = 0
-                    self.pipeline = interrupt_response(self, True, ack=self.pending_nmi)
-                else:
-                    self.iff1 = 0
-                    self.iff2 = 0
-                    self.pipeline = interrupt_response(self, False, ack=self.pending_interrupt)
-                self.pending_nmi       = None
-                self.pending_interrupt = None
-                self.int               = False
-                self.nmi               = False
+        if pipeline:
+            # Still mid-instruction, which is by far the most common case
+            return self.tick_count
+
+        self.most_recent_instruction = None
+        self.tick_count = 0
+
+        if self.int:
+            if self.nmi:
+                self.iff1 = 0
+                self.pipeline = deque(interrupt_response(self, True, ack=self.pending_nmi))
             else:
-                self.pipeline = [ STD_OCF().setcpu(self), ]
+                self.iff1 = 0
+                self.iff2 = 0
+                self.pipeline = deque(interrupt_response(self, False, ack=self.pending_interrupt))
+            self.pending_nmi       = None
+            self.pending_interrupt = None
+            self.int               = False
+            self.nmi               = False
+        else:
+            # The pipeline has drained, so the standard opcode fetch state used for the previous
+            # instruction has finished and can be reused for the next one
+            pipeline.append(self._ocf.reset())
 
         if len(self.pipeline) == 0:
             raise CPUStalled("No instructions in pipeline")
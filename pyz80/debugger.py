@@ -1,4 +1,17 @@
 from .machinestates import *
+import re
+import traceback
+import functools
+
+_ADDR_RE = re.compile(r'^(?P<reg>AF|BC|DE|HL|SP|PC|IX|IY)$'
+                      r'|^(?P<idx>IX|IY)(?P<op>[+-])(?:0x(?P<ihex>[0-9a-fA-F]+)|(?P<idec>[0-9]+))$'
+                      r'|^0x(?P<hex>[0-9a-fA-F]+)$'
+                      r'|^(?P<dec>[0-9]+)$')
+
+# Templates for the 16 byte memory dumps printed by printstate and showbreakpoints
+_ADDR_TMPL   = "  ".join([ "0x%04X" ]*16)
+_BYTE_TMPL   = "  ".join([ " 0x%02X " ]*16)
+_MARK_BLANKS = ( "      ", )*16
 
 class Debugger(object):
     def __init__(self, cpu, *args):
@@ -6,7 +19,9 @@ class Debugger(object):
         self.components = args
         self.commandhistory = []
         self.breakpoints = []
+        self._breakpoint_set = set()
         self.watchpoints = []
+        self._pending_messages = []
 
         self.commands = {
             "quit" : [ self.quit, "exit the debugger"],
@@ -26,13 +41,37 @@ class Debugger(object):
             "disassemble" : [ self.disassemble, "disassemble instructions near the current PC" ],
         }
 
+        # Map every prefix of every command name to the list of commands it could abbreviate
+        self._prefix_map = {}
+        for c in sorted(self.commands):
+            for n in range(1, len(c) + 1):
+                self._prefix_map.setdefault(c[:n], []).append(c)
+
+        # The same few commands tend to be typed over and over, so cache how each raw command line resolves.
+        # This is a closure rather than a method so that the cache is keyed on the string alone.
+        prefix_map = self._prefix_map
+
+        @functools.lru_cache(maxsize=64)
+        def _resolve(cmd):
+            """Returns (command, args, candidates) for a command line. command is None if the name given
+            is unknown or ambiguous, in which case candidates holds the commands it could abbreviate."""
+            cmds = cmd.split(' ')
+            if cmds[0] == "":
+                return ("", tuple(cmds[1:]), ("",))
+            C = tuple(prefix_map.get(cmds[0], []))
+            return ((C[0] if len(C) == 1 else None), tuple(cmds[1:]), C)
+
+        self._resolve = _resolve
+
     def disassemble(self, *args):
         PC = self.cpu.reg.PC
         found = False
+        win_start = max(0, PC - 8)
+        window    = self.cpu.membus.read_range(win_start, min(0x10000, PC + 16) - win_start)
         for baddr in range(PC-8, PC+1):
             start = max(0, baddr)
             end   = min(0x10000, start + 16)
-            instructions = [ self.cpu.membus.read(addr) for addr in range(start, end) ]
+            instructions = list(window[start - win_start:end - win_start])
             disassembly = disassemble_instructions(instructions)
 
             pc = start
@@ -54,42 +93,23 @@ class Debugger(object):
                     i += 1
 
     def decode_address(self, a):
-        if a in ["AF", "BC", "DE", "HL", "SP", "PC", "IX", "IY"]:
-            return getattr(self.cpu.reg, a)
-        elif a.isdigit():
-            return int(a,10)
-        elif a[:2] == "0x":
-            return int(a[2:],16)
-        elif a[:2] == "IX" and a[2] == "+":
-            if a[3:].isdigit():
-                return self.cpu.reg.IX + int(a[3:],10)
-            elif a[3:5] == "0x":
-                return self.cpu.reg.IX + int(a[5:],16)
-            else:
-                raise Exception
-        elif a[:2] == "IX" and a[2] == "-":
-            if a[3:].isdigit():
-                return self.cpu.reg.IX - int(a[3:],10)
-            elif a[3:5] == "0x":
-                return self.cpu.reg.IX - int(a[5:],16)
+        m = _ADDR_RE.match(a)
+        if m is None:
+            raise ValueError("Cannot decode address: <{}>".format(a))
+        if m.group('reg') is not None:
+            return getattr(self.cpu.reg, m.group('reg'))
+        elif m.group('idx') is not None:
+            if m.group('ihex') is not None:
+                d = int(m.group('ihex'), 16)
             else:
-                raise Exception
-        elif a[:2] == "IY" and a[2] == "+":
-            if a[3:].isdigit():
-                return self.cpu.reg.IY + int(a[3:],10)
-            elif a[3:5] == "0x":
-                return self.cpu.reg.IY + int(a[5:],16)
-            else:
-                raise Exception
-        elif a[:2] == "IY" and a[2] == "-":
-            if a[3:].isdigit():
-                return self.cpu.reg.IY - int(a[3:],10)
-            elif a[3:5] == "0x":
-                return self.cpu.reg.IY - int(a[5:],16)
-            else:
-                raise Exception
+                d = int(m.group('idec'), 10)
+            if m.group('op') == '-':
+                d = -d
+            return getattr(self.cpu.reg, m.group('idx')) + d
+        elif m.group('hex') is not None:
+            return int(m.group('hex'), 16)
         else:
-            raise Exception
+            return int(m.group('dec'), 10)
 
     def _break(self, *args):
         if len(args) == 0:
@@ -100,8 +120,10 @@ class Debugger(object):
             addr = self.decode_address(args[0])
         except:
             print("Bad argument: <{}>".format(args[0]))
+            return
 
         self.breakpoints.append(addr)
+        self._breakpoint_set.add(addr)
         print("Set breakpoint <{}> at 0x{:04X}".format(len(self.breakpoints)-1, addr))
 
     def deletebreakpoint(self, *args):
@@ -112,9 +134,30 @@ class Debugger(object):
                 n = int(args[0])
             except:
                 print("Bad argument: <{}>".format(args[0]))
+                return
 
         if n >= 0 and n < len(self.breakpoints):
             self.breakpoints[n] = None
+            self._breakpoint_set = set(bp for bp in self.breakpoints if bp is not None)
+
+    def _check_breakpoints(self):
+        """Returns True (and queues a report of which) if any breakpoint is set at the current PC."""
+        PC = self.cpu.reg.PC
+        if PC not in self._breakpoint_set:
+            return False
+        for (n, bp) in enumerate(self.breakpoints):
+            if bp == PC:
+                self._pending_messages.append(("breakpoint", n))
+        return True
+
+    def _report(self):
+        """Format and print any messages queued up while the cpu was running."""
+        for msg in self._pending_messages:
+            if msg[0] == "breakpoint":
+                print("Hit breakpoint <{:02d}>".format(msg[1]))
+            else:
+                print("Watched value changed: {} from 0x{:02X} to 0x{:02X}".format(*msg[1:]))
+        self._pending_messages = []
 
     def watch(self, *args):
         if len(args) == 0:
@@ -156,12 +199,23 @@ class Debugger(object):
             if not self.executecommand(self.commandhistory[-1]):
                 return "quit"
 
+    def _check_watchpoints(self, watchvals):
+        """Returns True (and queues a report of which) if any watched register has changed from its value in watchvals."""
+        reg = self.cpu.reg
+        changed = False
+        for (name, val) in watchvals.items():
+            now = getattr(reg, name)
+            if val != now:
+                self._pending_messages.append(("watchpoint", name, val, now))
+                changed = True
+        return changed
+
     def next(self, *args):
         if len(args) > 0:
             try:
                 n = int(args[0])
             except:
-                print("Invalid argument: <{}>".format(arg[0]))
+                print("Invalid argument: <{}>".format(args[0]))
                 return
         else:
             n = 1
@@ -170,25 +224,23 @@ class Debugger(object):
         for reg in self.watchpoints:
             watchvals[reg] = getattr(self.cpu.reg, reg)
 
+        # The loop below runs for every clock cycle, so look everything up once in advance
+        cpu_clock   = self.cpu.clock
+        reg         = self.cpu.reg
+        comp_clocks = [ comp.clock for comp in self.components ]
+        bp_set      = self._breakpoint_set
+
         for _ in range(0,n):
-            while self.cpu.clock() != 0:
-                for comp in self.components:
-                    comp.clock()
-
-            stop = False
-            x = 0
-            for bp in self.breakpoints:
-                if self.cpu.reg.PC == bp:
-                    print("Hit breakpoint <{:02d}>".format(x))
-                    stop = True
-                x += 1
-
-            for reg in watchvals:
-                if watchvals[reg] != getattr(self.cpu.reg, reg):
-                    print("Watched value changed: {} from 0x{:02X} to 0x{:02X}".format(reg, watchvals[reg], getattr(self.cpu.reg, reg)))
-                    stop = True
+            while cpu_clock() != 0:
+                for clock in comp_clocks:
+                    clock()
+
+            stop = (reg.PC in bp_set) and self._check_breakpoints()
+            if watchvals and self._check_watchpoints(watchvals):
+                stop = True
 
             if stop:
+                self._report()
                 print()
                 self.printstate()
                 return
@@ -200,31 +252,29 @@ class Debugger(object):
         for reg in self.watchpoints:
             watchvals[reg] = getattr(self.cpu.reg, reg)
 
+        # The loop below runs for every clock cycle, so look everything up once in advance
+        cpu_clock   = self.cpu.clock
+        reg         = self.cpu.reg
+        comp_clocks = [ comp.clock for comp in self.components ]
+        bp_set      = self._breakpoint_set
+
         while True:
             try:
-                while self.cpu.clock() != 0:
-                    for comp in self.components:
-                        comp.clock()
+                while cpu_clock() != 0:
+                    for clock in comp_clocks:
+                        clock()
             except:
                 traceback.print_exc()
                 print()
                 self.printstate()
                 return
 
-            stop = False
-            n = 0
-            for bp in self.breakpoints:
-                if self.cpu.reg.PC == bp:
-                    print("Hit breakpoint <{:02d}>".format(n))
-                    stop = True
-                n += 1
-
-            for reg in watchvals:
-                if watchvals[reg] != getattr(self.cpu.reg, reg):
-                    print("Watched value changed: {} from 0x{:02X} to 0x{:02X}".format(reg, watchvals[reg], getattr(self.cpu.reg, reg)))
-                    stop = True
+            stop = (reg.PC in bp_set) and self._check_breakpoints()
+            if watchvals and self._check_watchpoints(watchvals):
+                stop = True
 
             if stop:
+                self._report()
                 print()
                 self.printstate()
                 return
@@ -246,12 +296,7 @@ class Debugger(object):
         n = 0
         for PC in self.breakpoints:
             if PC is not None:
-                start = max(0, PC - 8)
-                end   = min(0x10000, start + 16)
-                print("  ".join("0x{:04X}".format(addr) for addr in range(start, end)))
-                print("-"*126)
-                print("  ".join(" 0x{:02X} ".format(self.cpu.membus.read(addr)) for addr in range(start, end)))
-                print("  ".join([ "      " for _ in range(start, PC) ] + [ "^<{:02d}>^".format(n) ] + [ "      " for _ in range(PC+1, end) ]))
+                self._dump_window(PC, "^<{:02d}>^".format(n))
                 print()
             n += 1
 
@@ -264,52 +309,48 @@ class Debugger(object):
         print()
         print(self.cpu.reg.registermap())
         print()
-        HL = self.cpu.reg.HL
-        start = max(0, HL - 8)
-        end   = min(0x10000, start + 16)
-        print("  ".join("0x{:04X}".format(addr) for addr in range(start, end)))
-        print("-"*126)
-        print("  ".join(" 0x{:02X} ".format(self.cpu.membus.read(addr)) for addr in range(start, end)))
-        print("  ".join([ "      " for _ in range(start, HL) ] + [ "^^HL^^" ] + [ "      " for _ in range(HL+1, end) ]))
+        self._dump_window(self.cpu.reg.HL, "^^HL^^")
         print()
         self.printstack(*args)
         print()
         self.disassemble(*args)
 
+    def _dump_window(self, anchor, label):
+        """Print the 16 bytes of memory around anchor, with label marking the anchor's position."""
+        start  = max(0, anchor - 8)
+        end    = min(0x10000, start + 16)
+        window = self.cpu.membus.read_range(start, end - start)
+        if end - start == 16:
+            print(_ADDR_TMPL % tuple(range(start, end)))
+            print("-"*126)
+            print(_BYTE_TMPL % tuple(window))
+        else:
+            # Only near the very top of memory is the window short
+            print("  ".join("0x{:04X}".format(addr) for addr in range(start, end)))
+            print("-"*126)
+            print("  ".join(" 0x{:02X} ".format(b) for b in window))
+        print("  ".join(_MARK_BLANKS[:anchor - start] + (label,) + _MARK_BLANKS[:end - anchor - 1]))
+
     def printstack(self, *args):
         print("Stack")
         print("-----")
         for n in range(0,8):
             addr = self.cpu.reg.SP + 2*n
             if addr <= 0xFFFE:
-                print("0x{:04x}".format(self.cpu.membus.read(addr) + (self.cpu.membus.read(addr + 1) << 8)))
+                (low, high) = self.cpu.membus.read_range(addr, 2)
+                print("0x{:04x}".format(low + (high << 8)))
         print()
 
     def executecommand(self, cmd):
-        cmds = cmd.split(' ')
-        cmd = cmds[0]
-        C = []
-        if cmd != "":
-            for c in self.commands:
-                if cmd == c[:len(cmd)]:
-                    C.append(c)
-            if len(C) == 0:
-                print("Unknown Command: {}".format(cmd))
-                return True
-            elif len(C) == 1:
-                C = C[0]
+        (C, args, candidates) = self._resolve(cmd)
+        if C is None:
+            if len(candidates) == 0:
+                print("Unknown Command: {}".format(cmd.split(' ')[0]))
             else:
-                print("Ambiguous Command, could be any of: {}".format(', '.join(C)))
-                return True
-        
-        else:
-            C = ""
-
-        if C in self.commands:
-            return (self.commands[C][0](*cmds[1:]) is None)
+                print("Ambiguous Command, could be any of: {}".format(', '.join(candidates)))
+            return True
 
-        print("Unknown Command: {}".format(cmd))
-        return True
+        return (self.commands[C][0](*args) is None)
 
     def mainloop(self):
         self.printstate()
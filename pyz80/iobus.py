@@ -16,22 +16,41 @@ class IOBus (object):
     """This class represents an io bus."""
 
     def __init__(self, devices=[]):
-        """Devices should be a list of devices to connect to the bus."""
+        """Devices should be a list of devices to connect to the bus. Each device is asked which
+        ports it responds to once, here, and the answers recorded as a 256-bit mask per device.
+        These are used to build tables mapping each port directly to the read and write methods
+        of the first device which responds to it."""
         self.devices = devices
+        self._port_masks = []
+        for device in self.devices:
+            mask = 0
+            for port in range(0,256):
+                if device.responds_to_port(port):
+                    mask |= 1 << port
+            self._port_masks.append((device, mask))
+
+        unmapped = Device()
+        self._read_table  = [ unmapped.read ]*256
+        self._write_table = [ unmapped.write ]*256
+        for port in range(0,256):
+            for (device, mask) in self._port_masks:
+                if (mask >> port)&0x1:
+                    self._read_table[port]  = device.read
+                    self._write_table[port] = device.write
+                    break
+
+    def debug_who_responds(self, port):
+        """Returns a list of all the devices which respond to the specified port, in order of
+        priority. Only the first of these will actually be used for reads and writes."""
+        return [ device for (device, mask) in self._port_masks if (mask >> (port & 0xFF))&0x1 ]
 
     def read(self, port, high_address):
         """Read from the specified address on the specified port."""
-        for device in self.devices:
-            if device.responds_to_port(port):
-                return device.read(high_address)
-        return 0x00
+        return self._read_table[port & 0xFF](high_address)
 
     def write(self, port, high_address, data):
         """Write to the specified address on the specified port."""
-        for device in self.devices:
-            if device.responds_to_port(port):
-                device.write(high_address, data)
-                return
+        self._write_table[port & 0xFF](high_address, data)
 
 class Device (object):
     def responds_to_port(self, port):
@@ -1,4 +1,7 @@
-import collections
+import re
+from functools import wraps
+from .registers import RegisterFile
+
 __all__ = [ "MachineState", "OCF", "UnrecognisedInstructionError", "interrupt_response", "disassemble_instructions" ]
 
 class UnrecognisedInstructionError(Exception):
@@ -11,17 +14,41 @@ class UnrecognisedInstructionError(Exception):
         super(UnrecognisedInstructionError, self).__init__("Unrecognised Instruction {}".format(inst))
 
 
+# Bit masks for each flag in the F register
+_FLAG_MASK = { 'S' : 0x80, 'Z' : 0x40, '5' : 0x20, 'H' : 0x10, '3' : 0x08, 'P' : 0x04, 'V' : 0x04, 'N' : 0x02, 'C' : 0x01 }
+
 # Actions which can be triggered at end of machine states
 
+# Actions and machine state classes keep nothing of their own between uses (the state and cpu being passed to an action
+# and each cpu building its own instances of the state classes), so rows asking for the same one can all share it
+_SHARED = {}
+
+def _shared(factory):
+    """Decorator for a factory of actions or machine state classes, making it return the same one each time it is
+    called with the same arguments. Calls with arguments which can't be hashed aren't shared."""
+    @wraps(factory)
+    def _factory(*args, **kwargs):
+        k = (factory, args, tuple(sorted(kwargs.items())))
+        try:
+            return _SHARED[k]
+        except KeyError:
+            _SHARED[k] = factory(*args, **kwargs)
+            return _SHARED[k]
+        except TypeError:
+            return factory(*args, **kwargs)
+    return _factory
+
 def JP(value=None, key=None, source=None):
     """Jump to the second parameter (an address)"""
+    if source is not None:
+        (get_source, _) = RegisterFile.accessors(source)
     def _inner(state, *args):
-        if isinstance(value, collections.Callable):
+        if callable(value):
             target = value(state)
         elif value is not None:
             target = value
         elif source is not None:
-            target = getattr(state.cpu.reg, source)
+            target = get_source(state.cpu.reg)
         elif key is not None:
             target = state.kwargs[key]
         elif len(args) > 0:
@@ -34,7 +61,7 @@ def JP(value=None, key=None, source=None):
 def JR(value=None, key="value"):
     """Jump to PC plus the second parameter (an address) (or other source if provided)"""
     def _inner(state, *args):
-        if isinstance(value, collections.Callable):
+        if callable(value):
             target = value(state)
         elif value is not None:
             target = value
@@ -45,10 +72,12 @@ def JR(value=None, key="value"):
         state.cpu.reg.PC += target
     return _inner
 
+@_shared
 def LDr(reg, value=None, key="value"):
     """Load into the specified register"""
+    (_, set_reg) = RegisterFile.accessors(reg)
     def _inner(state, *args):
-        if isinstance(value, collections.Callable):
+        if callable(value):
             v = value(state, *args)
         elif value is not None:
             v = value
@@ -56,21 +85,45 @@ def LDr(reg, value=None, key="value"):
             v = args[0]
         else:
             v = state.kwargs[key]
-        setattr(state.cpu.reg, reg, v)
+        set_reg(state.cpu.reg, v)
     return _inner
 
+# The registers which are held as plain attributes of the register file, and expressions for reading those and the
+# pairs made from them in generated code (register halves aren't included)
+_DIRECT_REGISTERS = ("A", "B", "C", "D", "E", "F", "H", "L", "I", "R", "IX", "IY", "SP", "PC")
+_REGISTER_READ_SOURCE = dict([ (name, "reg.{}".format(name)) for name in _DIRECT_REGISTERS ] +
+                             [ (high + low, "(reg.{} << 8 | reg.{})".format(high, low)) for (high, low) in (("A", "F"), ("B", "C"), ("D", "E"), ("H", "L")) ])
+
+_LDRS_FUNCTIONS = {}
+
 def LDrs(r,s):
     """Load from the specified register into the specified register"""
+    # Where both registers can be named directly the function is generated from source, so that the names end up
+    # as constants in its code rather than being looked up when it runs. One function is made for each pair.
+    if r in _DIRECT_REGISTERS and s in _REGISTER_READ_SOURCE:
+        if (r, s) not in _LDRS_FUNCTIONS:
+            src = ("def _inner(state, *args):\n" +
+                   "    reg = state.cpu.reg\n" +
+                   "    reg.__dict__['{}'] = {}\n".format(r, _REGISTER_READ_SOURCE[s]))
+            namespace = {}
+            exec(src, namespace)
+            _LDRS_FUNCTIONS[(r, s)] = namespace['_inner']
+        return _LDRS_FUNCTIONS[(r, s)]
+
+    (_, set_r) = RegisterFile.accessors(r)
+    (get_s, _) = RegisterFile.accessors(s)
     def _inner(state, *args):
-        setattr(state.cpu.reg, r, getattr(state.cpu.reg, s))
+        set_r(state.cpu.reg, get_s(state.cpu.reg))
     return _inner
 
 def RRr(n,reg=None, value=None):
     """Load the value from the specified register and store as a key in the kwargs of the state"""
+    if reg is not None:
+        (get_reg, _) = RegisterFile.accessors(reg)
     def _inner(state, *args):
         if reg is not None:
-            v = getattr(state.cpu.reg, reg)
-        elif isinstance(value, collections.Callable):
+            v = get_reg(state.cpu.reg)
+        elif callable(value):
             v = value(state, *args)
         elif value is not None:
             v = value
@@ -82,14 +135,26 @@ def RRr(n,reg=None, value=None):
     return _inner
 
 def EX(a=None, b=None):
-    """Exchange the AF and AF' registers"""
-    def _inner(state, *args):
-        if a is None or b is None:
+    """Exchange the AF and AF' registers, or the two named registers if they are given"""
+    if a is None or b is None:
+        def _inner(state, *args):
             state.cpu.reg.ex()
-        else:
-            tmp = getattr(state.cpu.reg, a)
-            setattr(state.cpu.reg, a, getattr(state.cpu.reg, b))
-            setattr(state.cpu.reg, b, tmp)
+    elif len(a) == 2 and len(b) == 2 and all(r in _DIRECT_REGISTERS for r in a + b):
+        # Exchanging two pairs of 8-bit registers, such as DE and HL, swaps the four bytes in place
+        src = ("def _inner(state, *args):\n" +
+               "    d = state.cpu.reg.__dict__\n" +
+               "    (d['{0}'], d['{1}'], d['{2}'], d['{3}']) = (d['{2}'], d['{3}'], d['{0}'], d['{1}'])\n".format(a[0], a[1], b[0], b[1]))
+        namespace = {}
+        exec(src, namespace)
+        _inner = namespace['_inner']
+    else:
+        (get_a, set_a) = RegisterFile.accessors(a)
+        (get_b, set_b) = RegisterFile.accessors(b)
+        def _inner(state, *args):
+            reg = state.cpu.reg
+            tmp = get_a(reg)
+            set_a(reg, get_b(reg))
+            set_b(reg, tmp)
     return _inner
 
 def EXX():
@@ -100,68 +165,125 @@ def EXX():
 
 def add_register(r):
     """Load a value from the specified register and add it to the parameter"""
+    (get_r, _) = RegisterFile.accessors(r)
     def _inner(state, d, *args):
-        return getattr(state.cpu.reg, r) + d
+        return get_r(state.cpu.reg) + d
     return _inner
 
 def subfrom(r="A"):
     """Subtract the value from the value in a register (A by default)."""
+    (get_r, _) = RegisterFile.accessors(r)
     def _inner(state, d, *args):
-        return getattr(state.cpu.reg, r) - d
+        return get_r(state.cpu.reg) - d
     return _inner
 
+_DO_EACH_FACTORIES = {}
+
+def _do_each_factory(n):
+    """Returns a function which takes n actions and returns a single action that calls each of them in turn.
+    The source is generated (once for each n) so that the calls are made one after another rather than in a
+    loop over the actions."""
+    if n not in _DO_EACH_FACTORIES:
+        names = [ "a{}".format(i) for i in range(0,n) ]
+        src = ("def factory({}):\n".format(', '.join(names)) +
+               "    def _inner(state, *args):\n" +
+               ''.join("        {}(state, *args)\n".format(name) for name in names) +
+               "    return _inner\n")
+        namespace = {}
+        exec(src, namespace)
+        _DO_EACH_FACTORIES[n] = namespace['factory']
+    return _DO_EACH_FACTORIES[n]
+
 def do_each(*actions):
     """Perform a series of actions."""
+    if len(actions) == 1:
+        return actions[0]
+    if len(actions) <= 8:
+        return _do_each_factory(len(actions))(*actions)
     def _inner(state, *args):
         for action in actions:
             action(state, *args)
     return _inner
 
+@_shared
 def inc(reg):
     """Increment a register"""
+    (get_reg, set_reg) = RegisterFile.accessors(reg)
+    mask = 0xFFFF if len(reg)%2 == 0 else 0xFF
     def _inner(state, *args):
-        if len(reg) % 2 == 0:
-            setattr(state.cpu.reg, reg, (getattr(state.cpu.reg, reg) + 1)&0xFFFF)
-        else:
-            setattr(state.cpu.reg, reg, (getattr(state.cpu.reg, reg) + 1)&0xFF)
+        set_reg(state.cpu.reg, (get_reg(state.cpu.reg) + 1)&mask)
     return _inner
 
+@_shared
 def dec(reg):
     """Decrement a register"""
+    (get_reg, set_reg) = RegisterFile.accessors(reg)
+    mask = 0xFFFF if len(reg)%2 == 0 else 0xFF
     def _inner(state, *args):
-        if len(reg)%2 == 0:
-            setattr(state.cpu.reg, reg, (0xFFFF + getattr(state.cpu.reg, reg))&0xFFFF)
+        set_reg(state.cpu.reg, (mask + get_reg(state.cpu.reg))&mask)
+    return _inner
+
+def block_transfer(step, repeat=False):
+    """The register and flag updates made once LDI (step=1) or LDD (step=-1) has written its byte. If repeat is
+    set, as for LDIR and LDDR, the states which loop back over the instruction are dropped once BC reaches zero."""
+    (get_HL, set_HL) = RegisterFile.accessors("HL")
+    (get_DE, set_DE) = RegisterFile.accessors("DE")
+    (get_BC, set_BC) = RegisterFile.accessors("BC")
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        set_HL(reg, (get_HL(reg) + step)&0xFFFF)
+        set_DE(reg, (get_DE(reg) + step)&0xFFFF)
+        bc = (get_BC(reg) + 0xFFFF)&0xFFFF
+        set_BC(reg, bc)
+        # Bits 5 and 3 come from the byte moved plus A, and V is set until BC reaches zero
+        F = (reg.F&0xC1) | ((state.kwargs['value'] + reg.A)&0x28)
+        if bc != 0:
+            reg.F = F | 0x04
         else:
-            setattr(state.cpu.reg, reg, (0xFF + getattr(state.cpu.reg, reg))&0xFF)
+            reg.F = F
+            if repeat:
+                pipeline = state.cpu.pipeline
+                while len(pipeline) > 1:
+                    pipeline.pop()
+    return _inner
+
+def repeat_instruction():
+    """Move the PC back to the start of a two byte instruction so that it is executed again"""
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        reg.PC = (reg.PC + 0xFFFE)&0xFFFF
     return _inner
 
-def inta(ds):
-    """Acknowledge an interrupt, but ignore the data from the remote device"""
+def inta():
+    """Acknowledge an interrupt, but ignore the data from the remote device (the state's data source)"""
     def _inner(state, *args):
         try:
-            next(ds)
+            next(state.data_source)
         except:
             pass
     return _inner
 
 def on_zero(reg, action):
     """Only take action if register is zero"""
+    (get_reg, _) = RegisterFile.accessors(reg)
     def _inner(state, *args):
-        if getattr(state.cpu.reg, reg) == 0:
+        if get_reg(state.cpu.reg) == 0:
             action(state, *args)
     return _inner
 
 def on_flag(flag, action):
     """Only take action is flag is set"""
+    mask = _FLAG_MASK[flag]
     def _inner(state, *args):
-        if state.cpu.reg.getflag(flag) == 1:
+        if state.cpu.reg.F&mask:
             action(state, *args)
     return _inner
 
 def unless_flag(flag, action):
     """Only take action is flag is not set"""
+    mask = _FLAG_MASK[flag]
     def _inner(state, *args):
-        if state.cpu.reg.getflag(flag) == 0:
+        if not state.cpu.reg.F&mask:
             action(state, *args)
     return _inner
 
@@ -172,100 +294,148 @@ def on_condition(condition , action):
             action(state, *args)
     return _inner
 
-def force_flag(flag, value):
-    """Clear a flag"""
-    def _inner(state, *args):
-        if isinstance(value, collections.Callable):
-            v = value(state, *args)
-        else:
-            v = value
-        if v == 0:
-            state.cpu.reg.resetflag(flag)
-        else:
-            state.cpu.reg.setflag(flag)
-    return _inner
-
 def clear_flag(flag):
     """Clear a flag"""
+    mask = 0xFF - _FLAG_MASK[flag]
     def _inner(state, *args):
-        state.cpu.reg.resetflag(flag)
+        state.cpu.reg.F &= mask
     return _inner
 
 def early_abort():
     """Abort instruction"""
     def _inner(state, *args):
-        while len(state.pipeline) > 1:
-            state.pipeline.pop()
+        while len(state.cpu.pipeline) > 1:
+            state.cpu.pipeline.pop()
     return _inner
 
+@_shared
+def continue_if(flag, is_set, key=None):
+    """Abort the rest of a conditional instruction unless the flag is set (or clear if is_set is False). If key is
+    given the action's parameter is first kept in kwargs[key] for the states which follow."""
+    mask = _FLAG_MASK[flag]
+    # The value F&mask takes when the rest of the instruction is to be skipped, so that the test is a single comparison
+    abort = 0 if is_set else mask
+    if key is not None:
+        def _inner(state, v, *args):
+            state.kwargs[key] = v
+            if state.cpu.reg.F&mask == abort:
+                pipeline = state.cpu.pipeline
+                while len(pipeline) > 1:
+                    pipeline.pop()
+    else:
+        def _inner(state, *args):
+            if state.cpu.reg.F&mask == abort:
+                pipeline = state.cpu.pipeline
+                while len(pipeline) > 1:
+                    pipeline.pop()
+    return _inner
+
+@_shared
+def jp_if(flag, is_set):
+    """Jump to the action's parameter if the flag is set (or clear if is_set is False)"""
+    mask = _FLAG_MASK[flag]
+    taken = mask if is_set else 0
+    def _inner(state, v, *args):
+        if state.cpu.reg.F&mask == taken:
+            state.cpu.reg.PC = v
+    return _inner
+
+def djnz():
+    """Decrement B and keep the displacement of the relative jump, aborting the jump if B has reached zero"""
+    def _inner(state, v):
+        reg = state.cpu.reg
+        b = (reg.B - 1)&0xFF
+        reg.B = b
+        state.kwargs["value"] = v
+        if b == 0:
+            pipeline = state.cpu.pipeline
+            while len(pipeline) > 1:
+                pipeline.pop()
+    return _inner
+
+# The P flag is set for bytes with an even number of bits set
+_PARITY = tuple(1 if bin(b).count('1')%2 == 0 else 0 for b in range(0,256))
+
+def _inc_dec_flags(v, step):
+    """Returns the flags, other than C, set by an 8-bit INC (step=1) or DEC (step=-1) of the value v."""
+    D = v + step
+    d = D&0xFF
+    F = (d&0xA8) | (0x02 if step < 0 else 0x00)
+    if d == 0:
+        F |= 0x40
+    if not (0 <= (v&0xF) + step <= 0xF):
+        F |= 0x10
+    if D > 127 or D < -128:
+        F |= 0x04
+    return F
+
+# 8-bit INC and DEC set every flag other than C from the value alone, so the flags for each value are computed once here
+_INC_FLAGS = bytes(_inc_dec_flags(v, 1) for v in range(0,256))
+_DEC_FLAGS = bytes(_inc_dec_flags(v, -1) for v in range(0,256))
+
+# Tables of the flags which set_flags works out from the low byte of its value alone, shared between every
+# use of the same flags string
+_FLAG_TABLES = {}
+
+def _flag_table(copy_mask, do_Z, do_P, set_mask):
+    """Returns a table giving, for each byte, its copied bits, Z and P (where these are computed) and the forced 1s."""
+    k = (copy_mask, do_Z, do_P, set_mask)
+    if k not in _FLAG_TABLES:
+        _FLAG_TABLES[k] = bytes((d&copy_mask) | set_mask
+                                | (0x40 if do_Z and d == 0 else 0)
+                                | (0x04 if do_P and _PARITY[d] else 0) for d in range(0,256))
+    return _FLAG_TABLES[k]
+
 def set_flags(flags="SZ5-3---", key="value", source=None, value=None, dest=None):
     """Set the flags register according to the passed value"""
+    # The flags string is fixed, so work out once here which bits are copied from the value, which are
+    # computed, and which are forced to 1 or 0. Only the lower seven bits can be forced.
+    copy_mask  = (0x80 if flags[0] == 'S' else 0) | (0x20 if flags[2] == '5' else 0) | (0x08 if flags[4] == '3' else 0)
+    do_Z       = (flags[1] == 'Z')
+    pv         = flags[5] if flags[5] in "*VP" else None
+    do_V       = (pv == 'V')
+    do_iff     = (pv == '*')
+    do_C       = (flags[7] == 'C')
+    set_mask   = sum(1 << n for n in range(0,7) if flags[7-n] == '1')
+    clear_mask = sum(1 << n for n in range(0,7) if flags[7-n] == '0')
+    keep_mask  = 0xFF & ~(copy_mask | (0x40 if do_Z else 0) | (0x04 if pv is not None else 0) | (0x01 if do_C else 0) | set_mask | clear_mask)
+    table      = _flag_table(copy_mask, do_Z, pv == 'P', set_mask)
+    value_is_callable = callable(value)
+    if source is not None:
+        (get_source, _) = RegisterFile.accessors(source)
+    if dest is not None:
+        (_, set_dest) = RegisterFile.accessors(dest)
+
     def _inner(state, *args):
+        reg = state.cpu.reg
         if value is not None:
-            if isinstance(value, collections.Callable):
+            if value_is_callable:
                 D = value(state, *args)
             else:
                 D = value
         elif source is not None:
-            D = getattr(state.cpu.reg, source)
+            D = get_source(reg)
         elif len(args) > 0:
             D = args[0]
         else:
             D = state.kwargs[key]
         d = D&0xFF
 
-        if flags[0] == 'S':
-            if (d >> 7)&0x1 == 1:
-                state.cpu.reg.setflag('S')
-            else:
-                state.cpu.reg.resetflag('S')
-        if flags[1] == 'Z':
-            if (d == 0):
-                state.cpu.reg.setflag('Z')
-            else:
-                state.cpu.reg.resetflag('Z')
-        if flags[2] == '5':
-            if (d >> 5)&0x1 == 1:
-                state.cpu.reg.setflag('5')
-            else:
-                state.cpu.reg.resetflag('5')
-        if flags[4] == '3':
-            if (d >> 3)&0x1 == 1:
-                state.cpu.reg.setflag('3')
-            else:
-                state.cpu.reg.resetflag('3')
-        if flags[5] == '*':
-            if state.cpu.iff2 == 1:
-                state.cpu.reg.setflag('P')
-            else:
-                state.cpu.reg.resetflag('P')
-        elif flags[5] == "V":
+        F = table[d]
+        if do_V:
             if D > 127 or D < -128:
-                state.cpu.reg.setflag("V")
-            else:
-                state.cpu.reg.resetflag("V")
-        elif flags[5] == "P":
-            p = d
-            while p > 1:
-                p = (p&0x1) ^ (p >> 1)
-            if p == 0:
-                state.cpu.reg.setflag("P")
-            else:
-                state.cpu.reg.resetflag("P")
-        if flags[7] == 'C':
-            if D > 255 or D < 0:
-                state.cpu.reg.setflag("C")
-            else:
-                state.cpu.reg.resetflag("C")
-        for n in range(0,7):
-            if flags[7-n] == '1':
-                state.cpu.reg.F = state.cpu.reg.F | (1 << n)
-            elif flags[7-n] == '0':
-                state.cpu.reg.F = state.cpu.reg.F & (0xFF - (1 << n))
+                F |= 0x04
+        elif do_iff and state.cpu.iff2 == 1:
+            F |= 0x04
+        # D lies outside 0-255 exactly when there is anything left after shifting out the low byte
+        if do_C and D >> 8:
+            F |= 0x01
+        reg.F = (reg.F&keep_mask) | F
+
         if key is not None:
             state.kwargs[key] = d
         if dest is not None:
-            setattr(state.cpu.reg, dest, d)
+            set_dest(reg, d)
     return _inner
 
 def di():
@@ -290,62 +460,155 @@ def restore_iff():
         state.cpu.iff1 = state.cpu.iff2
     return _inner
 
+def scf():
+    """Set the carry flag, with bits 5 and 3 taken from A and H and N cleared"""
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        reg.F = (reg.F&0xC4) | (reg.A&0x28) | 0x01
+    return _inner
+
+# CCF complements both H and C, leaving the other flags as they were
+_CCF_FLAGS = bytes((f&0xEC) | (~f&0x11) for f in range(0,256))
+
+def ccf():
+    """Complement the carry flag"""
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        reg.F = _CCF_FLAGS[reg.F]
+    return _inner
+
+def halt():
+    """Hold the PC on the HALT instruction, so that it is executed again, until an interrupt is pending"""
+    def _inner(state, *args):
+        cpu = state.cpu
+        if not cpu.int:
+            cpu.reg.PC = (cpu.reg.PC + 0xFFFF)&0xFFFF
+    return _inner
+
+def cpl():
+    """Complement A, setting H and N"""
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        reg.A = reg.A ^ 0xFF
+        reg.F = reg.F | 0x12
+    return _inner
+
+# The flags set by NEG for each value of A. V is set as it always has been for this instruction, from the result.
+_NEG_FLAGS = bytes(_flag_table(0xA8, True, False, 0x13)[(-a)&0xFF] | (0x04 if (-a)&0xFF > 127 else 0) for a in range(0,256))
+
+def neg():
+    """Negate A"""
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        A = reg.A
+        reg.F = _NEG_FLAGS[A]
+        reg.A = (-A)&0xFF
+    return _inner
+
+def rrd():
+    """The work done by RRD once the byte at (HL) has been read: the value to write back is kept for the next state"""
+    flags = _flag_table(0xA8, True, True, 0x00)
+    def _inner(state, v, *args):
+        reg = state.cpu.reg
+        state.kwargs["value"] = (v >> 4) | (reg.A << 4)
+        d = v&0x0F
+        reg.A = d
+        reg.F = (reg.F&0x01) | flags[d]
+    return _inner
+
+def rld():
+    """The work done by RLD once the byte at (HL) has been read: the value to write back is kept for the next state"""
+    flags = _flag_table(0xA8, True, True, 0x00)
+    def _inner(state, v, *args):
+        reg = state.cpu.reg
+        state.kwargs["value"] = (v << 4) | (reg.A&0x0F)
+        d = v >> 4
+        reg.A = d
+        reg.F = (reg.F&0x01) | flags[d]
+    return _inner
+
+
+def _daa(A, F):
+    """Returns the new values of (A, F) after a DAA instruction."""
+    C = (F >> 0)&0x1
+    H = (F >> 4)&0x1
+    N = (F >> 1)&0x1
+
+    if N == 0:
+        F = 0
+        if A&0xF > 9 or H != 0:
+            A += 0x06
+        if (A>>4) > 9 or C != 0:
+            A += 0x60
+            F = 0x01
+    else:
+        F = 0
+        if (A&0xF) > 9 or H != 0:
+            A -= 0x06
+        if (A>>4) > 9 or C != 0:
+            A -= 0x60
+            F = 0x01
+    A &= 0xFF
+    F |= (N << 1)
+    F |= (A&0xA8)
+    if A == 0x00:
+        F |= 0x40
+    return (A, F)
+
+# DAA depends only on A and the H, N, and C flags, so all 2048 possible results are computed once here, indexed by
+# the three flags (as H<<2 | N<<1 | C) followed by A
+_DAA_TABLE = [ _daa(A, ((i&0x4) << 2) | (i&0x3)) for i in range(0,8) for A in range(0,256) ]
 
 def daa():
     def _inner(state, *args):
-        A = state.cpu.reg.A
-        C = (state.cpu.reg.F >> 0)&0x1
-        H = (state.cpu.reg.F >> 4)&0x1
-        N = (state.cpu.reg.F >> 1)&0x1
-
-        if N == 0:
-            F = 0
-            if A&0xF > 9 or H != 0:
-                A += 0x06
-            if (A>>4) > 9 or C != 0:
-                A += 0x60
-                F = 0x01
-        else:
-            F = 0
-            if (A&0xF) > 9 or H != 0:
-                A -= 0x06
-            if (A>>4) > 9 or C != 0:
-                A -= 0x60
-                F = 0x01
-        A &= 0xFF
-        F |= (N << 1)
-        F |= (A&0xA8)
-        if A == 0x00:
-            F |= 0x40
-        state.cpu.reg.A = A
-        state.cpu.reg.F = F
+        reg = state.cpu.reg
+        F = reg.F
+        (reg.A, reg.F) = _DAA_TABLE[((((F&0x10) >> 2) | (F&0x03)) << 8) | reg.A]
     return _inner
 
 # Machine States
 
 class MachineState(object):
+    # States are touched on every clock cycle, so each class lists its attributes in __slots__ to keep
+    # instances compact and attribute access quick
+    __slots__ = ('cpu', '_read', '_write', 'phase', 'iter', 'args', 'kwargs', 'return_value', 'data_source')
+
     def __init__(self):
         """Descendent classes may add extra parameters here, which are values set at decode time."""
         self.cpu          = None
-        self.iter         = self.run()
-        self.pipeline     = None
+        self._read        = None
+        self._write       = None
+        self.phase        = 0
+        self.iter         = None
         self.args         = []
         self.kwargs       = {}
         self.return_value = None
         self.data_source  = None
 
+    def reset(self):
+        """Returns a state which has finished running to its initial condition, so that it can be
+        reused rather than constructing a new one."""
+        self.phase        = 0
+        self.iter         = None
+        self.args         = []
+        self.kwargs       = {}
+        self.return_value = None
+        return self
+
     def setcpu(self, cpu):
-        self.cpu = cpu
+        self.cpu    = cpu
+        # The memory bus methods are bound once here rather than looked up through the cpu on every access
+        self._read  = cpu._memread
+        self._write = cpu.membus.write
         return self
 
     def set_data_source(self, data_source):
         self.data_source = data_source
         return self
 
-    def fetchlocked(self):
-        """Returns True if a pipeline containing this machine state should block the state machine from
-        starting a new OCF pipeline."""
-        return False
+    # True if a pipeline containing this machine state should block the state machine from starting a
+    # new OCF pipeline. This is a plain attribute rather than a method so that checking it is just a load.
+    fetchlocked = False
 
     def run(self):
         """Should be a generator function. Don't yield values (they'll be ignored).
@@ -355,21 +618,45 @@ class MachineState(object):
         return
         yield None
 
-    def clock(self, pipeline):
-        self.pipeline = pipeline
+    def step(self):
+        """Advance this state by one clock cycle, returning True for the cycle in which it completes.
+        By default this drives the generator returned by run(). All of the states defined in this module
+        instead override this directly, counting their clock cycles in self.phase, since resuming a
+        generator on every cycle and catching the StopIteration at its end are comparatively expensive."""
+        if self.iter is None:
+            self.iter = self.run()
         try:
-            return next(self.iter)
+            next(self.iter)
         except StopIteration:
-            self.pipeline.pop(0)
-            if len(self.pipeline) > 0:
-                self.pipeline[0].args   = self.args
-                self.pipeline[0].kwargs = self.kwargs
+            return True
+        return False
+
+    def clock(self, pipeline):
+        """Advance this state by one clock cycle. The pipeline is a deque with this state at its head,
+        when the state completes it is removed from the pipeline."""
+        if self.step():
+            self.retire(pipeline)
             return self.return_value
 
+    def retire(self, pipeline):
+        """Called once this state has finished running to remove it from the head of the pipeline and
+        hand its args and kwargs on to the next state."""
+        pipeline.popleft()
+        if pipeline:
+            pipeline[0].args   = self.args
+            pipeline[0].kwargs = self.kwargs
+
 def high_after_low(x,y):
     return ((x << 8) | y)
 
+@_shared
 def OCF(prefix=None, data_source=None, extra=0):
+    fetch_prefix = (prefix,) if isinstance(prefix, int) else prefix
+    fetch_extra  = extra
+    # The full instruction code for each possible byte following the prefix, built once and indexed by that byte,
+    # so that fetching a prefixed instruction doesn't build a new tuple (and then hash it afresh) every time
+    fetch_codes  = tuple(fetch_prefix + (n,) for n in range(256)) if fetch_prefix is not None else None
+
     class _OCF(MachineState):
         """This state fetches an OP Code from memory and advances the PC in 4 t-cycles.
         Initialisation Parameters:
@@ -388,50 +675,79 @@ def OCF(prefix=None, data_source=None, extra=0):
         Time Taken:
         - 4 clock cycles, or more if decode indicates there should be."""
 
+        __slots__ = ('pc', 'inst', 'action', 'states', 'wait')
+
+        # These are fixed for the class, so are held as class attributes rather than being set on
+        # every instance, since a new instance is created for every instruction fetched.
+        prefix = fetch_prefix
+        extra  = fetch_extra
+        fetchlocked = True
+
         def __init__(self):
-            self.prefix      = prefix
-            self.extra       = extra
             super(_OCF,self).__init__()
             self.data_source = data_source
 
-        def fetchlocked(self):
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                self.pc = self.cpu.reg.PC
+                return False
+
+            if phase == 1:
+                if self.data_source is not None:
+                    try:
+                        inst = next(self.data_source)
+                    except StopIteration:
+                        inst = 0x00
+                else:
+                    inst = self._read(self.pc)
+
+                if fetch_codes is not None:
+                    inst = fetch_codes[inst]
+                self.cpu.most_recent_instruction = inst
+                self.inst = inst
+                return False
+
+            if phase == 2:
+                inst = self.inst
+                (extra_clocks, actions, states) = decode_instruction(inst)
+                if self.data_source is None:
+                    self.cpu.reg.PC = self.pc + 1
+                # The states for each instruction are only built the first time it is executed on this cpu, after
+                # that the same objects are reset and reused, which is safe since they will all have finished
+                # before the instruction can be fetched again. The instruction's actions are combined into a single
+                # call at the same time.
+                cached = self.cpu._state_cache.get(inst)
+                if cached is None:
+                    cached = self.cpu._state_cache[inst] = ([ state().setcpu(self.cpu) for state in states ],
+                                                            do_each(*actions) if actions else None)
+                (built, self.action) = cached
+                data_source = self.data_source
+                for state in built:
+                    # Rewinding the phase is all that a full reset() would achieve here: none of these states
+                    # run as generators, and each is handed its args and kwargs by the state before it
+                    state.phase       = 0
+                    state.data_source = data_source
+                self.states = built
+                self.wait   = self.extra + extra_clocks - 1
+                return False
+
+            if phase - 3 < self.wait:
+                return False
+
+            self.cpu.pipeline.extend(self.states)
+            if self.action is not None:
+                self.action(self)
             return True
 
-        def run(self):
-            PC = self.cpu.reg.PC
-            yield
-
-            if self.data_source is not None:
-                try:
-                    inst = next(self.data_source)
-                except StopIteration:
-                    inst = 0x00
-            else:
-                inst = self.cpu.membus.read(PC)
-
-            if isinstance(self.prefix, int):
-                inst = (self.prefix, inst)
-            elif isinstance(self.prefix, tuple):
-                inst = tuple(list(self.prefix) + [ inst ])
-            self.cpu.most_recent_instruction = inst
-            yield
-
-            (extra_clocks, actions, states) = decode_instruction(inst)
-            if self.data_source is None:
-                self.cpu.reg.PC = PC + 1
-            states = [ state().setcpu(self.cpu).set_data_source(self.data_source) for state in states ]
-            yield
-
-            for n in range(0,self.extra + extra_clocks-1):
-                yield
-
-            self.pipeline.extend(states)
-            for action in actions:
-                action(self)
-            return
     return _OCF
 
+@_shared
 def OD(compound=high_after_low, action=None, key="value", signed=False):
+    # Almost every 16-bit read combines its bytes with high_after_low, so that case is done inline
+    compound_is_high_after_low = compound is high_after_low
+
     class _OD(MachineState):
         """This state fetches an data byte from memory and advances the PC in 3 t-cycles.
         Initialisation Parameters:
@@ -451,6 +767,9 @@ def OD(compound=high_after_low, action=None, key="value", signed=False):
         Time Taken:
         - 3 clock cycles"""
 
+        __slots__ = ('key', 'compound', 'action', 'signed', 'pc', 'data')
+        fetchlocked = True
+
         def __init__(self):
             self.key      = key
             self.compound = compound
@@ -458,36 +777,111 @@ def OD(compound=high_after_low, action=None, key="value", signed=False):
             self.signed   = signed
             super(_OD, self).__init__()
 
-        def fetchlocked(self):
-            return True
-
-        def run(self):
-            PC = self.cpu.reg.PC
-            yield
-
-            if self.data_source is None:
-                D = self.cpu.membus.read(PC)
-            else:
-                try:
-                    D = next(self.data_source)
-                except StopIteration:
-                    D = 0x00
-            if signed and D >= 0x80:
-                D = D - 0x100
-            yield
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                self.pc = self.cpu.reg.PC
+                return False
 
+            if phase == 1:
+                if self.data_source is None:
+                    D = self._read(self.pc)
+                else:
+                    try:
+                        D = next(self.data_source)
+                    except StopIteration:
+                        D = 0x00
+                if signed and D >= 0x80:
+                    D = D - 0x100
+                self.data = D
+                return False
+
+            D = self.data
             if self.data_source is None:
-                self.cpu.reg.PC = PC + 1
-            if self.key in self.kwargs and self.compound is not None:
-                D = self.compound(D, self.kwargs[self.key])
+                self.cpu.reg.PC = self.pc + 1
+            if self.key in self.kwargs:
+                if compound_is_high_after_low:
+                    D = (D << 8) | self.kwargs[self.key]
+                elif compound is not None:
+                    D = compound(D, self.kwargs[self.key])
             if self.action is not None:
                 self.action(self, D)
             else:
                 self.kwargs[self.key] = D
-            return
+            return True
+
     return _OD
 
-def MR(address=None, indirect=None, compound=high_after_low, action=None, incaddr=True, verbose=False):
+@_shared
+def OD16(action=None, key="value"):
+
+    class _OD16(MachineState):
+        """This state fetches a 16-bit data word from memory, low byte first, and advances the PC past it in the time
+        of two OD states:
+        Initialisation Parameters:
+        - Optionally: 'action' a method which takes a two parameters, the state and a single integer.
+        It will be called with the word fetched as the last operation in the state.
+        - Optionally: 'key' the name under which the word is cascaded if there is no action
+        Args In:
+        - None
+        Args Out:
+        - 'value' (or the key given) : the word fetched, cascaded to the next state
+        Side Effects:
+        - Increments PC twice, calls 'action'
+        Returned Values:
+        - None
+        Time Taken:
+        - 6 clock cycles"""
+
+        __slots__ = ('pc', 'data')
+        fetchlocked = True
+
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0 or phase == 3:
+                self.pc = self.cpu.reg.PC
+                return False
+
+            if phase == 1 or phase == 4:
+                if self.data_source is None:
+                    self.data = self._read(self.pc)
+                else:
+                    try:
+                        self.data = next(self.data_source)
+                    except StopIteration:
+                        self.data = 0x00
+                return False
+
+            if self.data_source is None:
+                self.cpu.reg.PC = self.pc + 1
+            if phase == 2:
+                # The low byte is cascaded as two separate OD states would, so that anything already held under
+                # the key is combined with it in the same way
+                D = self.data
+                if key in self.kwargs:
+                    D = (D << 8) | self.kwargs[key]
+                self.kwargs[key] = D
+                return False
+
+            D = (self.data << 8) | self.kwargs[key]
+            if action is not None:
+                action(self, D)
+            else:
+                self.kwargs[key] = D
+            return True
+
+    return _OD16
+
+@_shared
+def MR(address=None, indirect=None, compound=high_after_low, action=None, incaddr=True):
+    get_indirect = RegisterFile.accessors(indirect)[0] if indirect is not None else None
+    # (HL) is by far the most common indirect address, so that case is read inline
+    indirect_is_HL = (address is None and indirect == "HL")
+    # Almost every 16-bit read combines its bytes with high_after_low, so that case is done inline
+    compound_is_high_after_low = compound is high_after_low
+
     class _MR(MachineState):
         """This state fetches a data byte from memory at a specified address (possibly using register indirect or indexed addressing):
         Initialisation Parameters:
@@ -509,59 +903,64 @@ def MR(address=None, indirect=None, compound=high_after_low, action=None, incadd
         Time Taken:
         - 3 clock cycles"""
 
+        __slots__ = ('address', 'indirect', 'compound', 'action', 'incaddr', 'addr', 'data')
+        fetchlocked = True
+
         def __init__(self):
             self.address  = address
             self.indirect = indirect
             self.compound = compound
             self.action   = action
             self.incaddr  = incaddr
-            self.verbose  = verbose
             super(_MR, self).__init__()
 
-        def fetchlocked(self):
-            return True
-
-        def run(self):
-            if self.address is None:
-                if self.indirect is None:
-                    if 'address' not in self.kwargs:
-                        raise Exception("MR without either address of indirect specified")
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                if indirect_is_HL:
+                    reg = self.cpu.reg
+                    self.addr = reg.H << 8 | reg.L
+                    return False
+                address = self.address
+                if address is None:
+                    if self.indirect is None:
+                        if 'address' not in self.kwargs:
+                            raise Exception("MR without either address of indirect specified")
+                        else:
+                            address = self.kwargs['address']
                     else:
-                        self.address = self.kwargs['address']
-                        if self.verbose:
-                            print("MR: Address 0x{:X} taken from kwargs[{}]".format(self.address, 'address'))
+                        address = get_indirect(self.cpu.reg)
+                self.addr = address
+                return False
+
+            if phase == 1:
+                self.data = self._read(self.addr)
+                return False
+
+            D = self.data
+            if 'value' in self.kwargs and compound is not None:
+                if compound_is_high_after_low:
+                    D = (D << 8) | self.kwargs['value']
                 else:
-                    self.address = getattr(self.cpu.reg, self.indirect)
-                    if self.verbose:
-                        print("MR: Address 0x{:X} taken from register {}".format(self.address, self.indirect))
-            yield
-
-            D = self.cpu.membus.read(self.address)
-            if self.verbose:
-                print("MR: Data 0x{:X} read from address 0x{:X}".format(D, self.address))
-            yield
-
-            if 'value' in self.kwargs and self.compound is not None:
-                D = self.compound(D, self.kwargs['value'])
-                if self.verbose:
-                    print("MR: Compound data with 0x{:X} to get 0x{:X}".format(self.kwargs['value'], D))
+                    D = compound(D, self.kwargs['value'])
             if self.incaddr:
-                self.kwargs['address'] = self.address + 1
-                if self.verbose:
-                    print("MR: Increment address to 0x{:X}".format(self.kwargs['address']))
+                self.kwargs['address'] = self.addr + 1
             if self.action is not None:
                 self.action(self, D)
-                if self.verbose:
-                    print("MR: Performing Action")
             else:
                 self.kwargs['value'] = D
-                if self.verbose:
-                    print("MR: Setting 'value' in kwargs to 0x{:X}".format(D))
-            return
+            return True
 
     return _MR
 
-def MW(address=None, indirect=None, value=None, source=None, action=None, extra=0, verbose=False):
+@_shared
+def MW(address=None, indirect=None, value=None, source=None, action=None, extra=0):
+    get_indirect = RegisterFile.accessors(indirect)[0] if indirect is not None else None
+    get_source   = RegisterFile.accessors(source)[0] if source is not None else None
+    # (HL) is by far the most common indirect address, so that case is read inline
+    indirect_is_HL = (address is None and indirect == "HL")
+
     class _MW(MachineState):
         """This state writes a data byte to memory at a specified address (possibly using register indirect or indexed addressing):
         Initialisation Parameters:
@@ -583,6 +982,9 @@ def MW(address=None, indirect=None, value=None, source=None, action=None, extra=
         Time Taken:
         - 3 clock cycles"""
 
+        __slots__ = ('address', 'indirect', 'value', 'source', 'action', 'extra', 'addr', 'data')
+        fetchlocked = True
+
         def __init__(self):
             self.address  = address
             self.indirect = indirect
@@ -590,64 +992,147 @@ def MW(address=None, indirect=None, value=None, source=None, action=None, extra=
             self.source   = source
             self.action   = action
             self.extra    = extra
-            self.verbose  = verbose
             super(_MW, self).__init__()
 
-        def fetchlocked(self):
-            return True
-
-        def run(self):
-            if self.address is None:
-                if self.indirect is None:
-                    if 'address' not in self.kwargs:
-                        raise Exception("MW without either address of indirect specified")
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                if indirect_is_HL:
+                    reg = self.cpu.reg
+                    self.addr = reg.H << 8 | reg.L
+                    return False
+                address = self.address
+                if address is None:
+                    if self.indirect is None:
+                        if 'address' not in self.kwargs:
+                            raise Exception("MW without either address of indirect specified")
+                        else:
+                            address = self.kwargs['address']
                     else:
-                        self.address = self.kwargs['address']
-                        if self.verbose:
-                            print("MW: Address 0x{:X} from kwargs".format(self.address))
-                else:
-                    self.address = getattr(self.cpu.reg, self.indirect)
-                    if self.verbose:
-                        print("MW: Address 0x{:X} from register {}".format(self.address, self.indirect))
-            yield
-
-            if self.value is None:
-                if self.source is None:
-                    if 'value' not in self.kwargs:
-                        raise Exception("MW without either value or source specified")
+                        address = get_indirect(self.cpu.reg)
+                self.addr = address
+                return False
+
+            if phase == 1:
+                value = self.value
+                if value is None:
+                    if self.source is None:
+                        if 'value' not in self.kwargs:
+                            raise Exception("MW without either value or source specified")
+                        else:
+                            value = self.kwargs['value']
                     else:
-                        self.value = self.kwargs['value']
-                        if self.verbose:
-                            print("MW: Value 0x{:X} from kwargs".format(self.value))
-                else:
-                    self.value = getattr(self.cpu.reg, self.source)
-                    if self.verbose:
-                        print("MW: Value 0x{:X} from register {}".format(self.value, self.source))
-            elif isinstance(self.value, collections.Callable):
-                self.value = self.value(self)
-                if self.verbose:
-                    print("MW: Value 0x{:X} from callable".format(self.value))
-            yield
-
-            self.cpu.membus.write(self.address, self.value)
-            if self.verbose:
-                print("MW: Writing 0x{:X} to 0x{:X}".format(self.value, self.address))
-            self.kwargs['address'] = self.address + 1
-            if self.verbose:
-                print("MW: Increment Address to 0x{:X}".format(self.kwargs['address']))
-
-            for n in range(0,self.extra):
-                yield
+                        value = get_source(self.cpu.reg)
+                elif callable(value):
+                    value = value(self)
+                self.data = value
+                return False
+
+            if phase == 2:
+                self._write(self.addr, self.data)
+                self.kwargs['address'] = self.addr + 1
+
+            if phase - 2 < self.extra:
+                return False
 
             if self.action is not None:
-                self.action(self, self.value)
-                if self.verbose:
-                    print("MW: Taking action")
-            return
-        
+                self.action(self, self.data)
+            return True
+
     return _MW
 
+@_shared
+def MR16(high, low):
+    (_, set_high) = RegisterFile.accessors(high)
+    (_, set_low)  = RegisterFile.accessors(low)
+
+    class _MR16(MachineState):
+        """This state loads a register pair from two bytes of memory, low byte first, in the time of two MR states:
+        Initialisation Parameters:
+        - 'high' the name of the register to load with the second byte
+        - 'low' the name of the register to load with the first byte
+        Args In:
+        - 'address' the address of the first byte, cascaded from a previous state
+        Args Out:
+        - 'address': the address of the second byte plus one
+        Side Effects:
+        - Loads the registers
+        Returned Values:
+        - None
+        Time Taken:
+        - 6 clock cycles"""
+
+        __slots__ = ('addr', 'data')
+        fetchlocked = True
+
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                self.addr = self.kwargs['address']
+            elif phase == 1:
+                self.data = self._read(self.addr)
+            elif phase == 2:
+                set_low(self.cpu.reg, self.data)
+            elif phase == 4:
+                self.data = self._read(self.addr + 1)
+            elif phase == 5:
+                set_high(self.cpu.reg, self.data)
+                self.kwargs['address'] = self.addr + 2
+                return True
+            return False
+
+    return _MR16
+
+@_shared
+def MW16(high, low):
+    (get_high, _) = RegisterFile.accessors(high)
+    (get_low, _)  = RegisterFile.accessors(low)
+
+    class _MW16(MachineState):
+        """This state writes a register pair to two bytes of memory, low byte first, in the time of two MW states:
+        Initialisation Parameters:
+        - 'high' the name of the register to write to the second byte
+        - 'low' the name of the register to write to the first byte
+        Args In:
+        - 'address' the address of the first byte, cascaded from a previous state
+        Args Out:
+        - 'address': the address of the second byte plus one
+        Side Effects:
+        - None
+        Returned Values:
+        - None
+        Time Taken:
+        - 6 clock cycles"""
+
+        __slots__ = ('addr', 'data')
+        fetchlocked = True
+
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                self.addr = self.kwargs['address']
+            elif phase == 1:
+                self.data = get_low(self.cpu.reg)
+            elif phase == 2:
+                self._write(self.addr, self.data)
+            elif phase == 4:
+                self.data = get_high(self.cpu.reg)
+            elif phase == 5:
+                self._write(self.addr + 1, self.data)
+                self.kwargs['address'] = self.addr + 2
+                return True
+            return False
+
+    return _MW16
+
+@_shared
 def SR(compound=high_after_low, action=None, extra=0):
+    # Almost every 16-bit read combines its bytes with high_after_low, so that case is done inline
+    compound_is_high_after_low = compound is high_after_low
+
     class _SR(MachineState):
         """This state fetches a data byte from memory at the top of the stack and increments the stack pointer:
         Initialisation Parameters:
@@ -668,36 +1153,47 @@ def SR(compound=high_after_low, action=None, extra=0):
         Time Taken:
         - 3 clock cycles"""
 
+        __slots__ = ('compound', 'action', 'extra', 'addr', 'data')
+        fetchlocked = True
+
         def __init__(self):
             self.compound = compound
             self.action   = action
             self.extra    = extra
             super(_SR, self).__init__()
 
-        def fetchlocked(self):
-            return True
-
-        def run(self):
-            self.address = self.cpu.reg.SP
-            yield
-
-            D = self.cpu.membus.read(self.address)
-            yield
-
-            for n in range(0,self.extra):
-                yield
-
-            if 'value' in self.kwargs and self.compound is not None:
-                D = self.compound(D, self.kwargs['value'])
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                self.addr = self.cpu.reg.SP
+                return False
+
+            if phase == 1:
+                self.data = self._read(self.addr)
+                return False
+
+            if phase - 2 < self.extra:
+                return False
+
+            D = self.data
+            if 'value' in self.kwargs:
+                if compound_is_high_after_low:
+                    D = (D << 8) | self.kwargs['value']
+                elif compound is not None:
+                    D = compound(D, self.kwargs['value'])
             self.kwargs['value'] = D
             self.cpu.reg.SP = self.cpu.reg.SP + 1
             if self.action is not None:
                 self.action(self, D)
-            return
+            return True
 
     return _SR
 
+@_shared
 def SW(source=None, key='value', extra=0, action=None):
+    get_source = RegisterFile.accessors(source)[0] if source is not None else None
+
     class _SW(MachineState):
         """This state decrements the stack pointer and writes a data byte to memory at the top of the stack:
         Initialisation Parameters:
@@ -715,6 +1211,9 @@ def SW(source=None, key='value', extra=0, action=None):
         Time Taken:
         - 3 clock cycles"""
 
+        __slots__ = ('source', 'key', 'extra', 'action', 'addr')
+        fetchlocked = True
+
         def __init__(self):
             self.source = source
             self.key    = key
@@ -722,32 +1221,125 @@ def SW(source=None, key='value', extra=0, action=None):
             self.action = action
             super(_SW, self).__init__()
 
-        def fetchlocked(self):
-            return True
-
-        def run(self):
-            self.cpu.reg.SP = self.cpu.reg.SP - 1
-            yield
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                self.cpu.reg.SP = self.cpu.reg.SP - 1
+                return False
 
-            for n in range(0,self.extra):
-                yield
+            if phase <= self.extra:
+                return False
 
-            self.address = self.cpu.reg.SP
-            yield
+            if phase == self.extra + 1:
+                self.addr = self.cpu.reg.SP
+                return False
 
             if self.source is not None:
-                D = getattr(self.cpu.reg, self.source)
+                D = get_source(self.cpu.reg)
             else:
                 D = self.kwargs[self.key]
 
-            self.cpu.membus.write(self.address, D)
+            self._write(self.addr, D)
 
             if self.action is not None:
                 self.action(self, D)
-            return
+            return True
 
     return _SW
 
+@_shared
+def SR16(action=None):
+
+    class _SR16(MachineState):
+        """This state pops a 16-bit word from the top of the stack, low byte first, in the time of two SR states:
+        Initialisation Parameters:
+        - Optionally: 'action' a method which takes a two parameters, the state and a single integer.
+        It will be called with the word popped as the last operation in the state.
+        Args In:
+        - None
+        Args Out:
+        - 'value' : the word popped, cascaded to the next state
+        Side Effects:
+        - Calls 'action'
+        - Increments SP twice
+        Returned Values:
+        - None
+        Time Taken:
+        - 6 clock cycles"""
+
+        __slots__ = ('addr', 'data')
+        fetchlocked = True
+
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0 or phase == 3:
+                self.addr = self.cpu.reg.SP
+                return False
+
+            if phase == 1 or phase == 4:
+                self.data = self._read(self.addr)
+                return False
+
+            D = self.data
+            if 'value' in self.kwargs:
+                D = (D << 8) | self.kwargs['value']
+            self.kwargs['value'] = D
+            self.cpu.reg.SP = self.cpu.reg.SP + 1
+            if phase == 2:
+                return False
+            if action is not None:
+                action(self, D)
+            return True
+
+    return _SR16
+
+@_shared
+def SW16(high, low, action=None):
+    (get_high, _) = RegisterFile.accessors(high)
+    (get_low, _)  = RegisterFile.accessors(low)
+
+    class _SW16(MachineState):
+        """This state pushes a register pair onto the stack, high byte first, in the time of two SW states:
+        Initialisation Parameters:
+        - 'high' the name of the register to push first
+        - 'low' the name of the register to push second
+        - Optionally: 'action' an action to be taken with the low byte at the end of the state
+        Args In:
+        - None
+        Args Out:
+        - None
+        Side Effects:
+        - Decrements SP twice
+        Returned Values:
+        - None
+        Time Taken:
+        - 6 clock cycles"""
+
+        __slots__ = ('addr',)
+        fetchlocked = True
+
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0 or phase == 3:
+                self.cpu.reg.SP = self.cpu.reg.SP - 1
+            elif phase == 1 or phase == 4:
+                self.addr = self.cpu.reg.SP
+            elif phase == 2:
+                self._write(self.addr, get_high(self.cpu.reg))
+            else:
+                D = get_low(self.cpu.reg)
+                self._write(self.addr, D)
+                if action is not None:
+                    action(self, D)
+                return True
+            return False
+
+    return _SW16
+
+@_shared
 def IO(ticks, locked, transform=None, action=None, key="value"):
     class _IO(MachineState):
         """This state does nothing but take in and pass on args, apply transform to them and perform action
@@ -767,6 +1359,8 @@ def IO(ticks, locked, transform=None, action=None, key="value"):
         Time Taken:
         - variable"""
 
+        __slots__ = ('ticks', 'locked', 'transform', 'action', 'key', 'fetchlocked')
+
         def __init__(self):
             self.ticks  = ticks
             self.locked = locked
@@ -774,25 +1368,34 @@ def IO(ticks, locked, transform=None, action=None, key="value"):
             self.action   = action
             self.key      = key
             super(_IO, self).__init__()
-
-        def fetchlocked(self):
-            return self.locked
-
-        def run(self):
-            for key in self.kwargs:
-                if isinstance(self.transform, collections.Callable) and key == self.key:
-                    self.kwargs[key] = self.transform(self, self.kwargs[key])
-                elif isinstance(self.transform, dict) and key in self.transform:
-                    self.kwargs[key] = self.transform[key](self, self.kwargs[key])
-            for n in range(0,self.ticks - 1):
-                yield
-            if isinstance(self.action, collections.Callable):
+            self.fetchlocked = locked
+
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                for key in self.kwargs:
+                    if callable(self.transform) and key == self.key:
+                        self.kwargs[key] = self.transform(self, self.kwargs[key])
+                    elif isinstance(self.transform, dict) and key in self.transform:
+                        self.kwargs[key] = self.transform[key](self, self.kwargs[key])
+
+            if phase < self.ticks - 1:
+                return False
+
+            if callable(self.action):
                 self.action(self)
-            return
+            return True
         
+
     return _IO
 
+@_shared
 def PR(high=None, low=None, action=None, dest=None):
+    get_high = RegisterFile.accessors(high)[0] if high is not None else None
+    get_low  = RegisterFile.accessors(low)[0] if low is not None else None
+    set_dest = RegisterFile.accessors(dest)[1] if dest is not None else None
+
     class _PR(MachineState):
         """This state fetches a data byte from an output port:
         Initialisation Parameters:
@@ -812,6 +1415,9 @@ def PR(high=None, low=None, action=None, dest=None):
         Time Taken:
         - 4 clock cycles"""
 
+        __slots__ = ('high', 'low', 'dest', 'action', 'port', 'data')
+        fetchlocked = True
+
         def __init__(self):
             self.high   = high
             self.low    = low
@@ -819,38 +1425,48 @@ def PR(high=None, low=None, action=None, dest=None):
             self.action = action
             super(_PR, self).__init__()
 
-        def fetchlocked(self):
-            return True
-
-        def run(self):
-            if self.low is not None:
-                low = getattr(self.cpu.reg, self.low)
-            else:
-                low = (self.kwargs['value'])&0xFF
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                if self.low is not None:
+                    low = get_low(self.cpu.reg)
+                else:
+                    low = (self.kwargs['value'])&0xFF
 
-            if self.high is not None:
-                high = getattr(self.cpu.reg, self.high)
-            else:
-                high = 0x00
-            yield
+                if self.high is not None:
+                    high = get_high(self.cpu.reg)
+                else:
+                    high = 0x00
+                self.port = (low, high)
+                return False
 
-            D = self.cpu.iobus.read(low, high)
-            yield
+            if phase == 1:
+                (low, high) = self.port
+                self.data = self.cpu.iobus.read(low, high)
+                return False
 
-            yield
+            if phase == 2:
+                return False
 
+            D = self.data
             if self.dest is not None:
-                setattr(self.cpu.reg, self.dest, D)
+                set_dest(self.cpu.reg, D)
 
             self.kwargs['value'] = D
 
-            if isinstance(self.action, collections.Callable):
+            if callable(self.action):
                 self.action(self, D)
-            return
+            return True
 
     return _PR
 
+@_shared
 def PW(high=None, low=None, action=None, source=None):
+    get_high   = RegisterFile.accessors(high)[0] if high is not None else None
+    get_low    = RegisterFile.accessors(low)[0] if low is not None else None
+    get_source = RegisterFile.accessors(source)[0] if source is not None else None
+
     class _PW(MachineState):
         """This state writes a data byte to an output port:
         Initialisation Parameters:
@@ -871,6 +1487,9 @@ def PW(high=None, low=None, action=None, source=None):
         Time Taken:
         - 4 clock cycles"""
 
+        __slots__ = ('high', 'low', 'source', 'action', 'port', 'data')
+        fetchlocked = True
+
         def __init__(self):
             self.high   = high
             self.low    = low
@@ -878,283 +1497,445 @@ def PW(high=None, low=None, action=None, source=None):
             self.action = action
             super(_PW, self).__init__()
 
-        def fetchlocked(self):
-            return True
-
-        def run(self):
-            if self.low is not None:
-                low = getattr(self.cpu.reg, self.low)
-            else:
-                low = (self.kwargs['address'])&0xFF
+        def step(self):
+            phase = self.phase
+            self.phase = phase + 1
+            if phase == 0:
+                if self.low is not None:
+                    low = get_low(self.cpu.reg)
+                else:
+                    low = (self.kwargs['address'])&0xFF
 
-            if self.high is not None:
-                high = getattr(self.cpu.reg, self.high)
-            else:
-                high = 0x00
-            yield
+                if self.high is not None:
+                    high = get_high(self.cpu.reg)
+                else:
+                    high = 0x00
+                self.port = (low, high)
+                return False
 
-            if self.source is not None:
-                D = getattr(self.cpu.reg, self.source)
-            else:
-                D = (self.kwargs['value'])&0xFF
-            yield
+            if phase == 1:
+                if self.source is not None:
+                    self.data = get_source(self.cpu.reg)
+                else:
+                    self.data = (self.kwargs['value'])&0xFF
+                return False
 
-            self.cpu.iobus.write(low, high, D)
-            yield
+            D = self.data
+            if phase == 2:
+                (low, high) = self.port
+                self.cpu.iobus.write(low, high, D)
+                return False
 
             self.kwargs['value'] = D
 
-            if isinstance(self.action, collections.Callable):
+            if callable(self.action):
                 self.action(self, D)
-            return
+            return True
 
     return _PW
 
+def _add16_with_carry(get_summand, carry_sign, N):
+    """Returns a single action which does the work of ADC HL,rr (carry_sign=1, N=0) or SBC HL,rr (carry_sign=-1, N=1), where
+    get_summand returns the value to be added to HL (the two's complement of rr in the case of SBC). The flags are
+    computed as they always have been for these instructions, with V and C taken from the sum of the high bytes."""
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        v   = reg.HL
+        s   = get_summand(reg)
+        c   = carry_sign*(reg.F&0x01)
+        low = ((s&0xFF) + (v&0xFF) + c) >> 8
+        D   = (s >> 8) + (v >> 8) + low
+        HL  = (s + v + c)&0xFFFF
+        reg.HL = HL
+        F = (D&0xA8) | N
+        if HL == 0x0000:
+            F |= 0x40
+        if ((s >> 8)&0xF) + ((v >> 8)&0xF) + low > 0xF:
+            F |= 0x10
+        if D > 127 or D < -128:
+            F |= 0x04
+        if D >> 8:
+            F |= 0x01
+        reg.F = F
+    return _inner
+
+def ADD16(dest, source):
+    """This instruction gets messy in the table, so we use this function to template it"""
+    (get_dest, set_dest) = RegisterFile.accessors(dest)
+    (get_source, _) = RegisterFile.accessors(source)
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        x   = get_dest(reg)
+        r   = get_source(reg)
+        D   = x + r
+        # The flags come from the high byte of the sum, S, Z, and V are unchanged. Bit 12 of the operands and sum
+        # differs in parity exactly when there was a carry out of bit 11, which is the half carry.
+        reg.F = (reg.F&0xC4) | ((D >> 8)&0x28) | (((x ^ r ^ D) >> 8)&0x10) | (D >> 16)
+        set_dest(reg, D&0xFFFF)
+    return _inner
+
 def ADC16(reg):
     """This instruction gets messy in the table, so we use this function to template it"""
-    return [ RRr('value',   'HL'),
-             RRr('summand', reg),
-             force_flag('H', lambda  state : 1 if (((state.kwargs['summand']>>8)&0xF)+((state.kwargs['value']>>8)&0xF)+
-                                                       (((state.kwargs['summand']&0xFF) + (state.kwargs['value']&0xFF)
-                                                             +state.cpu.reg.getflag('C'))>>8) > 0xF) else 0),
-             LDr('HL', value=lambda state : (state.kwargs['summand'] + state.kwargs['value'] + state.cpu.reg.getflag('C'))&0xFFFF),
-             set_flags("S-5-3V0C", value=lambda state : (state.kwargs['summand'] >> 8) + (state.kwargs['value']>>8) +
-                           (((state.kwargs['summand']&0xFF) + (state.kwargs['value']&0xFF) + state.cpu.reg.getflag('C'))>>8)),
-             force_flag('Z', value=lambda state : 1 if state.cpu.reg.HL == 0x0000 else 0),]
+    (get_reg, _) = RegisterFile.accessors(reg)
+    return [ _add16_with_carry(get_reg, 1, 0x00), ]
 
 def SBC16(reg):
     """This instruction gets messy in the table, so we use this function to template it"""
-    return [ RRr('value',   'HL'),
-             RRr('summand', value=lambda state : (-getattr(state.cpu.reg,reg))&0xFFFF),
-             force_flag('H', lambda  state : 1 if (((state.kwargs['summand']>>8)&0xF)+((state.kwargs['value']>>8)&0xF)+
-                                                       (((state.kwargs['summand']&0xFF) + (state.kwargs['value']&0xFF)
-                                                             -state.cpu.reg.getflag('C'))>>8) > 0xF) else 0),
-             LDr('HL', value=lambda state : (state.kwargs['summand'] + state.kwargs['value'] - state.cpu.reg.getflag('C'))&0xFFFF),
-             set_flags("S-5-3V1C", value=lambda state : (state.kwargs['summand'] >> 8) + (state.kwargs['value']>>8) +
-                           (((state.kwargs['summand']&0xFF) + (state.kwargs['value']&0xFF) - state.cpu.reg.getflag('C'))>>8)),
-             force_flag('Z', value=lambda state : 1 if state.cpu.reg.HL == 0x0000 else 0),]
+    (get_reg, _) = RegisterFile.accessors(reg)
+    return [ _add16_with_carry(lambda r : (-get_reg(r))&0xFFFF, -1, 0x02), ]
 
-def RLC(reg=None, key='value'):
-    """This instruction gets a little messy in the table, so this helps simplify it."""
+@_shared
+def _inc_dec(table, step, reg, key):
+    """Returns an action which does an 8-bit increment or decrement, setting the flags from table. If reg is given that
+    register is changed in place, otherwise the action's parameter is changed and the new value stored in kwargs[key]."""
     if reg is not None:
-        return set_flags("--503-0C", value=lambda state : (getattr(state.cpu.reg,reg) << 1) | (getattr(state.cpu.reg,reg) >> 7), dest=reg)
+        (get_reg, set_reg) = RegisterFile.accessors(reg)
+        def _inner(state, *args):
+            regs = state.cpu.reg
+            v = get_reg(regs)
+            regs.F = (regs.F&0x01) | table[v]
+            set_reg(regs, (v + step)&0xFF)
     else:
-        return set_flags("--503-0C", value=lambda state,v : (v << 1) | (v >> 7), key=key)
+        def _inner(state, v, *args):
+            regs = state.cpu.reg
+            regs.F = (regs.F&0x01) | table[v]
+            state.kwargs[key] = (v + step)&0xFF
+    return _inner
 
-def RL(reg=None, key='value'):
-    """This instruction gets a little messy in the table, so this helps simplify it."""
+def INC8(reg=None, key='value'):
+    """8-bit INC of reg, or of the action's parameter (storing the result in kwargs[key]) if reg is None"""
+    return _inc_dec(_INC_FLAGS, 1, reg, key)
+
+def DEC8(reg=None, key='value'):
+    """8-bit DEC of reg, or of the action's parameter (storing the result in kwargs[key]) if reg is None"""
+    return _inc_dec(_DEC_FLAGS, -1, reg, key)
+
+def _alu_flags(N):
+    """Returns a table of the flags other than H set by an 8-bit ADD or ADC (N=0x00) or SUB, SBC or CP (N=0x02),
+    indexed by the raw result of the operation plus 256. V is set as it always has been for these instructions."""
+    table = _flag_table(0xA8, True, False, N)
+    return bytes(table[D&0xFF] | (0x04 if D > 127 or D < -128 else 0) | (0x01 if D >> 8 else 0) for D in range(-256,512))
+
+_ADD_FLAGS = _alu_flags(0x00)
+_SUB_FLAGS = _alu_flags(0x02)
+
+@_shared
+def _alu8(sign, with_carry, reg):
+    """Returns an action which does an 8-bit ADD or ADC (sign=1) or SUB or SBC (sign=-1) into A, setting all of the flags
+    as the separate flag actions used to. The operand is taken from reg if given, otherwise it is the action's parameter.
+    The function is generated from source so that the operation is written out in full in its code."""
+    op = '+' if sign > 0 else '-'
+    # Bit 4 of the operands and raw result differs in parity exactly when there was a carry or borrow out of bit 3
+    src = ("def make(flags, get_reg):\n" +
+           "    def _inner(state, {}*args):\n".format("v, " if reg is None else "") +
+           "        reg = state.cpu.reg\n" +
+           "        A = reg.A\n" +
+           ("        v = {}\n".format(_REGISTER_READ_SOURCE.get(reg, "get_reg(reg)")) if reg is not None else "") +
+           "        D = A {0} v{1}\n".format(op, " {} (reg.F&0x01)".format(op) if with_carry else "") +
+           "        reg.A = D&0xFF\n" +
+           "        reg.F = flags[D + 256] | ((A ^ v ^ D)&0x10)\n" +
+           "    return _inner\n")
+    namespace = {}
+    exec(src, namespace)
+    return namespace['make'](_ADD_FLAGS if sign > 0 else _SUB_FLAGS, RegisterFile.accessors(reg)[0] if reg is not None else None)
+
+@_shared
+def _load_AF(A, F):
+    """Returns an action which sets A and F to fixed values, for the operations of A with itself whose result is known"""
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        reg.A = A
+        reg.F = F
+    return _inner
+
+@_shared
+def _flags_from_A(flags):
+    """Returns an action which sets F from the table flags indexed by A, for the operations of A with itself which
+    leave it unchanged"""
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        reg.F = flags[reg.A]
+    return _inner
+
+def _sbc_A():
+    """SBC A,A leaves either 0x00 or 0xFF in A, depending only on the carry flag"""
+    borrow_F = _SUB_FLAGS[-1 + 256] | 0x10
+    def _inner(state, *args):
+        reg = state.cpu.reg
+        if reg.F&0x01:
+            reg.A = 0xFF
+            reg.F = borrow_F
+        else:
+            reg.A = 0x00
+            reg.F = _SUB_FLAGS[256]
+    return _inner
+
+def ADD8(reg=None):
+    """8-bit ADD into A from reg, or from the action's parameter if reg is None"""
+    return _alu8(1, False, reg)
+
+def ADC8(reg=None):
+    """8-bit ADC into A from reg, or from the action's parameter if reg is None"""
+    return _alu8(1, True, reg)
+
+def SUB8(reg=None):
+    """8-bit SUB from A of reg, or of the action's parameter if reg is None. SUB A just stores its known result."""
+    if reg == 'A':
+        return _load_AF(0x00, _SUB_FLAGS[256])
+    return _alu8(-1, False, reg)
+
+def SBC8(reg=None):
+    """8-bit SBC from A of reg, or of the action's parameter if reg is None. SBC A only depends on the carry flag."""
+    if reg == 'A':
+        return _sbc_A()
+    return _alu8(-1, True, reg)
+
+@_shared
+def _logic8(op, flags, reg):
+    """Returns an action which does an 8-bit AND, XOR or OR (op is '&', '^' or '|') into A, taking all of the flags
+    from the table flags. The operand is taken from reg if given, otherwise it is the action's parameter. The function
+    is generated from source, so that the operator is part of its code rather than being a further call."""
+    src = ("def make(flags, get_reg):\n" +
+           "    def _inner(state, {}*args):\n".format("v, " if reg is None else "") +
+           "        reg = state.cpu.reg\n" +
+           "        d = reg.A {} {}\n".format(op, "v" if reg is None else _REGISTER_READ_SOURCE.get(reg, "get_reg(reg)")) +
+           "        reg.A = d\n" +
+           "        reg.F = flags[d]\n" +
+           "    return _inner\n")
+    namespace = {}
+    exec(src, namespace)
+    return namespace['make'](flags, RegisterFile.accessors(reg)[0] if reg is not None else None)
+
+def AND8(reg=None):
+    """8-bit AND into A with reg, or with the action's parameter if reg is None. AND A only sets the flags from A."""
+    if reg == 'A':
+        return _flags_from_A(_flag_table(0xA8, True, True, 0x10))
+    return _logic8('&', _flag_table(0xA8, True, True, 0x10), reg)
+
+def XOR8(reg=None):
+    """8-bit XOR into A with reg, or with the action's parameter if reg is None. XOR A just stores its known result."""
+    if reg == 'A':
+        return _load_AF(0x00, _flag_table(0xA8, True, True, 0x00)[0])
+    return _logic8('^', _flag_table(0xA8, True, True, 0x00), reg)
+
+def OR8(reg=None):
+    """8-bit OR into A with reg, or with the action's parameter if reg is None. OR A only sets the flags from A."""
+    if reg == 'A':
+        return _flags_from_A(_flag_table(0xA8, True, True, 0x00))
+    return _logic8('|', _flag_table(0xA8, True, True, 0x00), reg)
+
+@_shared
+def CP8(reg=None):
+    """8-bit compare of A with reg, or with the action's parameter if reg is None, keeping the old H flag"""
     if reg is not None:
-        return set_flags("--503-0C", value=lambda state : (getattr(state.cpu.reg,reg) << 1) | (state.cpu.reg.getflag('C')), dest=reg)
+        (get_reg, _) = RegisterFile.accessors(reg)
+        def _inner(state, *args):
+            regs = state.cpu.reg
+            regs.F = (regs.F&0x10) | _SUB_FLAGS[regs.A - get_reg(regs) + 256]
     else:
-        return set_flags("--503-0C", value=lambda state,v : (v << 1) | (state.cpu.reg.getflag('C')), key=key)
+        def _inner(state, v, *args):
+            regs = state.cpu.reg
+            regs.F = (regs.F&0x10) | _SUB_FLAGS[regs.A - v + 256]
+    return _inner
 
-def RRC(reg=None, key='value'):
-    """This instruction gets a little messy in the table, so this helps simplify it."""
+def _shift_tables(op):
+    """Tables of the result and of the flags set by an 8-bit rotate or shift, indexed by the carry flag in bit 8 and the
+    byte being rotated or shifted in bits 0-7. op takes the byte and the carry flag and gives the result with the
+    carry out in bit 8."""
+    D = [ op(v, c) for c in (0, 1) for v in range(0,256) ]
+    return (bytes(d&0xFF for d in D), bytes((d&0x28) | (d >> 8) for d in D))
+
+_RLC_TABLES = _shift_tables(lambda v, c : (v << 1) | (v >> 7))
+_RL_TABLES = _shift_tables(lambda v, c : (v << 1) | c)
+_RRC_TABLES = _shift_tables(lambda v, c : (v >> 1) | ((v&0x01) << 7) | ((v&0x01) << 8))
+_RR_TABLES = _shift_tables(lambda v, c : (v >> 1) | (c << 7) | ((v&0x01) << 8))
+_SLA_TABLES = _shift_tables(lambda v, c : (v << 1))
+_SRA_TABLES = _shift_tables(lambda v, c : (v >> 1) | (v&0x80) | ((v&0x01) << 8))
+_SL1_TABLES = _shift_tables(lambda v, c : (v << 1) | 0x01)
+_SRL_TABLES = _shift_tables(lambda v, c : (v >> 1) | ((v&0x01) << 8))
+
+@_shared
+def _shift(tables, reg, key):
+    """Returns an action which does an 8-bit rotate or shift using tables from _shift_tables. Only bits 5, 3 and C are
+    taken from the result and H and N are cleared. If reg is given that register is changed in place, otherwise the
+    action's parameter is used and the result stored in kwargs[key]."""
+    (results, flags) = tables
     if reg is not None:
-        return set_flags("--503-0C", value=lambda state : (getattr(state.cpu.reg,reg) >> 1) | ((getattr(state.cpu.reg,reg)&0x01) << 7) | ((getattr(state.cpu.reg,reg)&0x01) << 8), dest=reg)
+        (get_reg, set_reg) = RegisterFile.accessors(reg)
+        def _inner(state, *args):
+            regs = state.cpu.reg
+            F = regs.F
+            n = (F&0x01) << 8 | get_reg(regs)
+            regs.F = (F&0xC4) | flags[n]
+            set_reg(regs, results[n])
     else:
-        return set_flags("--503-0C", value=lambda state,v : (v >> 1) | ((v&0x01) << 7) | ((v&0x01) << 8), key=key)
+        def _inner(state, v, *args):
+            regs = state.cpu.reg
+            F = regs.F
+            n = (F&0x01) << 8 | v
+            regs.F = (F&0xC4) | flags[n]
+            state.kwargs[key] = results[n]
+    return _inner
+
+def RLC(reg=None, key='value'):
+    """This instruction gets a little messy in the table, so this helps simplify it."""
+    return _shift(_RLC_TABLES, reg, key)
+
+def RL(reg=None, key='value'):
+    """This instruction gets a little messy in the table, so this helps simplify it."""
+    return _shift(_RL_TABLES, reg, key)
+
+def RRC(reg=None, key='value'):
+    """This instruction gets a little messy in the table, so this helps simplify it."""
+    return _shift(_RRC_TABLES, reg, key)
 
 def RR(reg=None, key='value'):
     """This instruction gets a little messy in the table, so this helps simplify it."""
-    if reg is not None:
-        return set_flags("--503-0C", value=lambda state : (getattr(state.cpu.reg,reg) >> 1) | (state.cpu.reg.getflag('C') << 7) | ((getattr(state.cpu.reg,reg)&0x01) << 8), dest=reg)
-    else:
-        return set_flags("--503-0C", value=lambda state,v : (v >> 1) | (state.cpu.reg.getflag('C') << 7) | ((v&0x01) << 8), key=key)
+    return _shift(_RR_TABLES, reg, key)
 
 def SLA(reg=None, key='value'):
     """This instruction gets a little messy in the table, so this helps simplify it."""
-    if reg is not None:
-        return set_flags("--503-0C", value=lambda state : (getattr(state.cpu.reg,reg) << 1), dest=reg)
-    else:
-        return set_flags("--503-0C", value=lambda state,v : (v << 1), key=key)
+    return _shift(_SLA_TABLES, reg, key)
 
 def SRA(reg=None, key='value'):
     """This instruction gets a little messy in the table, so this helps simplify it."""
-    if reg is not None:
-        return set_flags("--503-0C", value=lambda state : (getattr(state.cpu.reg,reg) >> 1) | (getattr(state.cpu.reg,reg)&0x80) | ((getattr(state.cpu.reg,reg)&0x01) << 8), dest=reg)
-    else:
-        return set_flags("--503-0C", value=lambda state,v : (v >> 1) | (v&0x80) | ((v&0x01) << 8), key=key)
+    return _shift(_SRA_TABLES, reg, key)
 
 def SL1(reg=None, key='value'):
     """This instruction gets a little messy in the table, so this helps simplify it."""
-    if reg is not None:
-        return set_flags("--503-0C", value=lambda state : (getattr(state.cpu.reg,reg) << 1) | 0x01, dest=reg)
-    else:
-        return set_flags("--503-0C", value=lambda state,v : (v << 1) | 0x01, key=key)
+    return _shift(_SL1_TABLES, reg, key)
 
 def SRL(reg=None, key='value'):
     """This instruction gets a little messy in the table, so this helps simplify it."""
-    if reg is not None:
-        return set_flags("--503-0C", value=lambda state : (getattr(state.cpu.reg,reg) >> 1) | ((getattr(state.cpu.reg,reg)&0x01) << 8), dest=reg)
-    else:
-        return set_flags("--503-0C", value=lambda state,v : (v >> 1) | ((v&0x01) << 8), key=key)
+    return _shift(_SRL_TABLES, reg, key)
+
+# The flags set by BIT n for each byte, for each n. Only C is left as it was.
+_BIT_FLAGS = tuple(bytes(_flag_table(0xA8, True, True, 0x10)[v&(1 << n)] for v in range(0,256)) for n in range(0,8))
 
+@_shared
 def BIT(n, reg=None):
     """This instruction gets a little messy in the table, so this helps simplify it."""
+    flags = _BIT_FLAGS[n]
     if reg is not None:
-        return set_flags("SZ513P0-", value=lambda state : (getattr(state.cpu.reg,reg)&(1 << n)))
+        (get_reg, _) = RegisterFile.accessors(reg)
+        def _inner(state, *args):
+            regs = state.cpu.reg
+            regs.F = (regs.F&0x01) | flags[get_reg(regs)]
     else:
-        return set_flags("SZ513P0-", value=lambda state,v : (v&(1 << n)))
+        def _inner(state, v, *args):
+            regs = state.cpu.reg
+            regs.F = (regs.F&0x01) | flags[v]
+    return _inner
 
+@_shared
 def RES(n, reg=None, key="value"):
     """This instruction gets a little messy in the table, so this helps simplify it."""
+    mask = 0xFF - (1 << n)
     if reg is not None:
-        return LDr(reg, value=lambda state : (getattr(state.cpu.reg,reg)&(0xFF - (1 << n))))
+        (get_reg, set_reg) = RegisterFile.accessors(reg)
+        def _inner(state, *args):
+            regs = state.cpu.reg
+            set_reg(regs, get_reg(regs)&mask)
     else:
-        return RRr(key, value=lambda state,v : (v&(0xFF - (1 << n))))
+        def _inner(state, v, *args):
+            state.kwargs[key] = v&mask
+    return _inner
 
+@_shared
 def SET(n, reg=None, key="value"):
     """This instruction gets a little messy in the table, so this helps simplify it."""
+    bit = 1 << n
     if reg is not None:
-        return LDr(reg, value=lambda state : (getattr(state.cpu.reg,reg)|(1 << n)))
+        (get_reg, set_reg) = RegisterFile.accessors(reg)
+        def _inner(state, *args):
+            regs = state.cpu.reg
+            set_reg(regs, get_reg(regs)|bit)
     else:
-        return RRr(key, value=lambda state,v : (v|(1 << n)))
+        def _inner(state, v, *args):
+            state.kwargs[key] = v|bit
+    return _inner
 
 INSTRUCTION_STATES = {
     # Single bytes opcodes
     0x00 : (0, [],                  [], "NOP", 1),
-    0x01 : (0, [],                  [ OD(), OD(action=LDr('BC')) ], "LD BC,nn", 3),
+    0x01 : (0, [],                  [ OD16(action=LDr('BC')) ], "LD BC,nn", 3),
     0x02 : (0, [],                  [ MW(indirect="BC", source="A") ], "LD (BC),A", 1),
-    0x03 : (0, [ LDr('BC', value=lambda state : (state.cpu.reg.BC + 1)&0xFFFF) ],
-                                    [], "INC BC", 1),
-    0x04 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.B)&0xF)+1 > 0xF) else 0),
-                 set_flags("SZ5-3V0-", value=lambda state : state.cpu.reg.B + 1, key="value"), LDr('B') ],
-                                    [], "INC B", 1),
-    0x05 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.B)&0xF)-1 < 0x0) else 0),
-                 set_flags("SZ5-3V1-", value=lambda state : state.cpu.reg.B - 1, key="value"), LDr('B') ],
-                                    [], "DEC B", 1),
+    0x03 : (0, [ inc('BC') ],       [], "INC BC", 1),
+    0x04 : (0, [ INC8('B') ],       [], "INC B", 1),
+    0x05 : (0, [ DEC8('B') ],       [], "DEC B", 1),
     0x06 : (0, [],                  [ OD(action=LDr('B')), ], "LD B,n", 2),
     0x07 : (0, [ RLC("A") ],        [], "RLCA", 1),
     0x08 : (0, [ EX() ],            [], "EX AF,AF'", 1),
-    0x09 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.B)&0xF)+((state.cpu.reg.H)&0xF)+((state.cpu.reg.C+state.cpu.reg.L)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.B + state.cpu.reg.H + ((state.cpu.reg.C+state.cpu.reg.L)>>8)),
-                 LDr('HL', value=lambda state : (state.cpu.reg.HL + state.cpu.reg.BC)&0xFFFF) ],
+    0x09 : (0, [ ADD16('HL', 'BC') ],
                                     [ IO(4, True), IO(3, True) ], "ADD HL,BC", 1),
-    0x0B : (0, [ LDr('BC', value=lambda state : (state.cpu.reg.BC - 1)&0xFFFF) ],
-                                    [], "DEC BC", 1),
-    0x0C : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.C)&0xF)+1 > 0xF) else 0),
-                 set_flags("SZ5-3V0-", value=lambda state : state.cpu.reg.C + 1, key="value"), LDr('C') ],
-                                    [], "INC C", 1),
-    0x0D : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.C)&0xF)-1 < 0x0) else 0),
-                 set_flags("SZ5H3V1-", value=lambda state : state.cpu.reg.C - 1, key="value"), LDr('C') ],
-                                    [], "DEC C", 1),
+    0x0B : (0, [ dec('BC') ],       [], "DEC BC", 1),
+    0x0C : (0, [ INC8('C') ],       [], "INC C", 1),
+    0x0D : (0, [ DEC8('C') ],       [], "DEC C", 1),
     0x0E : (0, [],                  [ OD(action=LDr('C')), ], "LD C,n", 2),
-    0x0F : (0, [ set_flags("--503-0C", value=lambda state : (state.cpu.reg.A >> 1) | ((state.cpu.reg.A&0x01) << 7) | ((state.cpu.reg.A&0x01) << 8), dest="A") ],
-                                    [], "RRCA", 1),
+    0x0F : (0, [ RRC("A") ],        [], "RRCA", 1),
     0x0A : (0, [],                  [ MR(indirect="BC", action=LDr("A")) ], "LD A,(BC)", 1),
-    0x10 : (1, [],                  [ OD(signed=True,
-                                         action=do_each(LDr("B", value=lambda state,v: (state.cpu.reg.B-1)&0xFF),
-                                                        on_condition(lambda state,v : (state.cpu.reg.B == 0x00), early_abort()),
-                                                        RRr("value"))),
+    0x10 : (1, [],                  [ OD(signed=True, action=djnz()),
                                       IO(5, True, action=JR()) ], "DJNZ n", 2),
-    0x11 : (0, [],                  [ OD(), OD(action=LDr('DE')) ], "LD DE,nn", 3),
+    0x11 : (0, [],                  [ OD16(action=LDr('DE')) ], "LD DE,nn", 3),
     0x12 : (0, [],                  [ MW(indirect="DE", source="A") ], "LD (DE),A", 1),
-    0x13 : (0, [ LDr('DE', value=lambda state : (state.cpu.reg.DE + 1)&0xFFFF) ],
-                                    [], "INC DE", 1),
-    0x14 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.D)&0xF)+1 > 0xF) else 0),
-                 set_flags("SZ5-3V0-", value=lambda state : state.cpu.reg.D + 1, key="value"), LDr('D') ],
-                                    [], "INC D", 1),
-    0x15 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.D)&0xF)-1 < 0x0) else 0),
-                 set_flags("SZ5H3V1-", value=lambda state : state.cpu.reg.D - 1, key="value"), LDr('D') ],
-                                    [], "DEC D", 1),
+    0x13 : (0, [ inc('DE') ],       [], "INC DE", 1),
+    0x14 : (0, [ INC8('D') ],       [], "INC D", 1),
+    0x15 : (0, [ DEC8('D') ],       [], "DEC D", 1),
     0x16 : (0, [],                  [ OD(action=LDr('D')), ], "LD D,n", 2),
     0x17 : (0, [ RL("A") ],         [], "RLA", 1),
     0x18 : (0, [],                  [ OD(signed=True), IO(5, True, action=JR()) ], "JR n", 2),
-    0x19 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.D)&0xF)+((state.cpu.reg.H)&0xF)+((state.cpu.reg.E+state.cpu.reg.L)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.D + state.cpu.reg.H + ((state.cpu.reg.E+state.cpu.reg.L)>>8)),
-                 LDr('HL', value=lambda state : (state.cpu.reg.HL + state.cpu.reg.DE)&0xFFFF) ],
+    0x19 : (0, [ ADD16('HL', 'DE') ],
                                     [ IO(4, True), IO(3, True) ], "ADD HL,DE", 1),
-    0x1B : (0, [ LDr('DE', value=lambda state : (state.cpu.reg.DE - 1)&0xFFFF) ],
-                                    [], "DEC DE", 1),
+    0x1B : (0, [ dec('DE') ],       [], "DEC DE", 1),
     0x1A : (0, [],                  [ MR(indirect="DE", action=LDr("A")) ], "LD A,(DE)", 1),
-    0x1C : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.E)&0xF)+1 > 0xF) else 0),
-                 set_flags("SZ5-3V0-", value=lambda state : state.cpu.reg.E + 1, key="value"), LDr('E') ],
-                                    [], "INC E", 1),
-    0x1D : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.E)&0xF)-1 < 0x0) else 0),
-                 set_flags("SZ5H3V1-", value=lambda state : state.cpu.reg.E - 1, key="value"), LDr('E') ],
-                                    [], "DEC E", 1),
+    0x1C : (0, [ INC8('E') ],       [], "INC E", 1),
+    0x1D : (0, [ DEC8('E') ],       [], "DEC E", 1),
     0x1E : (0, [],                  [ OD(action=LDr('E')), ], "LD E,n", 2),
     0x1F : (0, [ RR("A") ],         [], "RRA", 1),
-    0x20 : (0, [],                  [ OD(signed=True, action=do_each(RRr("value"), on_flag("Z", early_abort()))),
+    0x20 : (0, [],                  [ OD(signed=True, action=continue_if("Z", False, key="value")),
                                       IO(5, True, action=JR()) ], "JR NZ,n", 2),
-    0x21 : (0, [],                  [ OD(), OD(action=LDr('HL')) ], "LD HL,nn", 3),
-    0x22 : (0, [],                  [ OD(key="address"),
-                                        OD(key="address",
-                                        compound=high_after_low),
-                                        MW(source="L"), MW(source="H") ], "LD (nn),HL", 3),
-    0x23 : (0, [ LDr('HL', value=lambda state : (state.cpu.reg.HL + 1)&0xFFFF) ],
-                                    [], "INC HL", 1),
-    0x24 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.H)&0xF)+1 > 0xF) else 0),
-                 set_flags("SZ5-3V0-", value=lambda state : state.cpu.reg.H + 1, key="value"), LDr('H') ],
-                                    [], "INC H", 1),
-    0x25 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.H)&0xF)-1 < 0x0) else 0),
-                 set_flags("SZ5H3V1-", value=lambda state : state.cpu.reg.H - 1, key="value"), LDr('H') ],
-                                    [], "DEC H", 1),
+    0x21 : (0, [],                  [ OD16(action=LDr('HL')) ], "LD HL,nn", 3),
+    0x22 : (0, [],                  [ OD16(key="address"),
+                                        MW16(high="H", low="L") ], "LD (nn),HL", 3),
+    0x23 : (0, [ inc('HL') ],       [], "INC HL", 1),
+    0x24 : (0, [ INC8('H') ],       [], "INC H", 1),
+    0x25 : (0, [ DEC8('H') ],       [], "DEC H", 1),
     0x26 : (0, [],                  [ OD(action=LDr('H')), ], "LD H,n", 2),
     0x27 : (0, [ daa() ],                  [], "DAA", 2),
-    0x28 : (0, [],                  [ OD(signed=True, action=do_each(RRr("value"), unless_flag("Z", early_abort()))),
+    0x28 : (0, [],                  [ OD(signed=True, action=continue_if("Z", True, key="value")),
                                       IO(5, True, action=JR()) ], "JR Z,n", 2),
-    0x29 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.H)&0xF)+((state.cpu.reg.H)&0xF)+((state.cpu.reg.L+state.cpu.reg.L)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.H + state.cpu.reg.H + ((state.cpu.reg.L+state.cpu.reg.L)>>8)),
-                 LDr('HL', value=lambda state : (state.cpu.reg.HL + state.cpu.reg.HL)&0xFFFF) ],
+    0x29 : (0, [ ADD16('HL', 'HL') ],
                                     [ IO(4, True), IO(3, True) ], "ADD HL,HL", 1),
-    0x2A : (0, [],                  [ OD(key="address"),
-                                      OD(key="address", compound=high_after_low),
-                                      MR(action=LDr('L')), MR(action=LDr('H')) ], "LD HL,(nn)", 3),
-    0x2B : (0, [ LDr('HL', value=lambda state : (state.cpu.reg.HL - 1)&0xFFFF) ],
-                                    [], "DEC HL", 1),
-    0x2C : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.L)&0xF)+1 > 0xF) else 0),
-                 set_flags("SZ5-3V0-", value=lambda state : state.cpu.reg.L + 1, key="value"), LDr('L') ],
-                                    [], "INC L", 1),
-    0x2D : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.L)&0xF)-1 < 0x0) else 0),
-                 set_flags("SZ5H3V1-", value=lambda state : state.cpu.reg.L - 1, key="value"), LDr('L') ],
-                                    [], "DEC L", 1),
-    0x2E : (0, [],                  [ OD(action=LDr('L')), ], "LD L,n"),
-    0x2F : (0, [ set_flags("--*1*-1-", source='A'), LDr('A', value=lambda state : (~(state.cpu.reg.A))&0xFF) ],
-                                    [], "CPL", 1),
-    0x30 : (0, [],                  [ OD(signed=True, action=do_each(RRr("value"), on_flag("C", early_abort()))),
+    0x2A : (0, [],                  [ OD16(key="address"),
+                                      MR16(high="H", low="L") ], "LD HL,(nn)", 3),
+    0x2B : (0, [ dec('HL') ],       [], "DEC HL", 1),
+    0x2C : (0, [ INC8('L') ],       [], "INC L", 1),
+    0x2D : (0, [ DEC8('L') ],       [], "DEC L", 1),
+    0x2E : (0, [],                  [ OD(action=LDr('L')), ], "LD L,n", 2),
+    0x2F : (0, [ cpl() ],           [], "CPL", 1),
+    0x30 : (0, [],                  [ OD(signed=True, action=continue_if("C", False, key="value")),
                                       IO(5, True, action=JR()) ], "JR NC,n", 2),
-    0x31 : (0, [],                  [ OD(), OD(action=LDr('SP')) ], "LD SP,nn", 3),
-    0x32 : (0, [],                  [ OD(key="address"), OD(compound=high_after_low,key="address"),
+    0x31 : (0, [],                  [ OD16(action=LDr('SP')) ], "LD SP,nn", 3),
+    0x32 : (0, [],                  [ OD16(key="address"),
                                           MW(source="A") ], "LD (nn),A", 3),
-    0x33 : (0, [ LDr('SP', value=lambda state : (state.cpu.reg.SP + 1)&0xFFFF) ],
-                                    [], "INC SP", 1),
-    0x34 : (0, [],                  [ MR(indirect="HL",
-                                        action=do_each(force_flag('H', lambda  state,v : 1 if ((v&0xF)+1 > 0xF) else 0),
-                                                      set_flags("SZ5-3V0-",
-                                                        value=lambda state, v : v+1,
-                                                        key="value"))),
+    0x33 : (0, [ inc('SP') ],       [], "INC SP", 1),
+    0x34 : (0, [],                  [ MR(indirect="HL", action=INC8()),
                                       MW(indirect="HL" )], "INC (HL)", 1),
-    0x35 : (0, [],                  [ MR(indirect="HL",
-                                        action=do_each(
-                                            force_flag('H', lambda  state,v : 1 if ((v&0xF)-1 < 0x0) else 0),
-                                            set_flags("SZ5H3V1-",
-                                                        value=lambda state, v : v-1,
-                                                        key="value"))),
+    0x35 : (0, [],                  [ MR(indirect="HL", action=DEC8()),
                                       MW(indirect="HL" )], "DEC (HL)", 1),
     0x36 : (0, [],                  [ OD(), MW(indirect="HL") ], "LD (HL),n", 2),
-    0x37 : (0, [ LDr('F', value=lambda state : (state.cpu.reg.F&0xC4)|(state.cpu.reg.A&0x28)|(0x01)) ],
-                                    [], "SCF", 1),
-    0x38 : (0, [],                  [ OD(signed=True, action=do_each(RRr("value"), unless_flag("C", early_abort()))),
+    0x37 : (0, [ scf() ],           [], "SCF", 1),
+    0x38 : (0, [],                  [ OD(signed=True, action=continue_if("C", True, key="value")),
                                       IO(5, True, action=JR()) ], "JR C,n", 2),
-    0x39 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.SPH)&0xF)+((state.cpu.reg.H)&0xF)+((state.cpu.reg.SPL+state.cpu.reg.L)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.SPH + state.cpu.reg.H + ((state.cpu.reg.SPL+state.cpu.reg.L)>>8)),
-                 LDr('HL', value=lambda state : (state.cpu.reg.SP + state.cpu.reg.HL)&0xFFFF) ],
+    0x39 : (0, [ ADD16('HL', 'SP') ],
                                     [ IO(4, True), IO(3, True) ], "ADD HL,SP", 1),
-    0x3B : (0, [ LDr('SP', value=lambda state : (state.cpu.reg.SP - 1)&0xFFFF) ],
-                                    [], "DEC SP", 1),
-    0x3C : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+1 > 0xF) else 0),
-                 set_flags("SZ5-3V0-", value=lambda state : state.cpu.reg.A + 1, key="value"), LDr('A') ],
-                                    [], "INC A", 1),
-    0x3D : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-1 < 0x0) else 0),
-                 set_flags("SZ5H3V1-", value=lambda state : state.cpu.reg.A - 1, key="value"), LDr('A') ],
-                                    [], "DEC A", 1),
-    0x3A : (0, [],                  [ OD(key="address"), OD(compound=high_after_low,key="address"),
+    0x3B : (0, [ dec('SP') ],       [], "DEC SP", 1),
+    0x3C : (0, [ INC8('A') ],       [], "INC A", 1),
+    0x3D : (0, [ DEC8('A') ],       [], "DEC A", 1),
+    0x3A : (0, [],                  [ OD16(key="address"),
                                           MR(action=LDr("A")) ], "LD A,(nn)", 3),
     0x3E : (0, [],                  [ OD(action=LDr('A')), ], "LD A,n", 2),
-    0x3F : (0, [ LDr('F', value=lambda state : (state.cpu.reg.F&0xEC)|(~state.cpu.reg.F&0x11)) ],
-                                    [], "CCF", 1),
+    0x3F : (0, [ ccf() ],           [], "CCF", 1),
     0x40 : (0, [ LDrs('B', 'B'), ], [], "LD B,B", 1),
     0x41 : (0, [ LDrs('B', 'C'), ], [], "LD B,C", 1),
     0x42 : (0, [ LDrs('B', 'D'), ], [], "LD B,D", 1),
@@ -1209,7 +1990,7 @@ INSTRUCTION_STATES = {
     0x73 : (0, [],                  [ MW(indirect="HL", source="E") ], "LD (HL),E", 1),
     0x74 : (0, [],                  [ MW(indirect="HL", source="H") ], "LD (HL),H", 1),
     0x75 : (0, [],                  [ MW(indirect="HL", source="L") ], "LD (HL),L", 1),
-    0x76 : (0, [ on_condition(lambda state : not state.cpu.int, dec("PC")) ], [], "HALT", 1),
+    0x76 : (0, [ halt() ],          [], "HALT", 1),
     0x77 : (0, [],                  [ MW(indirect="HL", source="A") ], "LD (HL),A", 1),
     0x78 : (0, [ LDrs('A', 'B'), ], [], "LD A,B", 1),
     0x79 : (0, [ LDrs('A', 'C'), ], [], "LD A,C", 1),
@@ -1219,299 +2000,152 @@ INSTRUCTION_STATES = {
     0x7D : (0, [ LDrs('A', 'L'), ], [], "LD A,L", 1),
     0x7E : (0, [],                  [ MR(indirect="HL", action=LDr("A")) ], "LD A, (HL)", 1),
     0x7F : (0, [ LDrs('A', 'A'), ], [], "LD A,A", 1),
-    0x80 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.B)&0xF) > 0xF) else 0),
-                 set_flags("SZ5-3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.B, key="value"),
-                 LDr('A') ],        [], "ADD B", 1),
-    0x81 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.C)&0xF) > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.C, key="value"),
-                 LDr('A') ],        [], "ADD C", 1),
-    0x82 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.D)&0xF) > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.D, key="value"),
-                 LDr('A') ],        [], "ADD D", 1),
-    0x83 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.E)&0xF) > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.E, key="value"),
-                 LDr('A') ],        [], "ADD E", 1),
-    0x84 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.H)&0xF) > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.H, key="value"),
-                 LDr('A') ],        [], "ADD H", 1),
-    0x85 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.L)&0xF) > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.L, key="value"),
-                 LDr('A') ],        [], "ADD L", 1),
-    0x86 : (0, [],                  [ MR(indirect="HL",
-                                        action=do_each(
-                                            force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)+(v&0xF) > 0xF) else 0),
-                                            set_flags("SZ5H3V0C",
-                                                        value=lambda state, v : state.cpu.reg.A + v,
-                                                        dest="A"))) ], "ADD (HL)", 1),
-    0x87 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.A)&0xF) > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.A, key="value"),
-                 LDr('A') ],        [], "ADD A", 1),
-    0x88 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.B)&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.B + state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "ADC B", 1),
-    0x89 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.C)&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.C + state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "ADC C", 1),
-    0x8A : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.D)&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.D + state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "ADC D", 1),
-    0x8B : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.E)&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.E + state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "ADC E", 1),
-    0x8C : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.H)&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.H + state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "ADC H", 1),
-    0x8D : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.L)&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.L + state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "ADC L", 1),
-    0x8E : (0, [],                  [ MR(indirect="HL",
-                                        action=do_each(
-                                            force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)+(v&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                                            set_flags("SZ5H3V0C",
-                                                        value=lambda state, v : state.cpu.reg.A + v + state.cpu.reg.getflag('C'),
-                                                        dest="A"))) ], "ADC (HL)", 1),
-    0x8F : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)+((state.cpu.reg.A)&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                 set_flags("SZ5H3V0C", value=lambda state : state.cpu.reg.A + state.cpu.reg.A + state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "ADC A", 1),
-    0x90 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.B)&0xF) < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.B, key="value"),
-                 LDr('A') ],        [], "SUB B", 1),
-    0x91 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.C)&0xF) < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.C, key="value"),
-                 LDr('A') ],        [], "SUB C", 1),
-    0x92 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.D)&0xF) < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.D, key="value"),
-                 LDr('A') ],        [], "SUB D", 1),
-    0x93 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.E)&0xF) < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.E, key="value"),
-                 LDr('A') ],        [], "SUB E", 1),
-    0x94 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.H)&0xF) < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.H, key="value"),
-                 LDr('A') ],        [], "SUB H", 1),
-    0x95 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.L)&0xF) < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.L, key="value"),
-                 LDr('A') ],        [], "SUB L", 1),
-    0x96 : (0, [],                  [ MR(indirect="HL",
-                                        action=do_each(
-                                            force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)-(v&0xF) < 0x0) else 0),
-                                            set_flags("SZ5H3V1C",
-                                                        value=lambda state, v : state.cpu.reg.A - v,
-                                                        dest="A"))) ], "SUB (HL)"),
-    0x97 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.A)&0xF) < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.A, key="value"),
-                 LDr('A') ],        [], "SUB A", 1),
-    0x98 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.B)&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.B - state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "SBC B", 1),
-    0x99 : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.C)&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.C - state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "SBC C", 1),
-    0x9A : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.D)&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.D - state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "SBC D", 1),
-    0x9B : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.E)&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.E - state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "SBC E", 1),
-    0x9C : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.H)&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.H - state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "SBC H", 1),
-    0x9D : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.L)&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.L - state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "SBC L", 1),
-    0x9E : (0, [],                  [ MR(indirect="HL",
-                                        action=do_each(
-                                            force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)-(v&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                                            set_flags("SZ5H3V1C",
-                                                        value=lambda state, v : state.cpu.reg.A - v - state.cpu.reg.getflag('C'),
-                                                        dest="A"))) ], "SBC (HL)", 1),
-    0x9F : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.A)&0xF)-((state.cpu.reg.A)&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                 set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.A - state.cpu.reg.getflag('C'), key="value"),
-                 LDr('A') ],        [], "SBC A", 1),
-    0xA0 : (0, [ set_flags("SZ513P00", value=lambda state : state.cpu.reg.A & state.cpu.reg.B, key="value"),
-                 LDr('A') ],        [], "AND B", 1),
-    0xA1 : (0, [ set_flags("SZ513P00", value=lambda state : state.cpu.reg.A & state.cpu.reg.C, key="value"),
-                 LDr('A') ],        [], "AND C", 1),
-    0xA2 : (0, [ set_flags("SZ513P00", value=lambda state : state.cpu.reg.A & state.cpu.reg.D, key="value"),
-                 LDr('A') ],        [], "AND D", 1),
-    0xA3 : (0, [ set_flags("SZ513P00", value=lambda state : state.cpu.reg.A & state.cpu.reg.E, key="value"),
-                 LDr('A') ],        [], "AND E", 1),
-    0xA4 : (0, [ set_flags("SZ513P00", value=lambda state : state.cpu.reg.A & state.cpu.reg.H, key="value"),
-                 LDr('A') ],        [], "AND H", 1),
-    0xA5 : (0, [ set_flags("SZ513P00", value=lambda state : state.cpu.reg.A & state.cpu.reg.L, key="value"),
-                 LDr('A') ],        [], "AND L", 1),
-    0xA6 : (0, [],                  [ MR(indirect="HL",
-                                        action=set_flags("SZ513P00",
-                                                        value=lambda state, v : state.cpu.reg.A & v,
-                                                        dest="A")) ], "AND (HL)", 1),
-    0xA7 : (0, [ set_flags("SZ513P00", value=lambda state : state.cpu.reg.A & state.cpu.reg.A, key="value"),
-                 LDr('A') ],        [], "AND A", 1),
-    0xA8 : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A ^ state.cpu.reg.B, key="value"),
-                 LDr('A') ],        [], "XOR B", 1),
-    0xA9 : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A ^ state.cpu.reg.C, key="value"),
-                 LDr('A') ],        [], "XOR C", 1),
-    0xAA : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A ^ state.cpu.reg.D, key="value"),
-                 LDr('A') ],        [], "XOR D", 1),
-    0xAB : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A ^ state.cpu.reg.E, key="value"),
-                 LDr('A') ],        [], "XOR E", 1),
-    0xAC : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A ^ state.cpu.reg.H, key="value"),
-                 LDr('A') ],        [], "XOR H", 1),
-    0xAD : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A ^ state.cpu.reg.L, key="value"),
-                 LDr('A') ],        [], "XOR L", 1),
-    0xAE : (0, [],                  [ MR(indirect="HL",
-                                        action=set_flags("SZ503P00",
-                                                        value=lambda state, v : state.cpu.reg.A ^ v,
-                                                        dest="A")) ], "XOR (HL)", 1),
-    0xAF : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A ^ state.cpu.reg.A, key="value"),
-                 LDr('A') ],        [], "XOR A", 1),
-    0xB0 : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A | state.cpu.reg.B, key="value"),
-                 LDr('A') ],        [], "OR B", 1),
-    0xB1 : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A | state.cpu.reg.C, key="value"),
-                 LDr('A') ],        [], "OR C", 1),
-    0xB2 : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A | state.cpu.reg.D, key="value"),
-                 LDr('A') ],        [], "OR D", 1),
-    0xB3 : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A | state.cpu.reg.E, key="value"),
-                 LDr('A') ],        [], "OR E", 1),
-    0xB4 : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A | state.cpu.reg.H, key="value"),
-                 LDr('A') ],        [], "OR H", 1),
-    0xB5 : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A | state.cpu.reg.L, key="value"),
-                 LDr('A') ],        [], "OR L", 1),
-    0xB6 : (0, [],                  [ MR(indirect="HL",
-                                        action=set_flags("SZ503P00",
-                                                        value=lambda state, v : state.cpu.reg.A | v,
-                                                        dest="A")) ], "OR (HL)", 1),
-    0xB7 : (0, [ set_flags("SZ503P00", value=lambda state : state.cpu.reg.A | state.cpu.reg.A, key="value"),
-                 LDr('A') ],        [], "OR A", 1),
-    0xB8 : (0, [ set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.B, key="value") ],
-                                    [], "CP B", 1),
-    0xB9 : (0, [ set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.C, key="value"), ],
-                                    [], "CP C", 1),
-    0xBA : (0, [ set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.D, key="value"), ],
-                                    [], "CP D", 1),
-    0xBB : (0, [ set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.E, key="value"), ],
-                                    [], "CP E", 1),
-    0xBC : (0, [ set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.H, key="value"), ],
-                                    [], "CP H", 1),
-    0xBD : (0, [ set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.L, key="value"), ],
-                                    [], "CP L", 1),
-    0xBE : (0, [],                  [ MR(indirect="HL",
-                                        action=set_flags("SZ5H3V1C",
-                                                        value=lambda state, v : state.cpu.reg.A - v,)
-                                                                 ) ], "CP (HL)", 1),
-    0xBF : (0, [ set_flags("SZ5H3V1C", value=lambda state : state.cpu.reg.A - state.cpu.reg.A, key="value"), ],
-                                    [], "CP A", 1),
-    0xC0 : (1, [ on_flag('Z', early_abort()) ],
-                                    [ SR(), SR(action=JP()) ], "RET NZ", 1),
-    0xC1 : (0, [],                  [ SR(), SR(action=LDr("BC")) ], "POP BC", 1),
-    0xC2 : (0, [],                  [ OD(), OD(action=unless_flag("Z",JP())) ], "JP NZ,nn", 3),
-    0xC3 : (0, [],                  [ OD(), OD(action=JP()) ], "JP nn", 3),
-    0xC4 : (0, [],                  [ OD(), OD(action=do_each(RRr("target"),
-                                                              on_flag("Z", early_abort()))),
-                                      SW(source="PCH"), SW(source="PCL", action=JP(key="target")) ], "CALL NZ,nn", 3),
-    0xC5 : (1, [],                  [ SW(source="B"), SW(source="C") ], "PUSH BC", 1),
-    0xC6 : (0, [],                  [ OD(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)+(v&0xF) > 0xF) else 0),
-                                                set_flags("SZ5H3V0C",
-                                                        value=lambda state, v : state.cpu.reg.A + v,
-                                                        dest="A"))) ], "ADD n", 2),
-    0xC7 : (1, [],                  [ SW(source="PCH"), SW(source="PCL", action=JP(0x0000)) ], "RST 00H", 1),
-    0xC8 : (1, [ unless_flag('Z', early_abort()) ],
-                                    [ SR(), SR(action=JP()) ], "RET NZ", 1),
-    0xC9 : (0, [],                  [ SR(), SR(action=JP()) ], "RET", 1),
-    0xCA : (0, [],                  [ OD(), OD(action=on_flag("Z",JP())) ], "JP Z,nn", 3),
+    0x80 : (0, [ ADD8('B') ],       [], "ADD B", 1),
+    0x81 : (0, [ ADD8('C') ],       [], "ADD C", 1),
+    0x82 : (0, [ ADD8('D') ],       [], "ADD D", 1),
+    0x83 : (0, [ ADD8('E') ],       [], "ADD E", 1),
+    0x84 : (0, [ ADD8('H') ],       [], "ADD H", 1),
+    0x85 : (0, [ ADD8('L') ],       [], "ADD L", 1),
+    0x86 : (0, [],                  [ MR(indirect="HL", action=ADD8()) ], "ADD (HL)", 1),
+    0x87 : (0, [ ADD8('A') ],       [], "ADD A", 1),
+    0x88 : (0, [ ADC8('B') ],       [], "ADC B", 1),
+    0x89 : (0, [ ADC8('C') ],       [], "ADC C", 1),
+    0x8A : (0, [ ADC8('D') ],       [], "ADC D", 1),
+    0x8B : (0, [ ADC8('E') ],       [], "ADC E", 1),
+    0x8C : (0, [ ADC8('H') ],       [], "ADC H", 1),
+    0x8D : (0, [ ADC8('L') ],       [], "ADC L", 1),
+    0x8E : (0, [],                  [ MR(indirect="HL", action=ADC8()) ], "ADC (HL)", 1),
+    0x8F : (0, [ ADC8('A') ],       [], "ADC A", 1),
+    0x90 : (0, [ SUB8('B') ],       [], "SUB B", 1),
+    0x91 : (0, [ SUB8('C') ],       [], "SUB C", 1),
+    0x92 : (0, [ SUB8('D') ],       [], "SUB D", 1),
+    0x93 : (0, [ SUB8('E') ],       [], "SUB E", 1),
+    0x94 : (0, [ SUB8('H') ],       [], "SUB H", 1),
+    0x95 : (0, [ SUB8('L') ],       [], "SUB L", 1),
+    0x96 : (0, [],                  [ MR(indirect="HL", action=SUB8()) ], "SUB (HL)", 1),
+    0x97 : (0, [ SUB8('A') ],       [], "SUB A", 1),
+    0x98 : (0, [ SBC8('B') ],       [], "SBC B", 1),
+    0x99 : (0, [ SBC8('C') ],       [], "SBC C", 1),
+    0x9A : (0, [ SBC8('D') ],       [], "SBC D", 1),
+    0x9B : (0, [ SBC8('E') ],       [], "SBC E", 1),
+    0x9C : (0, [ SBC8('H') ],       [], "SBC H", 1),
+    0x9D : (0, [ SBC8('L') ],       [], "SBC L", 1),
+    0x9E : (0, [],                  [ MR(indirect="HL", action=SBC8()) ], "SBC (HL)", 1),
+    0x9F : (0, [ SBC8('A') ],       [], "SBC A", 1),
+    0xA0 : (0, [ AND8('B') ],       [], "AND B", 1),
+    0xA1 : (0, [ AND8('C') ],       [], "AND C", 1),
+    0xA2 : (0, [ AND8('D') ],       [], "AND D", 1),
+    0xA3 : (0, [ AND8('E') ],       [], "AND E", 1),
+    0xA4 : (0, [ AND8('H') ],       [], "AND H", 1),
+    0xA5 : (0, [ AND8('L') ],       [], "AND L", 1),
+    0xA6 : (0, [],                  [ MR(indirect="HL", action=AND8()) ], "AND (HL)", 1),
+    0xA7 : (0, [ AND8('A') ],       [], "AND A", 1),
+    0xA8 : (0, [ XOR8('B') ],       [], "XOR B", 1),
+    0xA9 : (0, [ XOR8('C') ],       [], "XOR C", 1),
+    0xAA : (0, [ XOR8('D') ],       [], "XOR D", 1),
+    0xAB : (0, [ XOR8('E') ],       [], "XOR E", 1),
+    0xAC : (0, [ XOR8('H') ],       [], "XOR H", 1),
+    0xAD : (0, [ XOR8('L') ],       [], "XOR L", 1),
+    0xAE : (0, [],                  [ MR(indirect="HL", action=XOR8()) ], "XOR (HL)", 1),
+    0xAF : (0, [ XOR8('A') ],       [], "XOR A", 1),
+    0xB0 : (0, [ OR8('B') ],        [], "OR B", 1),
+    0xB1 : (0, [ OR8('C') ],        [], "OR C", 1),
+    0xB2 : (0, [ OR8('D') ],        [], "OR D", 1),
+    0xB3 : (0, [ OR8('E') ],        [], "OR E", 1),
+    0xB4 : (0, [ OR8('H') ],        [], "OR H", 1),
+    0xB5 : (0, [ OR8('L') ],        [], "OR L", 1),
+    0xB6 : (0, [],                  [ MR(indirect="HL", action=OR8()) ], "OR (HL)", 1),
+    0xB7 : (0, [ OR8('A') ],        [], "OR A", 1),
+    0xB8 : (0, [ CP8('B') ],        [], "CP B", 1),
+    0xB9 : (0, [ CP8('C') ],        [], "CP C", 1),
+    0xBA : (0, [ CP8('D') ],        [], "CP D", 1),
+    0xBB : (0, [ CP8('E') ],        [], "CP E", 1),
+    0xBC : (0, [ CP8('H') ],        [], "CP H", 1),
+    0xBD : (0, [ CP8('L') ],        [], "CP L", 1),
+    0xBE : (0, [],                  [ MR(indirect="HL", action=CP8()) ], "CP (HL)", 1),
+    0xBF : (0, [ CP8('A') ],        [], "CP A", 1),
+    0xC0 : (1, [ continue_if('Z', False) ],
+                                    [ SR16(action=JP()) ], "RET NZ", 1),
+    0xC1 : (0, [],                  [ SR16(action=LDr("BC")) ], "POP BC", 1),
+    0xC2 : (0, [],                  [ OD16(action=jp_if("Z", False)) ], "JP NZ,nn", 3),
+    0xC3 : (0, [],                  [ OD16(action=JP()) ], "JP nn", 3),
+    0xC4 : (0, [],                  [ OD16(action=continue_if("Z", False, key="target")),
+                                      SW16(high="PCH", low="PCL", action=JP(key="target")) ], "CALL NZ,nn", 3),
+    0xC5 : (1, [],                  [ SW16(high="B", low="C") ], "PUSH BC", 1),
+    0xC6 : (0, [],                  [ OD(action=ADD8()) ], "ADD n", 2),
+    0xC7 : (1, [],                  [ SW16(high="PCH", low="PCL", action=JP(0x0000)) ], "RST 00H", 1),
+    0xC8 : (1, [ continue_if('Z', True) ],
+                                    [ SR16(action=JP()) ], "RET NZ", 1),
+    0xC9 : (0, [],                  [ SR16(action=JP()) ], "RET", 1),
+    0xCA : (0, [],                  [ OD16(action=jp_if("Z", True)) ], "JP Z,nn", 3),
     0xCB : (0, [],                  [ OCF(prefix=0xCB) ], "", 0),
-    0xCC : (0, [],                  [ OD(), OD(action=do_each(RRr("target"),
-                                                              unless_flag("Z", early_abort()))),
-                                      SW(source="PCH"), SW(source="PCL", action=JP(key="target")) ], "CALL Z,nn", 3),
-    0xCD : (0, [],                  [ OD(), OD(action=RRr("target")),
-                                      SW(source="PCH"), SW(source="PCL", action=JP(key="target")) ], "CALL nn", 3),
-    0xCE : (0, [],                  [ OD(action=do_each(force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)+(v&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                                                        set_flags("SZ5H3V0C",
-                                                        value=lambda state, v : state.cpu.reg.A + v + state.cpu.reg.getflag('C'),
-                                                        dest="A"))) ], "ADC n", 2),
-    0xCF : (1, [],                  [ SW(source="PCH"), SW(source="PCL", action=JP(0x0008)) ], "RST 08H", 1),
-    0xD0 : (1, [ on_flag('C', early_abort()) ],
-                                    [ SR(), SR(action=JP()) ], "RET NC", 1),
-    0xD1 : (0, [],                  [ SR(), SR(action=LDr("DE")) ], "POP DE", 1),
-    0xD2 : (0, [],                  [ OD(), OD(action=unless_flag("C",JP())) ], "JP NC,nn", 3),
+    0xCC : (0, [],                  [ OD16(action=continue_if("Z", True, key="target")),
+                                      SW16(high="PCH", low="PCL", action=JP(key="target")) ], "CALL Z,nn", 3),
+    0xCD : (0, [],                  [ OD16(action=RRr("target")),
+                                      SW16(high="PCH", low="PCL", action=JP(key="target")) ], "CALL nn", 3),
+    0xCE : (0, [],                  [ OD(action=ADC8()) ], "ADC n", 2),
+    0xCF : (1, [],                  [ SW16(high="PCH", low="PCL", action=JP(0x0008)) ], "RST 08H", 1),
+    0xD0 : (1, [ continue_if('C', False) ],
+                                    [ SR16(action=JP()) ], "RET NC", 1),
+    0xD1 : (0, [],                  [ SR16(action=LDr("DE")) ], "POP DE", 1),
+    0xD2 : (0, [],                  [ OD16(action=jp_if("C", False)) ], "JP NC,nn", 3),
     0xD3 : (0, [],                  [ OD(key="address"), PW(high="A", source="A") ], "OUT (n),A", 2),
-    0xD4 : (0, [],                  [ OD(), OD(action=do_each(RRr("target"),
-                                                              on_flag("C", early_abort()))),
-                                      SW(source="PCH"), SW(source="PCL", action=JP(key="target")) ], "CALL NC,nn", 3),
-    0xD5 : (1, [],                  [ SW(source="D"), SW(source="E") ], "PUSH DE", 1),
-    0xD6 : (0, [],                  [ OD(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)-(v&0xF) < 0x0) else 0),
-                                                set_flags("SZ5H3V1C",
-                                                        value=lambda state, v : state.cpu.reg.A - v,
-                                                        dest="A"))) ], "SUB n", 2),
-    0xD7 : (1, [],                  [ SW(source="PCH"), SW(source="PCL", action=JP(0x0010)) ], "RST 10H", 1),
-    0xD8 : (1, [ unless_flag('C', early_abort()) ],
-                                    [ SR(), SR(action=JP()) ], "RET C", 1),
-    0xDA : (0, [],                  [ OD(), OD(action=on_flag("C",JP())) ], "JP C,nn", 3),
+    0xD4 : (0, [],                  [ OD16(action=continue_if("C", False, key="target")),
+                                      SW16(high="PCH", low="PCL", action=JP(key="target")) ], "CALL NC,nn", 3),
+    0xD5 : (1, [],                  [ SW16(high="D", low="E") ], "PUSH DE", 1),
+    0xD6 : (0, [],                  [ OD(action=SUB8()) ], "SUB n", 2),
+    0xD7 : (1, [],                  [ SW16(high="PCH", low="PCL", action=JP(0x0010)) ], "RST 10H", 1),
+    0xD8 : (1, [ continue_if('C', True) ],
+                                    [ SR16(action=JP()) ], "RET C", 1),
+    0xDA : (0, [],                  [ OD16(action=jp_if("C", True)) ], "JP C,nn", 3),
     0xDB : (0, [],                  [ OD(), PR(high="A", dest="A") ], "IN A,n", 2),
-    0xDC : (0, [],                  [ OD(), OD(action=do_each(RRr("target"),
-                                                              unless_flag("C", early_abort()))),
-                                      SW(source="PCH"), SW(source="PCL", action=JP(key="target")) ], "CALL C,nn", 3),
-    0xDE : (0, [],                  [ OD(action=do_each(
-                                            force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)-(v&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                                            set_flags("SZ5H3V1C",
-                                                        value=lambda state, v : state.cpu.reg.A - v - state.cpu.reg.getflag('C'),
-                                                        dest="A"))) ], "SBC n", 2),
+    0xDC : (0, [],                  [ OD16(action=continue_if("C", True, key="target")),
+                                      SW16(high="PCH", low="PCL", action=JP(key="target")) ], "CALL C,nn", 3),
+    0xDE : (0, [],                  [ OD(action=SBC8()) ], "SBC n", 2),
     0xD9 : (0, [ EXX() ],           [], "EXX", 1),
     0xDD : (0, [],                  [ OCF(prefix=0xDD) ], "", 0),
-    0xDF : (1, [],                  [ SW(source="PCH"), SW(source="PCL", action=JP(0x0018)) ], "RST 18H", 1),
-    0xE0 : (1, [ on_flag('P', early_abort()) ],
-                                    [ SR(), SR(action=JP()) ], "RET PO", 1),
-    0xE1 : (0, [],                  [ SR(), SR(action=LDr("HL")) ], "POP HL", 1),
-    0xE2 : (0, [],                  [ OD(), OD(action=unless_flag("P",JP())) ], "JP PO,nn", 3),
+    0xDF : (1, [],                  [ SW16(high="PCH", low="PCL", action=JP(0x0018)) ], "RST 18H", 1),
+    0xE0 : (1, [ continue_if('P', False) ],
+                                    [ SR16(action=JP()) ], "RET PO", 1),
+    0xE1 : (0, [],                  [ SR16(action=LDr("HL")) ], "POP HL", 1),
+    0xE2 : (0, [],                  [ OD16(action=jp_if("P", False)) ], "JP PO,nn", 3),
     0xE3 : (0, [ RRr('H','H'), RRr('L','L') ],  [ SR(), SR(action=LDr("HL"), extra=1),
                                                       SW(key="H"), SW(key="L", extra=2) ], "EX (SP),HL", 1),
-    0xE4 : (0, [],                  [ OD(), OD(action=do_each(RRr("target"),
-                                                              on_flag("P", early_abort()))),
-                                      SW(source="PCH"), SW(source="PCL", action=JP(key="target")) ], "CALL PO,nn", 3),
-    0xE5 : (1, [],                  [ SW(source="H"), SW(source="L") ], "PUSH HL", 1),
-    0xE6 : (0, [],                  [ OD(action=set_flags("SZ513P00",
-                                                        value=lambda state, v : state.cpu.reg.A & v,
-                                                        dest="A")) ], "AND n", 2),
-    0xE7 : (1, [],                  [ SW(source="PCH"), SW(source="PCL", action=JP(0x0020)) ], "RST 20H", 1),
-    0xE8 : (1, [ unless_flag('P', early_abort()) ],
-                                    [ SR(), SR(action=JP()) ], "RET PE", 1),
+    0xE4 : (0, [],                  [ OD16(action=continue_if("P", False, key="target")),
+                                      SW16(high="PCH", low="PCL", action=JP(key="target")) ], "CALL PO,nn", 3),
+    0xE5 : (1, [],                  [ SW16(high="H", low="L") ], "PUSH HL", 1),
+    0xE6 : (0, [],                  [ OD(action=AND8()) ], "AND n", 2),
+    0xE7 : (1, [],                  [ SW16(high="PCH", low="PCL", action=JP(0x0020)) ], "RST 20H", 1),
+    0xE8 : (1, [ continue_if('P', True) ],
+                                    [ SR16(action=JP()) ], "RET PE", 1),
     0xE9 : (0, [ JP(source="HL") ], [], "JP (HL)", 1),
-    0xEA : (0, [],                  [ OD(), OD(action=on_flag("P",JP())) ], "JP PE,nn", 3),
+    0xEA : (0, [],                  [ OD16(action=jp_if("P", True)) ], "JP PE,nn", 3),
     0xEB : (0, [ EX('DE', 'HL') ],  [], "EX DE,HL", 1),
-    0xEC : (0, [],                  [ OD(), OD(action=do_each(RRr("target"),
-                                                              unless_flag("P", early_abort()))),
-                                      SW(source="PCH"), SW(source="PCL", action=JP(key="target")) ], "CALL PE,nn", 3),
+    0xEC : (0, [],                  [ OD16(action=continue_if("P", True, key="target")),
+                                      SW16(high="PCH", low="PCL", action=JP(key="target")) ], "CALL PE,nn", 3),
     0xED : (0, [],                  [ OCF(prefix=0xED) ], "", 0),
-    0xEE : (0, [],                  [ OD(action=set_flags("SZ503P00",
-                                                        value=lambda state, v : state.cpu.reg.A ^ v,
-                                                        dest="A")) ], "XOR n", 2),
-    0xEF : (1, [],                  [ SW(source="PCH"), SW(source="PCL", action=JP(0x0028)) ], "RST 28H", 1),
-    0xF0 : (1, [ on_flag('S', early_abort()) ],
-                                    [ SR(), SR(action=JP()) ], "RET P", 1),
-    0xF1 : (0, [],                  [ SR(), SR(action=LDr("AF")) ], "POP AF", 1),
-    0xF2 : (0, [],                  [ OD(), OD(action=unless_flag("S",JP())) ], "JP P,nn", 3),
+    0xEE : (0, [],                  [ OD(action=XOR8()) ], "XOR n", 2),
+    0xEF : (1, [],                  [ SW16(high="PCH", low="PCL", action=JP(0x0028)) ], "RST 28H", 1),
+    0xF0 : (1, [ continue_if('S', False) ],
+                                    [ SR16(action=JP()) ], "RET P", 1),
+    0xF1 : (0, [],                  [ SR16(action=LDr("AF")) ], "POP AF", 1),
+    0xF2 : (0, [],                  [ OD16(action=jp_if("S", False)) ], "JP P,nn", 3),
     0xF3 : (0, [ di() ],            [], "DI", 1),
-    0xF4 : (0, [],                  [ OD(), OD(action=do_each(RRr("target"),
-                                                              on_flag("S", early_abort()))),
-                                      SW(source="PCH"), SW(source="PCL", action=JP(key="target")) ], "CALL P,nn", 3),
-    0xF5 : (1, [],                  [ SW(source="A"), SW(source="F") ], "PUSH AF", 1),
-    0xF6 : (0, [],                  [ OD(action=set_flags("SZ503P00",
-                                                        value=lambda state, v : state.cpu.reg.A | v,
-                                                        dest="A")) ], "OR n", 2),
-    0xF7 : (1, [],                  [ SW(source="PCH"), SW(source="PCL", action=JP(0x0030)) ], "RST 30H", 1),
-    0xF8 : (1, [ unless_flag('S', early_abort()) ],
-                                    [ SR(), SR(action=JP()) ], "RET M", 1),
+    0xF4 : (0, [],                  [ OD16(action=continue_if("S", False, key="target")),
+                                      SW16(high="PCH", low="PCL", action=JP(key="target")) ], "CALL P,nn", 3),
+    0xF5 : (1, [],                  [ SW16(high="A", low="F") ], "PUSH AF", 1),
+    0xF6 : (0, [],                  [ OD(action=OR8()) ], "OR n", 2),
+    0xF7 : (1, [],                  [ SW16(high="PCH", low="PCL", action=JP(0x0030)) ], "RST 30H", 1),
+    0xF8 : (1, [ continue_if('S', True) ],
+                                    [ SR16(action=JP()) ], "RET M", 1),
     0xF9 : (0, [ LDrs('SP', 'HL') ], [], "LD SP,HL", 1),
-    0xFA : (0, [],                  [ OD(), OD(action=on_flag("S",JP())) ], "JP M,nn", 3),
+    0xFA : (0, [],                  [ OD16(action=jp_if("S", True)) ], "JP M,nn", 3),
     0xFB : (0, [ ei() ],            [], "EI", 1),
-    0xFC : (0, [],                  [ OD(), OD(action=do_each(RRr("target"),
-                                                              unless_flag("S", early_abort()))),
-                                      SW(source="PCH"), SW(source="PCL", action=JP(key="target")) ], "CALL M,nn", 3),
+    0xFC : (0, [],                  [ OD16(action=continue_if("S", True, key="target")),
+                                      SW16(high="PCH", low="PCL", action=JP(key="target")) ], "CALL M,nn", 3),
     0xFD : (0, [],                  [ OCF(prefix=0xFD) ], "", 0),
-    0xFE : (0, [],                  [ OD(action=set_flags("SZ5H3V1C",
-                                                        value=lambda state, v : state.cpu.reg.A - v,
-                                                        )) ], "CP n", 2),
-    0xFF : (1, [],                  [ SW(source="PCH"), SW(source="PCL", action=JP(0x0038)) ], "RST 38H", 1),
+    0xFE : (0, [],                  [ OD(action=CP8()) ], "CP n", 2),
+    0xFF : (1, [],                  [ SW16(high="PCH", low="PCL", action=JP(0x0038)) ], "RST 38H", 1),
 
     # Multibyte opcodes
     (0xCB, 0x00) : (0, [ RLC("B") ],            [], "RLC B", 2),
@@ -1562,14 +2196,14 @@ INSTRUCTION_STATES = {
     (0xCB, 0x2D) : (0, [ SRA("L") ],            [], "SRA L", 2),
     (0xCB, 0x2E) : (0, [],                      [ MR(indirect="HL", action=SRA()), MW(indirect="HL") ], "SRA (HL)", 2),
     (0xCB, 0x2F) : (0, [ SRA("A") ],            [], "SRA A", 2),
-    (0xCB, 0x30) : (0, [ SL1("B") ],            [], "SL1 B (undocumemnted)", 2),
-    (0xCB, 0x31) : (0, [ SL1("C") ],            [], "SL1 C (undocumemnted)", 2),
-    (0xCB, 0x32) : (0, [ SL1("D") ],            [], "SL1 D (undocumemnted)", 2),
-    (0xCB, 0x33) : (0, [ SL1("E") ],            [], "SL1 E (undocumemnted)", 2),
-    (0xCB, 0x34) : (0, [ SL1("H") ],            [], "SL1 H (undocumemnted)", 2),
-    (0xCB, 0x35) : (0, [ SL1("L") ],            [], "SL1 L (undocumemnted)", 2),
-    (0xCB, 0x36) : (0, [],                      [ MR(indirect="HL", action=SL1()), MW(indirect="HL") ], "SL1 (HL) (undocumemnted)", 2),
-    (0xCB, 0x37) : (0, [ SL1("A") ],            [], "SL1 A (undocumemnted)", 2),
+    (0xCB, 0x30) : (0, [ SL1("B") ],            [], "SL1 B (undocumented)", 2),
+    (0xCB, 0x31) : (0, [ SL1("C") ],            [], "SL1 C (undocumented)", 2),
+    (0xCB, 0x32) : (0, [ SL1("D") ],            [], "SL1 D (undocumented)", 2),
+    (0xCB, 0x33) : (0, [ SL1("E") ],            [], "SL1 E (undocumented)", 2),
+    (0xCB, 0x34) : (0, [ SL1("H") ],            [], "SL1 H (undocumented)", 2),
+    (0xCB, 0x35) : (0, [ SL1("L") ],            [], "SL1 L (undocumented)", 2),
+    (0xCB, 0x36) : (0, [],                      [ MR(indirect="HL", action=SL1()), MW(indirect="HL") ], "SL1 (HL) (undocumented)", 2),
+    (0xCB, 0x37) : (0, [ SL1("A") ],            [], "SL1 A (undocumented)", 2),
     (0xCB, 0x38) : (0, [ SRL("B") ],            [], "SRL B", 2),
     (0xCB, 0x39) : (0, [ SRL("C") ],            [], "SRL C", 2),
     (0xCB, 0x3A) : (0, [ SRL("D") ],            [], "SRL D", 2),
@@ -1771,47 +2405,30 @@ INSTRUCTION_STATES = {
     (0xCB, 0xFE) : (0, [],                      [ MR(indirect="HL", action=SET(7)), MW(indirect="HL") ], "SET 7,(HL)", 2),
     (0xCB, 0xFF) : (0, [ SET(7, "A") ],         [], "SET 7,A", 2),
 
-    (0xDD, 0x09) : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.B)&0xF)+((state.cpu.reg.IXH)&0xF)+((state.cpu.reg.C+state.cpu.reg.IXL)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.B + state.cpu.reg.IXH + ((state.cpu.reg.C+state.cpu.reg.IXL)>>8)),
-                 LDr('IX', value=lambda state : (state.cpu.reg.IX + state.cpu.reg.BC)&0xFFFF) ],
+    (0xDD, 0x09) : (0, [ ADD16('IX', 'BC') ],
                                     [ IO(4, True), IO(3, True) ], "ADD IX,BC", 2),
-    (0xDD, 0x19) : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.D)&0xF)+((state.cpu.reg.IXH)&0xF)+((state.cpu.reg.E+state.cpu.reg.IXL)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.D + state.cpu.reg.IXH + ((state.cpu.reg.E+state.cpu.reg.IXL)>>8)),
-                 LDr('IX', value=lambda state : (state.cpu.reg.IX + state.cpu.reg.DE)&0xFFFF) ],
+    (0xDD, 0x19) : (0, [ ADD16('IX', 'DE') ],
                                     [ IO(4, True), IO(3, True) ], "ADD IX,DE", 2),
-    (0xDD, 0x29) : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.IXH)&0xF)+((state.cpu.reg.IXH)&0xF)+((state.cpu.reg.IXL+state.cpu.reg.IXL)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.IXH + state.cpu.reg.IXH + ((state.cpu.reg.IXL+state.cpu.reg.IXL)>>8)),
-                 LDr('IX', value=lambda state : (state.cpu.reg.IX + state.cpu.reg.IX)&0xFFFF) ],
+    (0xDD, 0x29) : (0, [ ADD16('IX', 'IX') ],
                                     [ IO(4, True), IO(3, True) ], "ADD IX,IX", 2),
-    (0xDD, 0x39) : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.SPH)&0xF)+((state.cpu.reg.IXH)&0xF)+((state.cpu.reg.SPL+state.cpu.reg.IXL)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.SPH + state.cpu.reg.IXH + ((state.cpu.reg.SPL+state.cpu.reg.IXL)>>8)),
-                 LDr('IX', value=lambda state : (state.cpu.reg.IX + state.cpu.reg.SP)&0xFFFF) ],
+    (0xDD, 0x39) : (0, [ ADD16('IX', 'SP') ],
                                     [ IO(4, True), IO(3, True) ], "ADD IX,SP", 2),
-    (0xDD, 0x21) : (0, [],                [ OD(), OD(action=LDr('IX')) ], "LD IX,nn", 4),
-    (0xDD, 0x22) : (0, [],                [ OD(key="address"),
-                                            OD(key="address", compound=high_after_low),
-                                            MW(source="IXL"),
-                                            MW(source="IXH")], "LD (nn),IX", 4),
-    (0xDD, 0x23) : (0, [ LDr('IX', value=lambda state : (state.cpu.reg.IX + 1)&0xFFFF) ],
+    (0xDD, 0x21) : (0, [],                [ OD16(action=LDr('IX')) ], "LD IX,nn", 4),
+    (0xDD, 0x22) : (0, [],                [ OD16(key="address"),
+                                            MW16(high="IXH", low="IXL") ], "LD (nn),IX", 4),
+    (0xDD, 0x23) : (0, [ inc('IX') ],
                                     [], "INC IX", 2),
-    (0xDD, 0x2A) : (0, [],                [ OD(key="address"),
-                                            OD(key="address", compound=high_after_low),
-                                            MR(action=LDr('IXL')), MR(action=LDr('IXH')) ], "LD IX,(nn)", 4),
-    (0xDD, 0x2B) : (0, [ LDr('IX', value=lambda state : (state.cpu.reg.IX - 1)&0xFFFF) ],
+    (0xDD, 0x2A) : (0, [],                [ OD16(key="address"),
+                                            MR16(high="IXH", low="IXL") ], "LD IX,(nn)", 4),
+    (0xDD, 0x2B) : (0, [ dec('IX') ],
                                     [], "DEC IX", 2),
     (0xDD, 0x34) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if ((v&0xF)+1 > 0xF) else 0),
-                                                set_flags("SZ5-3V0-", value=lambda state, v : v + 1, key="value")),
-                                               incaddr=False),
+                                            MR(action=INC8(), incaddr=False),
                                             MW() ], "INC (IX+d)", 3),
     (0xDD, 0x35) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if ((v&0xF)-1 < 0x0) else 0),
-                                                set_flags("SZ5H3V1-", value=lambda state, v : v - 1, key="value")),
-                                               incaddr=False),
+                                            MR(action=DEC8(), incaddr=False),
                                             MW() ], "DEC (IX+d)", 3),
     (0xDD, 0x36) : (0, [],                [ OD(key='address', signed=True),
                                                 OD(key='value'),
@@ -1819,7 +2436,7 @@ INSTRUCTION_STATES = {
                                                 MW() ], "LD (IX+d),n", 3),
     (0xDD, 0x46) : (0, [],                [ OD(key='address', signed=True),
                                                 IO(5, True, transform={ 'address' : add_register('IX') }),
-                                                MR(action=LDr("B")) ], "LD B,(IX+d)"),
+                                                MR(action=LDr("B")) ], "LD B,(IX+d)", 3),
     (0xDD, 0x4E) : (0, [],                [ OD(key='address', signed=True),
                                                 IO(5, True, transform={ 'address' : add_register('IX') }),
                                                 MR(action=LDr("C")) ], "LD C,(IX+d)", 3),
@@ -1846,7 +2463,7 @@ INSTRUCTION_STATES = {
                                                 MW(source="D") ], "LD (IX+d),D", 3),
     (0xDD, 0x73) : (0, [],                [ OD(key='address', signed=True),
                                                 IO(5, True, transform={ 'address' : add_register('IX') }),
-                                                MW(source="E") ], "LD (IX+d),E"),
+                                                MW(source="E") ], "LD (IX+d),E", 3),
     (0xDD, 0x74) : (0, [],                [ OD(key='address', signed=True),
                                                 IO(5, True, transform={ 'address' : add_register('IX') }),
                                                 MW(source="H") ], "LD (IX+d),H", 3),
@@ -1861,58 +2478,35 @@ INSTRUCTION_STATES = {
                                                 MR(action=LDr("A")) ], "LD A,(IX+d)", 3),
     (0xDD, 0x86) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)+(v&0xF) > 0xF) else 0),
-                                                set_flags("SZ5H3V0C",
-                                                value=lambda state, v : state.cpu.reg.A + v,
-                                                dest="A"))) ], "ADD (IX+d)", 3),
+                                            MR(action=ADD8()) ], "ADD (IX+d)", 3),
     (0xDD, 0x8E) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)+(v&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                                                set_flags("SZ5H3V0C",
-                                                value=lambda state, v : state.cpu.reg.A + v + state.cpu.reg.getflag('C'),
-                                                dest="A"))) ], "ADC (IX+d)", 3),
+                                            MR(action=ADC8()) ], "ADC (IX+d)", 3),
     (0xDD, 0x96) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)-(v&0xF) < 0x0) else 0),
-                                                set_flags("SZ5H3V1C",
-                                               value=lambda state, v : state.cpu.reg.A - v,
-                                               dest="A"))) ], "SUB (IX+d)", 3),
+                                            MR(action=SUB8()) ], "SUB (IX+d)", 3),
     (0xDD, 0x9E) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=do_each(
-                                            force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)-(v&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                                            set_flags("SZ5H3V1C",
-                                               value=lambda state, v : state.cpu.reg.A - v - state.cpu.reg.getflag('C'),
-                                               dest="A"))) ], "SBC (IX+d)", 3),
+                                            MR(action=SBC8()) ], "SBC (IX+d)", 3),
     (0xDD, 0xA6) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=set_flags("SZ513P00",
-                                               value=lambda state, v : state.cpu.reg.A & v,
-                                               dest="A")) ], "AND (IX+d)", 3),
+                                            MR(action=AND8()) ], "AND (IX+d)", 3),
     (0xDD, 0xAE) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=set_flags("SZ503P00",
-                                               value=lambda state, v : state.cpu.reg.A ^ v,
-                                               dest="A")) ], "XOR (IX+d)", 3),
+                                            MR(action=XOR8()) ], "XOR (IX+d)", 3),
     (0xDD, 0xB6) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=set_flags("SZ503P00",
-                                               value=lambda state, v : state.cpu.reg.A | v,
-                                               dest="A")) ], "OR (IX+d)", 3),
+                                            MR(action=OR8()) ], "OR (IX+d)", 3),
     (0xDD, 0xBE) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IX') }),
-                                            MR(action=set_flags("SZ5H3V1C",
-                                               value=lambda state, v : state.cpu.reg.A - v,)) ], "CP (IX+d)", 3),
+                                            MR(action=CP8()) ], "CP (IX+d)", 3),
     (0xDD, 0xCB) : (0, [],                [ OD(key='address', signed=True),
                                             IO(1, True, transform={'address' : add_register('IX') }),
-                                            OCF(prefix=(0xDD, 0xCB)) ], "-- second and third bytes of 4 byte op-code"),
-    (0xDD, 0xE1) : (0, [],                [ SR(), SR(action=LDr("IX")) ], "POP IX", 2),
+                                            OCF(prefix=(0xDD, 0xCB)) ], "", 0),
+    (0xDD, 0xE1) : (0, [],                [ SR16(action=LDr("IX")) ], "POP IX", 2),
     (0xDD, 0xE3) : (0, [ RRr('H','IXH'), RRr('L','IXL') ],
-                        [ SR(), SR(action=LDr("IX"), extra=1), SW(key="H"), SW(key="L", extra=2) ], "EX (SP),IX"),
-    (0xDD, 0xE5) : (1, [],                [ SW(source="IXH"), SW(source="IXL") ], "PUSH IX", 2),
+                        [ SR(), SR(action=LDr("IX"), extra=1), SW(key="H"), SW(key="L", extra=2) ], "EX (SP),IX", 2),
+    (0xDD, 0xE5) : (1, [],                [ SW16(high="IXH", low="IXL") ], "PUSH IX", 2),
     (0xDD, 0xE9) : (0, [ JP(source="IX") ], [], "JP (IX)", 2),
     (0xDD, 0xF9) : (0, [LDrs('SP','IX'),],[], "LD SP,IX", 2),
 
@@ -1920,86 +2514,66 @@ INSTRUCTION_STATES = {
                                                    action=set_flags("SZ503P0-")) ], "IN B,(C)", 2),
     (0xED, 0x41) : (0, [],                [ PW(high="B", low="C", source="B") ], "OUT (C),B", 2),
     (0xED, 0x42) : (0, SBC16('BC'),      [ IO(4, True), IO(3, True) ], "SBC HL,BC", 2),
-    (0xED, 0x43) : (0, [],                [ OD(key="address"),
-                                            OD(key="address",
-                                            compound=high_after_low),
-                                            MW(source="C"), MW(source="B") ], "LD (nn),BC", 4),
-    (0xED, 0x44) : (0, [ set_flags("SZ513V11", value=lambda state : (-state.cpu.reg.A)&0xFF, dest='A') ],
-                                         [], "NEG", 2),
-    (0xED, 0x45) : (0, [],               [ SR(), SR(action=do_each(restore_iff(), JP())) ], "RETN", 2),
+    (0xED, 0x43) : (0, [],                [ OD16(key="address"),
+                                            MW16(high="B", low="C") ], "LD (nn),BC", 4),
+    (0xED, 0x44) : (0, [ neg() ],        [], "NEG", 2),
+    (0xED, 0x45) : (0, [],               [ SR16(action=do_each(restore_iff(), JP())) ], "RETN", 2),
     (0xED, 0x46) : (0, [ im(0) ],        [], "IM0", 2),
     (0xED, 0x47) : (0, [LDrs('I', 'A')], [], "LD I,A", 2),
     (0xED, 0x48) : (0, [],                [ PR(high="B", low="C", dest="C",
                                                    action=set_flags("SZ503P0-")) ], "IN C,(C)", 2),
     (0xED, 0x49) : (0, [],                [ PW(high="B", low="C", source="C") ], "OUT (C),C", 2),
-    (0xED, 0x4B) : (0, [],                [ OD(key="address"),
-                                            OD(key="address", compound=high_after_low),
-                                            MR(action=LDr('C')), MR(action=LDr('B')) ], "LD BC,(nn)", 4),
+    (0xED, 0x4B) : (0, [],                [ OD16(key="address"),
+                                            MR16(high="B", low="C") ], "LD BC,(nn)", 4),
     (0xED, 0x4A) : (0, ADC16('BC'),      [ IO(4, True), IO(3, True) ], "ADC HL,BC", 2),
-    (0xED, 0x4D) : (0, [],               [ SR(), SR(action=JP()) ], "RETI", 2),
+    (0xED, 0x4D) : (0, [],               [ SR16(action=JP()) ], "RETI", 2),
     (0xED, 0x4F) : (0, [LDrs('R', 'A'),], [], "LD R,A", 2),
     (0xED, 0x50) : (0, [],                [ PR(high="B", low="C", dest="D",
                                                    action=set_flags("SZ503P0-")) ], "IN D,(C)", 2),
     (0xED, 0x51) : (0, [],                [ PW(high="B", low="C", source="D") ], "OUT (C),D", 2),
     (0xED, 0x52) : (0, SBC16('DE'),      [ IO(4, True), IO(3, True) ], "SBC HL,DE", 2),
-    (0xED, 0x53) : (0, [],                [ OD(key="address"),
-                                            OD(key="address", compound=high_after_low),
-                                            MW(source="E"),
-                                            MW(source="D") ], "LD (nn),DE", 4),
+    (0xED, 0x53) : (0, [],                [ OD16(key="address"),
+                                            MW16(high="D", low="E") ], "LD (nn),DE", 4),
     (0xED, 0x56) : (0, [ im(1) ],        [], "IM1", 2),
     (0xED, 0x57) : (0, [LDrs('A', 'I'), set_flags("SZ503*0-", source='I') ], [], "LD A,I", 2),
     (0xED, 0x58) : (0, [],                [ PR(high="B", low="C", dest="E",
                                                    action=set_flags("SZ503P0-")) ], "IN E,(C)", 2),
     (0xED, 0x59) : (0, [],                [ PW(high="B", low="C", source="E") ], "OUT (C),E", 2),
     (0xED, 0x5A) : (0, ADC16('DE'),      [ IO(4, True), IO(3, True) ], "ADC HL,DE", 2),
-    (0xED, 0x5B) : (0, [],                [ OD(key="address"),
-                                            OD(key="address", compound=high_after_low),
-                                            MR(action=LDr('E')), MR(action=LDr('D')) ], "LD DE,(nn)", 4),
+    (0xED, 0x5B) : (0, [],                [ OD16(key="address"),
+                                            MR16(high="D", low="E") ], "LD DE,(nn)", 4),
     (0xED, 0x5E) : (0, [ im(2) ],        [], "IM2", 2),
     (0xED, 0x5F) : (0, [LDrs('A', 'R'), set_flags("SZ503*0-", source='R') ], [], "LD A,R", 2),
     (0xED, 0x60) : (0, [],                [ PR(high="B", low="C", dest="H",
                                                    action=set_flags("SZ503P0-")) ], "IN H,(C)", 2),
     (0xED, 0x61) : (0, [],                [ PW(high="B", low="C", source="H") ], "OUT (C),H", 2),
     (0xED, 0x62) : (0, SBC16('HL'),      [ IO(4, True), IO(3, True) ], "SBC HL,HL", 2),
-    (0xED, 0x67) : (0, [],               [ MR(indirect="HL",
-                                              action=do_each(
-                                                  RRr("value", value=lambda state,v : (v >> 4) | (state.cpu.reg.A << 4)),
-                                                  set_flags("SZ503P0-", value=lambda state,v : (v&0x0F), dest="A", key=None))),
+    (0xED, 0x67) : (0, [],               [ MR(indirect="HL", action=rrd()),
                                             IO(4, True),
                                             MW(indirect="HL") ], "RRD", 2),
     (0xED, 0x68) : (0, [],               [ PR(high="B", low="C", dest="L",
                                                   action=set_flags("SZ503P0-")) ], "IN L,(C)", 2),
     (0xED, 0x69) : (0, [],                [ PW(high="B", low="C", source="L") ], "OUT (C),L", 2),
     (0xED, 0x6A) : (0, ADC16('HL'),      [ IO(4, True), IO(3, True) ], "ADC HL,HL", 2),
-    (0xED, 0x6F) : (0, [],               [ MR(indirect="HL",
-                                              action=do_each(
-                                                  RRr("value", value=lambda state,v : (v << 4) | (state.cpu.reg.A&0x0F)),
-                                                  set_flags("SZ503P0-", value=lambda state,v : (v >> 4), dest="A", key=None))),
+    (0xED, 0x6F) : (0, [],               [ MR(indirect="HL", action=rld()),
                                             IO(4, True),
                                             MW(indirect="HL") ], "RLD", 2),
     (0xED, 0x70) : (0, [],                [ PR(high="B", low="C", dest="F",
                                                    action=set_flags("SZ503P0-")) ], "IN F,(C) (undocumented)", 2),
     (0xED, 0x71) : (0, [],                [ PW(high="B", low="C", source="F") ], "OUT (C),F (undocumented)", 2),
     (0xED, 0x72) : (0, SBC16('SP'),      [ IO(4, True), IO(3, True) ], "SBC HL,SP", 2),
-    (0xED, 0x73) : (0, [],                [ OD(key="address"),
-                                            OD(key="address", compound=high_after_low),
-                                            MW(source="SPL"),
-                                            MW(source="SPH") ], "LD (nn),SP", 2),
+    (0xED, 0x73) : (0, [],                [ OD16(key="address"),
+                                            MW16(high="SPH", low="SPL") ], "LD (nn),SP", 2),
     (0xED, 0x78) : (0, [],                [ PR(high="B", low="C", dest="A",
                                                    action=set_flags("SZ503P0-")) ], "IN A,(C)", 2),
     (0xED, 0x79) : (0, [],                [ PW(high="B", low="C", source="A") ], "OUT (C),A", 2),
     (0xED, 0x7A) : (0, ADC16('SP'),      [ IO(4, True), IO(3, True) ], "ADC HL,SP", 2),
-    (0xED, 0x7B) : (0, [],                [ OD(key="address"),
-                                            OD(key="address", compound=high_after_low),
-                                            MR(action=LDr('SPL')), MR(action=LDr('SPH')) ], "LD SP,(nn)", 4),
+    (0xED, 0x7B) : (0, [],                [ OD16(key="address"),
+                                            MR16(high="SPH", low="SPL") ], "LD SP,(nn)", 4),
     (0xED, 0xA0) : (0, [],                [ MR(indirect="HL"),
                                             MW(indirect="DE",
                                                 extra=2,
-                                                action=do_each(set_flags("--50310-", value=lambda state,_ : state.kwargs['value'] + state.cpu.reg.A),
-                                                                inc("HL"),
-                                                                inc("DE"),
-                                                                dec("BC"),
-                                                                on_zero("BC", clear_flag("V")))) ], "LDI", 2),
+                                                action=block_transfer(1)) ], "LDI", 2),
     (0xED, 0xA1) : (0, [],                [ MR(indirect="HL"),
                                             IO(5, True, transform={'value' : subfrom() },
                                                    action=do_each(set_flags("-Z50311-"),
@@ -2021,11 +2595,7 @@ INSTRUCTION_STATES = {
     (0xED, 0xA8) : (0, [],                [ MR(indirect="HL"),
                                             MW(indirect="DE",
                                                 extra=2,
-                                                action=do_each(set_flags("--50310-", value=lambda state,_ : state.kwargs['value'] + state.cpu.reg.A),
-                                                                dec("HL"),
-                                                                dec("DE"),
-                                                                dec("BC"),
-                                                                on_zero("BC", clear_flag("V")))) ], "LDD", 2),
+                                                action=block_transfer(-1)) ], "LDD", 2),
     (0xED, 0xA9) : (0, [],                [ MR(indirect="HL"),
                                             IO(5, True, transform={'value' : subfrom() },
                                                    action=do_each(set_flags("-Z50311-"),
@@ -2047,13 +2617,8 @@ INSTRUCTION_STATES = {
     (0xED, 0xB0) : (0, [],                [ MR(indirect="HL"),
                                             MW(indirect="DE",
                                                 extra=2,
-                                                action=do_each(set_flags("--50310-", value=lambda state,_ : state.kwargs['value'] + state.cpu.reg.A),
-                                                                inc("HL"),
-                                                                inc("DE"),
-                                                                dec("BC"),
-                                                                on_zero("BC", clear_flag("V")),
-                                                                on_zero("BC", early_abort()))),
-                                            IO(5, True, action=do_each(dec("PC"), dec("PC"))) ], "LDIR", 2),
+                                                action=block_transfer(1, repeat=True)),
+                                            IO(5, True, action=repeat_instruction()) ], "LDIR", 2),
     (0xED, 0xB1) : (0, [],                [ MR(indirect="HL"),
                                             IO(5, True, transform={'value' : subfrom() },
                                                    action=do_each(set_flags("-Z50311-"),
@@ -2061,34 +2626,29 @@ INSTRUCTION_STATES = {
                                                                   dec("BC"),
                                                                   on_zero("BC", clear_flag("V")),
                                                                   on_zero("BC", early_abort()),
-                                                                  on_flag('Z', early_abort()))),
-                                            IO(5, True, action=do_each(dec("PC"), dec("PC"))) ], "CPIR", 2),
+                                                                  continue_if('Z', False))),
+                                            IO(5, True, action=repeat_instruction()) ], "CPIR", 2),
     (0xED, 0xB2) : (0, [],                [ PR(high="B", low="C"),
                                             MW(indirect="HL",
                                                action=do_each(inc("HL"),
                                                               dec("B"),
                                                               set_flags("SZ503P0-",
                                                                         source="B"),
-                                                              on_flag('Z', early_abort()))),
-                                            IO(5, True, action=do_each(dec("PC"), dec("PC")))], "INIR", 2),
+                                                              continue_if('Z', False))),
+                                            IO(5, True, action=repeat_instruction())], "INIR", 2),
     (0xED, 0xB3) : (0, [],                [ MR(indirect="HL"),
                                             PW(low="C", high="B",
                                                action=do_each(inc("HL"),
                                                               dec("B"),
                                                               set_flags("SZ503P0-",
                                                                         source="B"),
-                                                              on_flag('Z', early_abort()))),
-                                            IO(5, True, action=do_each(dec("PC"), dec("PC")))], "OUTIR", 2),
+                                                              continue_if('Z', False))),
+                                            IO(5, True, action=repeat_instruction())], "OUTIR", 2),
     (0xED, 0xB8) : (0, [],                [ MR(indirect="HL"),
                                             MW(indirect="DE",
                                                 extra=2,
-                                                action=do_each(set_flags("--50310-", value=lambda state,_ : state.kwargs['value'] + state.cpu.reg.A),
-                                                                dec("HL"),
-                                                                dec("DE"),
-                                                                dec("BC"),
-                                                                on_zero("BC", clear_flag("V")),
-                                                                on_zero("BC", early_abort()))),
-                                            IO(5, True, action=do_each(dec("PC"), dec("PC"))) ], "LDDR", 2),
+                                                action=block_transfer(-1, repeat=True)),
+                                            IO(5, True, action=repeat_instruction()) ], "LDDR", 2),
     (0xED, 0xB9) : (0, [],                [ MR(indirect="HL"),
                                             IO(5, True, transform={'value' : subfrom() },
                                                    action=do_each(set_flags("-Z50311-"),
@@ -2096,66 +2656,49 @@ INSTRUCTION_STATES = {
                                                                   dec("BC"),
                                                                   on_zero("BC", clear_flag("V")),
                                                                   on_zero("BC", early_abort()),
-                                                                  on_flag('Z', early_abort()))),
-                                                IO(5, True, action=do_each(dec("PC"), dec("PC"))) ], "CPDR", 2),
+                                                                  continue_if('Z', False))),
+                                                IO(5, True, action=repeat_instruction()) ], "CPDR", 2),
     (0xED, 0xBA) : (0, [],                [ PR(high="B", low="C"),
                                             MW(indirect="HL",
                                                action=do_each(dec("HL"),
                                                               dec("B"),
                                                               set_flags("SZ503P0-",
                                                                         source="B"),
-                                                              on_flag('Z', early_abort()))),
-                                            IO(5, True, action=do_each(dec("PC"), dec("PC")))], "INDR", 2),
+                                                              continue_if('Z', False))),
+                                            IO(5, True, action=repeat_instruction())], "INDR", 2),
     (0xED, 0xBB) : (0, [],                [ MR(indirect="HL"),
                                             PW(low="C", high="B",
                                                action=do_each(dec("HL"),
                                                               dec("B"),
                                                               set_flags("SZ503P0-",
                                                                         source="B"),
-                                                              on_flag('Z', early_abort()))),
-                                            IO(5, True, action=do_each(dec("PC"), dec("PC")))], "OUTDR", 2),
+                                                              continue_if('Z', False))),
+                                            IO(5, True, action=repeat_instruction())], "OUTDR", 2),
 
-    (0xFD, 0x09) : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.B)&0xF)+((state.cpu.reg.IYH)&0xF)+((state.cpu.reg.C+state.cpu.reg.IYL)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.B + state.cpu.reg.IYH + ((state.cpu.reg.C+state.cpu.reg.IYL)>>8)),
-                 LDr('IY', value=lambda state : (state.cpu.reg.IY + state.cpu.reg.BC)&0xFFFF) ],
+    (0xFD, 0x09) : (0, [ ADD16('IY', 'BC') ],
                                     [ IO(4, True), IO(3, True) ], "ADD IY,BC", 2),
-    (0xFD, 0x19) : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.D)&0xF)+((state.cpu.reg.IYH)&0xF)+((state.cpu.reg.E+state.cpu.reg.IYL)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.D + state.cpu.reg.IYH + ((state.cpu.reg.E+state.cpu.reg.IYL)>>8)),
-                 LDr('IY', value=lambda state : (state.cpu.reg.IY + state.cpu.reg.DE)&0xFFFF) ],
+    (0xFD, 0x19) : (0, [ ADD16('IY', 'DE') ],
                                     [ IO(4, True), IO(3, True) ], "ADD IY,DE", 2),
-    (0xFD, 0x23) : (0, [ LDr('IY', value=lambda state : (state.cpu.reg.IY + 1)&0xFFFF) ],
+    (0xFD, 0x23) : (0, [ inc('IY') ],
                                     [], "INC IY", 2),
-    (0xFD, 0x29) : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.IYH)&0xF)+((state.cpu.reg.IYH)&0xF)+((state.cpu.reg.IYL+state.cpu.reg.IYL)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.IYH + state.cpu.reg.IYH + ((state.cpu.reg.IYL+state.cpu.reg.IYL)>>8)),
-                 LDr('IY', value=lambda state : (state.cpu.reg.IY + state.cpu.reg.IY)&0xFFFF) ],
+    (0xFD, 0x29) : (0, [ ADD16('IY', 'IY') ],
                                     [ IO(4, True), IO(3, True) ], "ADD IY,IY", 2),
-    (0xFD, 0x2B) : (0, [ LDr('IY', value=lambda state : (state.cpu.reg.IY - 1)&0xFFFF) ],
+    (0xFD, 0x2B) : (0, [ dec('IY') ],
                                     [], "DEC IY", 2),
-    (0xFD, 0x39) : (0, [ force_flag('H', lambda  state : 1 if (((state.cpu.reg.SPH)&0xF)+((state.cpu.reg.IYH)&0xF)+((state.cpu.reg.SPL+state.cpu.reg.IYL)>>8) > 0xF) else 0),
-                 set_flags("--5-3-0C", value=lambda state : state.cpu.reg.SPH + state.cpu.reg.IYH + ((state.cpu.reg.SPL+state.cpu.reg.IYL)>>8)),
-                 LDr('IY', value=lambda state : (state.cpu.reg.IY + state.cpu.reg.SP)&0xFFFF) ],
+    (0xFD, 0x39) : (0, [ ADD16('IY', 'SP') ],
                                     [ IO(4, True), IO(3, True) ], "ADD IY,SP", 2),
-    (0xFD, 0x21) : (0, [],                [ OD(), OD(action=LDr('IY')) ], "LD IY,nn", 4),
-    (0xFD, 0x22) : (0, [],                [ OD(key="address"),
-                                            OD(key="address"),
-                                            MW(source="IYL"),
-                                            MW(source="IYH") ], "LD (nn),IY", 4),
-    (0xFD, 0x2A) : (0, [],                [ OD(key="address"),
-                                            OD(key="address"),
-                                            MR(action=LDr('IYL')), MR(action=LDr('IYH')) ], "LD IY,(nn)", 4),
+    (0xFD, 0x21) : (0, [],                [ OD16(action=LDr('IY')) ], "LD IY,nn", 4),
+    (0xFD, 0x22) : (0, [],                [ OD16(key="address"),
+                                            MW16(high="IYH", low="IYL") ], "LD (nn),IY", 4),
+    (0xFD, 0x2A) : (0, [],                [ OD16(key="address"),
+                                            MR16(high="IYH", low="IYL") ], "LD IY,(nn)", 4),
     (0xFD, 0x34) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if ((v&0xF)+1 > 0xF) else 0),
-                                                set_flags("SZ5-3V0-", value=lambda state, v : v + 1, key="value")),
-                                               incaddr=False),
+                                            MR(action=INC8(), incaddr=False),
                                             MW() ], "INC (IY+d)", 3),
     (0xFD, 0x35) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if ((v&0xF)-1 < 0x0) else 0),
-                                                set_flags("SZ5H3V1-", value=lambda state, v : v - 1, key="value")),
-                                               incaddr=False),
+                                            MR(action=DEC8(), incaddr=False),
                                             MW() ], "DEC (IY+d)", 3),
     (0xFD, 0x36) : (0, [],                [ OD(key='address', signed=True),
                                                 OD(key='value'),
@@ -2205,58 +2748,35 @@ INSTRUCTION_STATES = {
                                                 MR(action=LDr("A")) ], "LD A,(IY+d)", 3),
     (0xFD, 0x86) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)+(v&0xF) > 0xF) else 0),
-                                                set_flags("SZ5H3V0C",
-                                                value=lambda state, v : state.cpu.reg.A + v,
-                                                dest="A"))) ], "ADD (IY+d)", 3),
+                                            MR(action=ADD8()) ], "ADD (IY+d)", 3),
     (0xFD, 0x8E) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)+(v&0xF)+state.cpu.reg.getflag('C') > 0xF) else 0),
-                                                set_flags("SZ5H3V0C",
-                                                value=lambda state, v : state.cpu.reg.A + v + state.cpu.reg.getflag('C'),
-                                                dest="A"))) ], "ADC (IY+d)", 3),
+                                            MR(action=ADC8()) ], "ADC (IY+d)", 3),
     (0xFD, 0x96) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=do_each(
-                                                force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)-(v&0xF) < 0x0) else 0),
-                                                set_flags("SZ5H3V1C",
-                                               value=lambda state, v : state.cpu.reg.A - v,
-                                               dest="A"))) ], "SUB (IY+d)", 3),
+                                            MR(action=SUB8()) ], "SUB (IY+d)", 3),
     (0xFD, 0x9E) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=do_each(
-                                            force_flag('H', lambda  state,v : 1 if (((state.cpu.reg.A)&0xF)-(v&0xF) - state.cpu.reg.getflag('C') < 0x0) else 0),
-                                            set_flags("SZ5H3V1C",
-                                               value=lambda state, v : state.cpu.reg.A - v - state.cpu.reg.getflag('C'),
-                                               dest="A"))) ], "SBC (IY+d)", 3),
+                                            MR(action=SBC8()) ], "SBC (IY+d)", 3),
     (0xFD, 0xA6) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=set_flags("SZ513P00",
-                                               value=lambda state, v : state.cpu.reg.A & v,
-                                               dest="A")) ], "AND (IY+d)", 3),
+                                            MR(action=AND8()) ], "AND (IY+d)", 3),
     (0xFD, 0xAE) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=set_flags("SZ503P00",
-                                               value=lambda state, v : state.cpu.reg.A ^ v,
-                                               dest="A")) ], "XOR (IY+d)", 3),
+                                            MR(action=XOR8()) ], "XOR (IY+d)", 3),
     (0xFD, 0xB6) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=set_flags("SZ503P00",
-                                               value=lambda state, v : state.cpu.reg.A | v,
-                                               dest="A")) ], "OR (IY+d)", 3),
+                                            MR(action=OR8()) ], "OR (IY+d)", 3),
     (0xFD, 0xBE) : (0, [],                [ OD(key='address', signed=True),
                                             IO(5, True, transform={'address' : add_register('IY') }),
-                                            MR(action=set_flags("SZ5H3V1C",
-                                               value=lambda state, v : state.cpu.reg.A - v,)) ], "CP (IY+d)", 3),
+                                            MR(action=CP8()) ], "CP (IY+d)", 3),
     (0xFD, 0xCB) : (0, [],                [ OD(key='address', signed=True),
                                             IO(1, True, transform={'address' : add_register('IY') }),
                                             OCF(prefix=(0xFD, 0xCB)) ], "", 0),
-    (0xFD, 0xE1) : (0, [],                [ SR(), SR(action=LDr("IY")) ], "POP IY", 2),
+    (0xFD, 0xE1) : (0, [],                [ SR16(action=LDr("IY")) ], "POP IY", 2),
     (0xFD, 0xE3) : (0, [ RRr('H','IYH'), RRr('L','IYL') ],
                         [ SR(), SR(action=LDr("IY"), extra=1), SW(key="H"), SW(key="L", extra=2) ], "EX (SP),IY", 2),
-    (0xFD, 0xE5) : (1, [],                [ SW(source="IYH"), SW(source="IYL") ], "PUSH IY", 2),
+    (0xFD, 0xE5) : (1, [],                [ SW16(high="IYH", low="IYL") ], "PUSH IY", 2),
     (0xFD, 0xE9) : (0, [ JP(source="IY") ], [], "JP (IY)", 2),
     (0xFD, 0xF9) : (0, [LDrs('SP','IY'),],[], "LD SP,IY", 2),
 
@@ -2266,7 +2786,7 @@ INSTRUCTION_STATES = {
     (0xDD, 0xCB, 0x1E) : (0, [], [ MR(action=RR(), incaddr=False), MW() ], "RR (IX+d)", 4),
     (0xDD, 0xCB, 0x26) : (0, [], [ MR(action=SLA(), incaddr=False), MW() ], "SLA (IX+d)", 4),
     (0xDD, 0xCB, 0x2E) : (0, [], [ MR(action=SRA(), incaddr=False), MW() ], "SRA (IX+d)", 4),
-    (0xDD, 0xCB, 0x36) : (0, [], [ MR(action=SL1(), incaddr=False), MW() ], "SL1 (IX+d) (undocumemnted)", 4),
+    (0xDD, 0xCB, 0x36) : (0, [], [ MR(action=SL1(), incaddr=False), MW() ], "SL1 (IX+d) (undocumented)", 4),
     (0xDD, 0xCB, 0x3E) : (0, [], [ MR(action=SRL(), incaddr=False), MW() ], "SRA (IX+d)", 4),
     (0xDD, 0xCB, 0x46) : (0, [], [ MR(action=BIT(0)) ], "BIT 0,(IX+d)", 4),
     (0xDD, 0xCB, 0x4E) : (0, [], [ MR(action=BIT(1)) ], "BIT 1,(IX+d)", 4),
@@ -2299,7 +2819,7 @@ INSTRUCTION_STATES = {
     (0xFD, 0xCB, 0x1E) : (0, [], [ MR(action=RR(), incaddr=False), MW() ], "RR (IY+d)", 4),
     (0xFD, 0xCB, 0x26) : (0, [], [ MR(action=SLA(), incaddr=False), MW() ], "SLA (IY+d)", 4),
     (0xFD, 0xCB, 0x2E) : (0, [], [ MR(action=SRA(), incaddr=False), MW() ], "SRA (IY+d)", 4),
-    (0xFD, 0xCB, 0x36) : (0, [], [ MR(action=SL1(), incaddr=False), MW() ], "SL1 (IY+d) (undocumemnted)", 4),
+    (0xFD, 0xCB, 0x36) : (0, [], [ MR(action=SL1(), incaddr=False), MW() ], "SL1 (IY+d) (undocumented)", 4),
     (0xFD, 0xCB, 0x3E) : (0, [], [ MR(action=SRL(), incaddr=False), MW() ], "SRA (IY+d)", 4),
     (0xFD, 0xCB, 0x46) : (0, [], [ MR(action=BIT(0)) ], "BIT 0,(IY+d)", 4),
     (0xFD, 0xCB, 0x4E) : (0, [], [ MR(action=BIT(1)) ], "BIT 1,(IY+d)", 4),
@@ -2327,12 +2847,30 @@ INSTRUCTION_STATES = {
     (0xFD, 0xCB, 0xFE) : (0, [], [ MR(action=SET(7), incaddr=False), MW() ], "SET 7,(IY+d)", 4),
     }
 
+# Decoding is a pure function of the instruction code, so the part of each table entry the OCF needs is sliced off
+# once here rather than on every fetch
+_DECODE_CACHE = dict((inst, state[:3]) for (inst, state) in INSTRUCTION_STATES.items())
+
 def decode_instruction(instruction):
     """Decode an instruction code and return a tuple of:
-    (extra_time_for_OCF, [list of callables as side-effects of OCF], [ list of new machine states to add to pipeline ], "mnemonic", # bytes)"""
-    if instruction in INSTRUCTION_STATES:
-        return INSTRUCTION_STATES[instruction][:3]
-    raise UnrecognisedInstructionError(instruction)
+    (extra_time_for_OCF, [list of callables as side-effects of OCF], [ list of new machine states to add to pipeline ])"""
+    try:
+        return _DECODE_CACHE[instruction]
+    except KeyError:
+        raise UnrecognisedInstructionError(instruction) from None
+
+# The states making up each kind of interrupt response. Like those for instructions they are only instantiated
+# once for each cpu and then reset and reused, since a response always completes before another can begin.
+_INTERRUPT_STATES = {
+    "NMI"  : [ IO(5, True, action=inta()), SW16(high="PCH", low="PCL", action=JP(0x0066)) ],
+    "INT0" : [ OCF(extra=2) ],
+    "INT1" : [ IO(7, True, action=inta()), SW16(high="PCH", low="PCL", action=JP(0x0038)) ],
+    "INT2" : [ IO(4, True),
+               OD(action=RRr("address", value=lambda state,v: (state.cpu.reg.I << 8) | (v&0xFE))),
+               SW16(high="PCH", low="PCL"),
+               MR(),
+               MR(action=JP()) ],
+    }
 
 def interrupt_response(cpu, nmi, ack=None):
     """Called to generate the new pipeline set up to respond to an interrupt."""
@@ -2341,76 +2879,71 @@ def interrupt_response(cpu, nmi, ack=None):
     else:
         ds = ( x for x in [] )
 
-
     if nmi:
-        cpu.most_recent_instruction = "NMI"
-        return [ IO(5, True, action=inta(ds))().setcpu(cpu), SW(source="PCH")().setcpu(cpu), SW(source="PCL", action=JP(0x0066))().setcpu(cpu) ]
-    if cpu.interrupt_mode == 0:
-        cpu.most_recent_instruction = "INT0"
-        return [ OCF(data_source=ds, extra=2)().setcpu(cpu) ]
-    elif cpu.interrupt_mode == 1:
-        cpu.most_recent_instruction = "INT1"
-        return [ IO(7, True, action=inta(ds))().setcpu(cpu), SW(source="PCH")().setcpu(cpu), SW(source="PCL", action=JP(0x0038))().setcpu(cpu) ]
-    elif cpu.interrupt_mode == 2:
-        cpu.most_recent_instruction = "INT2"
-        return [ IO(4, True)().setcpu(cpu),
-                 OD(action=RRr("address", value=lambda state,v: (state.cpu.reg.I << 8) | (v&0xFE)))().setcpu(cpu).set_data_source(ds),
-                 SW(source="PCH")().setcpu(cpu),
-                 SW(source="PCL")().setcpu(cpu),
-                 MR()().setcpu(cpu),
-                 MR(action=JP())().setcpu(cpu) ]
+        kind = "NMI"
+    elif cpu.interrupt_mode in (0, 1, 2):
+        kind = "INT{}".format(cpu.interrupt_mode)
     else:
         raise Exception("Not implemented yet")
+    cpu.most_recent_instruction = kind
+
+    built = cpu._state_cache.get(kind)
+    if built is None:
+        built = cpu._state_cache[kind] = [ state().setcpu(cpu) for state in _INTERRUPT_STATES[kind] ]
+    # The data from the interrupting device is consumed by whichever of these states reads a data source
+    return [ state.reset().set_data_source(ds) for state in built ]
+
+# Disassembly tables, built once from INSTRUCTION_STATES. Each entry is (mnemonic, length, template) where template
+# is the mnemonic with format fields in place of its operands (or None if it has none), a length of 0 marks a prefix
+# whose entries are in a further table, and None marks an unrecognised opcode.
+_OPERAND_RE     = re.compile(r'nn|\bn\b|\+d')
+_OPERAND_FIELDS = { 'nn' : '0x{nn:04X}', 'n' : '0x{n:02X}', '+d' : '+0x{d:02X}' }
+
+def _disassembly_entry(code, length):
+    template = _OPERAND_RE.sub(lambda m : _OPERAND_FIELDS[m.group(0)], code)
+    return (code, length, (template if template != code else None))
+
+_DISASM_MAIN     = [ None ]*256
+_DISASM_PREFIXED = {}
+for (_inst, _state) in INSTRUCTION_STATES.items():
+    if isinstance(_inst, int):
+        (_table, _op) = (_DISASM_MAIN, _inst)
+    else:
+        (_table, _op) = (_DISASM_PREFIXED.setdefault(_inst[:-1], [ None ]*256), _inst[-1])
+    _table[_op] = _disassembly_entry(*_state[3:])
+del _inst, _state, _table, _op
 
 def disassemble_instructions(_instructions):
-    instructions = [ _ for _ in _instructions ]
+    """Disassemble a sequence of bytes, returning a list of (mnemonic, length) tuples."""
+    instructions = list(_instructions)
+    count = len(instructions)
     ret = []
-    while len(instructions) > 0:
-        if instructions[0] in INSTRUCTION_STATES:
-            try:
-                (code, length) = INSTRUCTION_STATES[instructions[0]][3:]
-            except:
-                print("Error trying to disassemble 0x{:02X}".format(instructions[0]))
-                raise
-            if length == 0:
-                if len(instructions) > 1:
-                    if (instructions[0], instructions[1]) in INSTRUCTION_STATES:
-                        try:
-                            (code, length) = INSTRUCTION_STATES[(instructions[0], instructions[1])][3:]
-                        except:
-                            print("Error trying to disassemble (0x{:02X}, 0x{:02X})".format(instructions[0], instructions[1]))
-                            raise
-                        if length == 0:
-                            if len(instructions) > 3:
-                                if (instructions[0], instructions[1], instructions[3]) in INSTRUCTION_STATES:
-                                    try:
-                                        (code, length) = INSTRUCTION_STATES[(instructions[0], instructions[1], instructions[3])][3:]
-                                    except:
-                                        print("Error trying to disassemble (0x{:02X}, 0x{:02X}, 0x{:02X})".format(instructions[0], instructions[1], instructions[3]))
-                                        raise
-                                else:
-                                    (code, length) = ("???", 4)
-                            else:
-                                (code, length) = ("???", 4)
+    i = 0
+    while i < count:
+        entry = _DISASM_MAIN[instructions[i]]
+        if entry is not None and entry[1] == 0:
+            # Prefixed op-code, the distinguishing byte of a 4 byte op-code comes after its displacement
+            if i + 1 < count:
+                entry = _DISASM_PREFIXED[(instructions[i],)][instructions[i + 1]]
+                if entry is not None and entry[1] == 0:
+                    if i + 3 < count:
+                        entry = _DISASM_PREFIXED[(instructions[i], instructions[i + 1])][instructions[i + 3]] or ("???", 4, None)
                     else:
-                        (code, length) = ("???", 2)
-                else:
-                    (code, length) = ("???", 2)
-        else:
-            (code, length) = ("???", "1")
-
-        if "nn" in code and length <= len(instructions):
-            data = (instructions[length-1] << 8) + instructions[length-2]
-            code = code.replace("nn", "0x{:04X}".format(data))
-        elif "n" in code and length <= len(instructions):
-            data = instructions[length-1]
-            code = code.replace("n", "0x{:02X}".format(data))
-        if "+d" in code and 3 <= len(instructions):
-            data = instructions[2]
-            code = code.replace("+d", "+0x{:02X}".format(data))
-
-        for i in range(0,length):
-            if len(instructions) > 0:
-                instructions.pop(0)
+                        entry = ("???", 4, None)
+                elif entry is None:
+                    entry = ("???", 2, None)
+            else:
+                entry = ("???", 2, None)
+        elif entry is None:
+            entry = ("???", 1, None)
+
+        (code, length, template) = entry
+        if template is not None and i + length <= count:
+            end = i + length
+            code = template.format(nn=((instructions[end - 1] << 8) + instructions[end - 2]),
+                                   n=instructions[end - 1],
+                                   d=(instructions[i + 2] if length >= 3 else 0))
+
         ret.append((code, length))
+        i += length
     return ret
@@ -23,6 +23,7 @@ class MemoryBus (object):
         self.size = size
         pages = []
         mappings = sorted(mappings, key=lambda m : m[0])
+        mapped = set(id(m[2]) for m in mappings)
         ramcount = 0
         ramstart = 0
         for n in range(0, (size + 255)//256):
@@ -46,13 +47,61 @@ class MemoryBus (object):
                 ramcount -= 1
         self.pages = list(pages)
 
+        # Pages backed by a cacheable peripheral (plain RAM or ROM) are mirrored into a single flat
+        # buffer, so that read_fast can serve them with one index. Writes keep the mirror current.
+        # Writable peripherals smaller than the region they are mapped to alias addresses, so a write
+        # could change more than one location, and those are left on the slow path.
+        span = {}
+        for page in self.pages:
+            span[id(page[1])] = span.get(id(page[1]), 0) + 256
+        self._direct = bytearray(1 if page[1].cacheable and (isinstance(page[1], ROM) or page[1].size >= span[id(page[1])]) else 0
+                                 for page in self.pages)
+        self._flat   = bytearray(len(self.pages) << 8)
+        # The cpu can produce addresses outside the bus, such as when pushing with SP at 0, these wrap around so
+        # that reads, writes and the mirror all agree on which location they refer to
+        self._wrap   = len(self._flat)
+        for n in range(0, len(self.pages)):
+            # RAM created above starts zeroed, just like the mirror, so only mapped peripherals need copying
+            if self._direct[n] and id(self.pages[n][1]) in mapped:
+                for address in range(n << 8, (n + 1) << 8):
+                    self._flat[address] = self.read(address)
+
     def read(self, address):
         """Read from the specified address."""
+        address %= self._wrap
+        return self.pages[(address >> 8)][1].read(address - self.pages[(address >> 8)][0])
+
+    def read_fast(self, address):
+        """Read from the specified address, bypassing the peripheral where its contents are mirrored."""
+        address %= self._wrap
+        if self._direct[address >> 8]:
+            return self._flat[address]
         return self.pages[(address >> 8)][1].read(address - self.pages[(address >> 8)][0])
 
     def write(self, address, data):
         """Write to the specified address."""
-        self.pages[(address >> 8)][1].write(address - self.pages[(address >> 8)][0], data)
+        address %= self._wrap
+        page = self.pages[(address >> 8)]
+        page[1].write(address - page[0], data)
+        if self._direct[address >> 8]:
+            self._flat[address] = page[1].read(address - page[0])
+
+    def refresh(self, start=0, length=None):
+        """Copy length addresses beginning at start (by default the whole bus) from the peripherals into the mirror
+        served by read_fast. This must be called after the contents of a mirrored peripheral, such as RAM.data,
+        are changed other than through write, for instance when loading a snapshot."""
+        if length is None:
+            length = self._wrap
+        for address in range(start, start + length):
+            address %= self._wrap
+            if self._direct[address >> 8]:
+                page = self.pages[(address >> 8)]
+                self._flat[address] = page[1].read(address - page[0])
+
+    def read_range(self, start, length):
+        """Read length consecutive addresses beginning at start, returned as bytes."""
+        read_fast = self.read_fast
+        return bytes(read_fast(a) for a in range(start, start + length))
 
     def memory_map(self, granularity=0x100):
         """Print a nice representation of the memory map."""
@@ -70,6 +119,11 @@ class MemoryBus (object):
         return "\n".join(mmap)
 
 class Peripheral (object):
+    # Set to True in subclasses whose reads only ever return fixed content or the last value written,
+    # which allows the memory bus to mirror them. The mirror is only updated by MemoryBus.write, so if the
+    # contents of such a peripheral are changed any other way MemoryBus.refresh must be called afterwards.
+    cacheable = False
+
     def __init__(self):
         pass
 
@@ -86,6 +140,10 @@ class Peripheral (object):
         return "Generic Peripheral"
 
 class RAM (Peripheral):
+    # Memory buses mirror RAM, so changes made directly to data are not seen by MemoryBus.read_fast (and so
+    # by the cpu) until MemoryBus.refresh is called for them
+    cacheable = True
+
     def __init__(self, size):
         self.size = size
         self.data = bytearray(size)
@@ -100,6 +158,8 @@ class RAM (Peripheral):
         return "RAM"
 
 class ROM (Peripheral):
+    cacheable = True
+
     def __init__(self, data, name="Custom ROM"):
         if isinstance(data, list) or isinstance(data, tuple):
             data = ''.join("%c" % x for x in data)
@@ -1,5 +1,44 @@
 """Implementation of the Z80 register file."""
 
+from operator import attrgetter
+
+_setattr = object.__setattr__
+
+# The accessors for each register are generated from source, so that the register names are constants in their code
+# rather than being looked up by name when they run. The registers are plain entries in the instance dictionary, so
+# setting them through it is the same as object.__setattr__ only quicker.
+
+def _compile(src):
+    namespace = {}
+    exec(src, namespace)
+    return (namespace.get('get'), namespace['set'])
+
+def _plain_accessors(name):
+    # attrgetter is already the quickest way to read a single attribute, so only the setter is generated
+    return (attrgetter(name),
+            _compile("def set(reg, value):\n"
+                     "    reg.__dict__['{0}'] = value\n".format(name))[1])
+
+def _pair_accessors(high, low):
+    return _compile("def get(reg):\n"
+                    "    return reg.{0} << 8 | reg.{1}\n"
+                    "def set(reg, value):\n"
+                    "    d = reg.__dict__\n"
+                    "    d['{0}'] = (value >> 8)&0xFF\n"
+                    "    d['{1}'] = value&0xFF\n".format(high, low))
+
+def _half_accessors(whole, high):
+    if high:
+        return _compile("def get(reg):\n"
+                        "    return reg.{0} >> 8\n"
+                        "def set(reg, value):\n"
+                        "    reg.__dict__['{0}'] = (reg.{0}&0xFF) + (value << 8)\n".format(whole))
+    else:
+        return _compile("def get(reg):\n"
+                        "    return reg.{0}&0xFF\n"
+                        "def set(reg, value):\n"
+                        "    reg.__dict__['{0}'] = ((reg.{0} >> 8) << 8) + value\n".format(whole))
+
 class RegisterFile(object):
     """This is an emulation of the z80 register file, which will respond to both 8 and 16-bit register names
     as attributes, and supports the ex and exx instructions."""
@@ -31,139 +70,55 @@ class RegisterFile(object):
 
     def ex(self):
         """Exchange A and F with A' and F'"""
-        (a, f) = (self.A, self.F)
-        (self.A, self.F) = (self._A, self._F)
-        (self._A, self._F) = (a,f)
+        # The values being exchanged are already registers, so they are swapped directly in the instance dictionary
+        d = self.__dict__
+        (d['A'], d['F'], d['_A'], d['_F']) = (d['_A'], d['_F'], d['A'], d['F'])
 
     def exx(self):
         """Exchange BC, DE, and HL with BC', DE', and HL'"""
-        (b, c, d, e, h, l) = (self.B, self.C, self.D, self.E, self.H, self.L)
-        (self.B, self.C, self.D, self.E, self.H, self.L) = (self._B, self._C, self._D, self._E, self._H, self._L)
-        (self._B, self._C, self._D, self._E, self._H, self._L) = (b, c, d, e, h, l)
+        d = self.__dict__
+        (d['B'], d['C'], d['D'], d['E'], d['H'], d['L'],
+         d['_B'], d['_C'], d['_D'], d['_E'], d['_H'], d['_L']) = (d['_B'], d['_C'], d['_D'], d['_E'], d['_H'], d['_L'],
+                                                                  d['B'], d['C'], d['D'], d['E'], d['H'], d['L'])
 
     def getflag(self, name):
         """Return the value of the flag, S, Z, H, P, V, N, or C"""
-        if name == "S":
-            return (self.F >> 7)&0x1
-        elif name == "Z":
-            return (self.F >> 6)&0x1
-        elif name == '5':
-            return (self.F >> 5)&0x1
-        elif name == "H":
-            return (self.F >> 4)&0x1
-        elif name == '3':
-            return (self.F >> 3)&0x1
-        elif name == "P" or name == "V":
-            return (self.F >> 2)&0x1
-        elif name == "N":
-            return (self.F >> 1)&0x1
-        if name == "C":
-            return (self.F >> 0)&0x1
-        raise KeyError
+        return (self.F >> _FLAG_BITS[name])&0x1
 
     def setflag(self, name):
         """Set the flag S, Z, H, P, V, N, or C"""
-        if name == "S":
-            self.F |= 1 << 7
-        elif name == "Z":
-            self.F |= 1 << 6
-        elif name== '5':
-            self.F |= 1 << 5
-        elif name == "H":
-            self.F |= 1 << 4
-        elif name== '3':
-            self.F |= 1 << 3
-        elif name == "P" or name == "V":
-            self.F |= 1 << 2
-        elif name == "N":
-            self.F |= 1 << 1
-        elif name == "C":
-            self.F |= 1 << 0
-        else:
-            raise KeyError
+        self.F |= 1 << _FLAG_BITS[name]
 
     def resetflag(self, name):
         """Reset the flag S, Z, H, P, V, N, or C"""
-        if name == "S":
-            self.F &= 0xFF - (1 << 7)
-        elif name == "Z":
-            self.F &= 0xFF - (1 << 6)
-        elif name == "5":
-            self.F &= 0xFF - (1 << 5)
-        elif name == "H":
-            self.F &= 0xFF - (1 << 4)
-        elif name == "3":
-            self.F &= 0xFF - (1 << 3)
-        elif name == "P" or name == "V":
-            self.F &= 0xFF - (1 << 2)
-        elif name == "N":
-            self.F &= 0xFF - (1 << 1)
-        elif name == "C":
-            self.F &= 0xFF - (1 << 0)
-        else:
-            raise KeyError
+        self.F &= 0xFF - (1 << _FLAG_BITS[name])
 
     def __getattr__(self, name):
-        if name == "AF":
-            return self.A << 8 | self.F
-        elif name == "BC":
-            return self.B << 8 | self.C
-        elif name == "DE":
-            return self.D << 8 | self.E
-        elif name == "HL":
-            return self.H << 8 | self.L
-        elif name == "IXH":
-            return self.IX >> 8
-        elif name == "IXL":
-            return self.IX&0xFF
-        elif name == "IYH":
-            return self.IY >> 8
-        elif name == "IYL":
-            return self.IY&0xFF
-        elif name == "SPH":
-            return self.SP >> 8
-        elif name == "SPL":
-            return self.SP&0xFF
-        elif name == "PCH":
-            return self.PC >> 8
-        elif name == "PCL":
-            return self.PC&0xFF
+        # Only called for names which aren't plain attributes, ie. register pairs and halves
+        if name in _ACCESSORS:
+            return _ACCESSORS[name][0](self)
         raise AttributeError
 
     def __setattr__(self, name, value):
         if not isinstance(value, int):
             raise Exception("Attempt to set register {} to invalid value {}".format(name, value))
-        if name == "AF":
-            super(RegisterFile, self).__setattr__('A', (value >> 8)&0xFF)
-            super(RegisterFile, self).__setattr__('F', value&0xFF)
-        elif name == "BC":
-            super(RegisterFile, self).__setattr__('B', (value >> 8)&0xFF)
-            super(RegisterFile, self).__setattr__('C', value&0xFF)
-        elif name == "DE":
-            super(RegisterFile, self).__setattr__('D', (value >> 8)&0xFF)
-            super(RegisterFile, self).__setattr__('E', value&0xFF)
-        elif name == "HL":
-            super(RegisterFile, self).__setattr__('H', (value >> 8)&0xFF)
-            super(RegisterFile, self).__setattr__('L', value&0xFF)
-        elif name == "IXH":
-            super(RegisterFile, self).__setattr__('IX', self.IXL + (value << 8))
-        elif name == "IXL":
-            super(RegisterFile, self).__setattr__('IX', (self.IXH << 8) + value)
-        elif name == "IYH":
-            super(RegisterFile, self).__setattr__('IY', self.IYL + (value << 8))
-        elif name == "IYL":
-            super(RegisterFile, self).__setattr__('IY', (self.IYH << 8) + value)
-        elif name == "SPH":
-            super(RegisterFile, self).__setattr__('SP', self.SPL + (value << 8))
-        elif name == "SPL":
-            super(RegisterFile, self).__setattr__('SP', (self.SPH << 8) + value)
-        elif name == "PCH":
-            super(RegisterFile, self).__setattr__('PC', self.PCL + (value << 8))
-        elif name == "PCL":
-            super(RegisterFile, self).__setattr__('PC', (self.PCH << 8) + value)
+        if name in _ACCESSORS:
+            _ACCESSORS[name][1](self, value)
         else:
-            getattr(self, name)
-            super(RegisterFile,self).__setattr__(name, value)
+            if name not in _PLAIN_REGISTERS:
+                getattr(self, name)
+            _setattr(self, name, value)
+
+    @staticmethod
+    def accessors(name):
+        """Return a pair of functions (get, set) which read and write the named register of the register file
+        passed to them as their first argument. Resolving these once is much quicker than repeatedly using
+        getattr and setattr with the name, but note that set does not check that it is given an integer."""
+        if name in _ACCESSORS:
+            return _ACCESSORS[name]
+        if name not in _PLAIN_REGISTERS:
+            raise AttributeError(name)
+        return _PLAIN_ACCESSORS[name]
 
     def registermap(self):
         """Return a string which is a diagram illustrating the current state of the registers."""
@@ -191,6 +146,28 @@ PC|    0x%04X   |    +-+-+-+-+-+-+-+-+
            self.PC,
            self.I, self.R)
 
+_PLAIN_REGISTERS = frozenset(( "A", "B", "C", "D", "E", "F", "H", "L", "I", "R", "IX", "IY", "SP", "PC",
+                               "_A", "_B", "_C", "_D", "_E", "_F", "_H", "_L" ))
+
+_PLAIN_ACCESSORS = dict((name, _plain_accessors(name)) for name in _PLAIN_REGISTERS)
+
+_FLAG_BITS = { "S" : 7, "Z" : 6, "5" : 5, "H" : 4, "3" : 3, "P" : 2, "V" : 2, "N" : 1, "C" : 0 }
+
+_ACCESSORS = {
+    "AF"  : _pair_accessors("A", "F"),
+    "BC"  : _pair_accessors("B", "C"),
+    "DE"  : _pair_accessors("D", "E"),
+    "HL"  : _pair_accessors("H", "L"),
+    "IXH" : _half_accessors("IX", True),
+    "IXL" : _half_accessors("IX", False),
+    "IYH" : _half_accessors("IY", True),
+    "IYL" : _half_accessors("IY", False),
+    "SPH" : _half_accessors("SP", True),
+    "SPL" : _half_accessors("SP", False),
+    "PCH" : _half_accessors("PC", True),
+    "PCL" : _half_accessors("PC", False),
+    }
+
 if __name__ == "__main__": # pragma: no cover
     reg = RegisterFile()
     print(reg.registermap())
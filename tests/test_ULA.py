@@ -10,19 +10,20 @@ class TestSpectrumULA(unittest.TestCase):
 
         with mock.patch('tkinter.Tk') as tk:
             with mock.patch('tkinter.Canvas') as Canvas:
-                Canvas.return_value.create_rectangle = lambda *args, **kwargs : (args[0], args[1])
-                self.UUT = SpectrumULA()
-
-                Canvas.assert_called_once_with(tk.return_value,
-                                                   width=256*self.UUT.scale,
-                                                   height=192*self.UUT.scale,
-                                                   bg="#000000")
-                self.canvas = Canvas.return_value
-                tk.return_value.bind.assert_has_calls([ mock.call("<KeyPress>", mock.ANY),
-                                                            mock.call("<KeyRelease>", mock.ANY), ])
-                bound = { call[1][0] : call[1][1] for call in tk.return_value.bind.mock_calls }
-                self.keypress = bound['<KeyPress>']
-                self.keyrelease = bound['<KeyRelease>']
+                with mock.patch('tkinter.PhotoImage') as PhotoImage:
+                    self.UUT = SpectrumULA()
+
+                    Canvas.assert_called_once_with(tk.return_value,
+                                                       width=256*self.UUT.scale,
+                                                       height=192*self.UUT.scale,
+                                                       bg="#000000")
+                    self.canvas = Canvas.return_value
+                    self.canvas.create_image.assert_called_once_with(0, 0, image=self.UUT.display.screen, anchor=mock.ANY)
+                    tk.return_value.bind.assert_has_calls([ mock.call("<KeyPress>", mock.ANY),
+                                                                mock.call("<KeyRelease>", mock.ANY), ])
+                    bound = { call[1][0] : call[1][1] for call in tk.return_value.bind.mock_calls }
+                    self.keypress = bound['<KeyPress>']
+                    self.keyrelease = bound['<KeyRelease>']
         self.canvas.pack.assert_called_once_with()
 
         self.bus = MemoryBus(mappings=[(0x4000, 0x1B00, self.UUT.display)])
@@ -41,35 +42,45 @@ class TestSpectrumULA(unittest.TestCase):
         self.assertFalse(self.UUT.running())
         self.UUT.window.destroy.assert_called_once_with()
 
+    def colour(self, c):
+        return bytes.fromhex(self.UUT.display.pallette[c][0][1:])
+
+    def pixel(self, x, y):
+        if self.UUT.display.dirty:
+            with mock.patch('pyz80.ULA.time', side_effect=lambda : self.UUT.display.last_flash):
+                self.UUT.display.update()
+            self.UUT.display.image.reset_mock()
+        offset = (y*256 + x)*3
+        return bytes(self.UUT.display.framebuffer[offset:offset + 3])
+
+    def toggle_flash(self):
+        with mock.patch('pyz80.ULA.time', side_effect=lambda : self.UUT.display.last_flash + 1):
+            self.UUT.display.update()
+
     def assert_write_pixel(self, x, y, bg=0, fg=7, flash=False):
-        self.canvas.itemconfigure.reset_mock()
-        self.UUT.display.data[0x1800 + (y//8)*32 + (x//8)] = (0x80 if flash else 0x00) + fg + (bg << 3)
+        self.bus.write(0x5800 + (y//8)*32 + (x//8), (0x80 if flash else 0x00) + fg + (bg << 3))
         bitval = 1 << (x%8)
         addr = 0x4000 + (x//8) + ((y&0x7) << 8) + ((y&0x38) << 2) + ((y&0xC0) << 5)
         self.bus.write(addr, bitval)
 
-        expected_calls = []
         flip = (flash and (self.UUT.display.flash != 0x00))
         for i in range(0,8):
             if (not flip and ((1 << (7-i)) != bitval)) or (flip and ((1 << (7-i)) == bitval)):
-                expected_calls.append(mock.call((((x//8)*8 + i)*self.UUT.scale, y*self.UUT.scale), fill=self.UUT.display.pallette[bg][0]))
+                expected = self.colour(bg)
             else:
-                expected_calls.append(mock.call((((x//8)*8 + i)*self.UUT.scale, y*self.UUT.scale), fill=self.UUT.display.pallette[fg][0]))
-        self.assertEqual(self.canvas.itemconfigure.mock_calls, expected_calls)
-
+                expected = self.colour(fg)
+            self.assertEqual(self.pixel((x//8)*8 + i, y), expected)
 
     def test_write_pixels(self):
         for y in range(0,192):
             self.assert_write_pixel(255 - y,y)
         for y in range(0,192):
              self.assert_write_pixel(y,y, flash=True)
-        self.UUT.display.flash = 0xFF
+        self.toggle_flash()
         for y in range(0,192):
             self.assert_write_pixel((2*y)%256 + int((2*y)/256),y, flash=True)
 
     def assert_write_attributes(self, x, y, fg=7, bg=0, flash=False):
-        self.maxDiff = None
-        self.canvas.itemconfigure.reset_mock()
         addr = x + ((y&0x7) << 5) + ((y&0x18) << 8)
         for i in range(0,8):
             self.UUT.display.data[addr] = 0x55
@@ -78,64 +89,103 @@ class TestSpectrumULA(unittest.TestCase):
         addr = 0x5800 + (y*32) + x
         self.bus.write(addr, (0x80 if flash else 0x00) + (fg) + (bg << 3))
 
-        expected_calls = []
+        if flash and (self.UUT.display.flash != 0x00):
+            (even, odd) = (fg, bg)
+        else:
+            (even, odd) = (bg, fg)
         for j in range(0,8):
-            for i in range(0,4):
-                if flash and (self.UUT.display.flash != 0x00):
-                    expected_calls.append(mock.call(( (x*8 + (7 - 2*i) - 1)*self.UUT.scale, (y*8 + j)*self.UUT.scale ), fill=self.UUT.display.pallette[fg][0]))
-                    expected_calls.append(mock.call(((x*8 + (7 - 2*i) + 0)*self.UUT.scale, (y*8 + j)*self.UUT.scale ), fill=self.UUT.display.pallette[bg][0]))
-                else:
-                    expected_calls.append(mock.call(( (x*8 + (7 - 2*i) - 1)*self.UUT.scale, (y*8 + j)*self.UUT.scale ), fill=self.UUT.display.pallette[bg][0]))
-                    expected_calls.append(mock.call(((x*8 + (7 - 2*i) + 0)*self.UUT.scale, (y*8 + j)*self.UUT.scale ), fill=self.UUT.display.pallette[fg][0]))
-        self.assertCountEqual(self.canvas.itemconfigure.mock_calls, expected_calls)
+            for i in range(0,8):
+                self.assertEqual(self.pixel(x*8 + i, y*8 + j), self.colour(odd if (i%2) else even))
 
     def test_write_attributes(self):
         for y in range(0,24):
             self.assert_write_attributes(y,y)
         for y in range(0,24):
             self.assert_write_attributes(31-y,y, flash=True)
-        self.UUT.display.flash = 0xFF
+        self.toggle_flash()
         for y in range(0,24):
             self.assert_write_attributes((2*y)%32 + int((2*y)/32),y, flash=True)
 
+    def test_unchanged_write(self):
+        self.bus.write(0x4000, 0xAA)
+        self.bus.write(0x5800, 0x38)
+        self.assertEqual(self.UUT.display.dirty, set([ 0x0000, 0x1800 ]))
+        self.pixel(0, 0)
+        self.assertEqual(self.UUT.display.dirty, set())
+        self.bus.write(0x4000, 0xAA)
+        self.bus.write(0x5800, 0x38)
+        self.bus.write(0x5801, 0x40)
+        self.assertEqual(self.UUT.display.dirty, set())
+        self.bus.write(0x5800, 0x78)
+        self.assertEqual(self.UUT.display.dirty, set([ 0x1800 ]))
+
+    def test_bright(self):
+        self.bus.write(0x4000, 0xF0)
+        self.bus.write(0x5800, 0x40 + 0x02 + (0x05 << 3))
+        for x in range(0,8):
+            expected = self.UUT.display.pallette[2 if x < 4 else 5][1]
+            self.assertEqual(self.pixel(x, 0), bytes.fromhex(expected[1:]))
+
     def test_update(self):
         with mock.patch('pyz80.ULA.time', return_value=self.UUT.display.last_flash + 1):
             self.UUT.update()
         self.UUT.window.update_idletasks.assert_called_once_with()
         self.UUT.window.update.assert_called_once_with()
 
+    def test_update_rate_limited(self):
+        with mock.patch('pyz80.ULA.monotonic', return_value=1000.0):
+            self.UUT.update()
+        with mock.patch('pyz80.ULA.monotonic', return_value=1000.01):
+            self.UUT.update()
+        self.UUT.window.update.assert_called_once_with()
+        with mock.patch('pyz80.ULA.monotonic', return_value=1000.03):
+            self.UUT.update()
+        self.assertEqual(self.UUT.window.update.call_count, 2)
+
+    def test_blit(self):
+        self.UUT.display.image.reset_mock()
+        self.bus.write(0x4000, 0xFF)
+        with mock.patch('pyz80.ULA.time', side_effect=lambda : self.UUT.display.last_flash):
+            self.UUT.display.update()
+        self.UUT.display.image.configure.assert_called_once_with(data=mock.ANY, format='PPM')
+        data = self.UUT.display.image.configure.mock_calls[0][2]['data']
+        self.assertEqual(data, b'P6 256 192 255\n' + bytes(self.UUT.display.framebuffer))
+        self.UUT.display.screen.tk.call.assert_called_once_with(self.UUT.display.screen, 'copy', self.UUT.display.image,
+                                                                    '-zoom', self.UUT.scale, self.UUT.scale)
+
+        self.UUT.display.image.reset_mock()
+        with mock.patch('pyz80.ULA.time', side_effect=lambda : self.UUT.display.last_flash):
+            self.UUT.display.update()
+        self.UUT.display.image.configure.assert_not_called()
+
     def test_flash(self):
-        self.maxDiff = None
-        self.UUT.display.data[0x1800] = 0x87
         for j in range(0,8):
             self.UUT.display.data[j*0x100] = 0x55
+        self.bus.write(0x5800, 0x87)
 
         with mock.patch('pyz80.ULA.time', side_effect=lambda : self.UUT.display.last_flash + 1):
-            self.UUT.update()
+            self.UUT.display.update()
 
-        expected_calls = []
         for y in range(0,8):
-            for x in range(0,4):
-                expected_calls.append(mock.call(( (7 - 2*x)*self.UUT.scale, y*self.UUT.scale), fill=self.UUT.display.pallette[0][0]))
-                expected_calls.append(mock.call(( (6 - 2*x)*self.UUT.scale, y*self.UUT.scale), fill=self.UUT.display.pallette[7][0]))
-        self.assertCountEqual(expected_calls, self.canvas.itemconfigure.mock_calls)
+            for x in range(0,8):
+                self.assertEqual(self.pixel(x, y), self.colour(0 if (x%2) else 7))
 
-        self.canvas.itemconfigure.reset_mock()
+        self.UUT.display.image.reset_mock()
         with mock.patch('pyz80.ULA.time', side_effect=lambda : self.UUT.display.last_flash):
-            self.UUT.update()
+            self.UUT.display.update()
+        self.UUT.display.image.configure.assert_not_called()
 
-        self.canvas.itemconfigure.assert_not_called()
-
-        self.canvas.itemconfigure.reset_mock()
         with mock.patch('pyz80.ULA.time', side_effect=lambda : self.UUT.display.last_flash + 1):
-            self.UUT.update()
+            self.UUT.display.update()
+
+        for y in range(0,8):
+            for x in range(0,8):
+                self.assertEqual(self.pixel(x, y), self.colour(7 if (x%2) else 0))
 
-        expected_calls = []
+        self.bus.write(0x5800, 0x07)
         for y in range(0,8):
-            for x in range(0,4):
-                expected_calls.append(mock.call(( (7 - 2*x)*self.UUT.scale, y*self.UUT.scale), fill=self.UUT.display.pallette[7][0]))
-                expected_calls.append(mock.call(( (6 - 2*x)*self.UUT.scale, y*self.UUT.scale), fill=self.UUT.display.pallette[0][0]))
-        self.assertCountEqual(expected_calls, self.canvas.itemconfigure.mock_calls)
+            for x in range(0,8):
+                self.assertEqual(self.pixel(x, y), self.colour(7 if (x%2) else 0))
 
     def test_description(self):
         self.assertIsInstance(self.UUT.display.description(), str)
@@ -287,6 +337,28 @@ Failed to match output at 0x%02X when keys set are %r and keys unset are %r. Got
                 address = 0xFF - address
                 self.assertEqual(self.UUT.io.read(address), expected)
 
+    def test_keyboard_upper_case(self):
+        m = mock.MagicMock()
+        m.char = 'Q'
+        self.keypress(m)
+        self.assertEqual(self.UUT.io.read(0xFB), 0xFE)
+        m.char = 'q'
+        self.keyrelease(m)
+        self.assertEqual(self.UUT.io.read(0xFB), 0xFF)
+        m.char = '#'
+        self.keypress(m)
+        self.assertEqual(self.UUT.io.read(0x00), 0xFF)
+
+    def test_keyboard_multiple_rows(self):
+        for key in ('q', 's'):
+            m = mock.MagicMock()
+            m.char = key
+            self.keypress(m)
+        self.assertEqual(self.UUT.io.read(0xFB), 0xFE)
+        self.assertEqual(self.UUT.io.read(0xFD), 0xFD)
+        self.assertEqual(self.UUT.io.read(0xF9), 0xFC)
+        self.assertEqual(self.UUT.io.read(0xFE), 0xFF)
+
     def test_io_write(self):
         for addr in range(0,256):
             self.UUT.io.write(addr, 0x00)
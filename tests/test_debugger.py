@@ -0,0 +1,107 @@
+import unittest
+from pyz80.debugger import *
+from pyz80.cpu import Z80CPU
+from pyz80.memorybus import MemoryBus
+from pyz80.iobus import IOBus
+from unittest import mock
+
+class TestDebugger(unittest.TestCase):
+    def setUp(self):
+        self.cpu = Z80CPU(IOBus(), MemoryBus())
+        self.UUT = Debugger(self.cpu)
+
+    def test_decode_address_registers(self):
+        self.cpu.reg.BC = 0x1234
+        self.cpu.reg.HL = 0xBEEF
+        self.cpu.reg.SP = 0xFFF0
+        self.assertEqual(self.UUT.decode_address("BC"), 0x1234)
+        self.assertEqual(self.UUT.decode_address("HL"), 0xBEEF)
+        self.assertEqual(self.UUT.decode_address("SP"), 0xFFF0)
+
+    def test_decode_address_indexed(self):
+        self.cpu.reg.IX = 0x8000
+        self.cpu.reg.IY = 0x9000
+        self.assertEqual(self.UUT.decode_address("IX"), 0x8000)
+        self.assertEqual(self.UUT.decode_address("IX+0x10"), 0x8010)
+        self.assertEqual(self.UUT.decode_address("IY-5"), 0x8FFB)
+        self.assertEqual(self.UUT.decode_address("IX-0x0A"), 0x7FF6)
+
+    def test_decode_address_literal(self):
+        self.assertEqual(self.UUT.decode_address("0x1234"), 0x1234)
+        self.assertEqual(self.UUT.decode_address("0xbeef"), 0xBEEF)
+        self.assertEqual(self.UUT.decode_address("4660"), 4660)
+        self.assertEqual(self.UUT.decode_address("0"), 0)
+
+    def test_decode_address_invalid(self):
+        for a in [ "HL+1", "0x", "", "IX+", "XY", "0x12G4" ]:
+            with self.assertRaises(ValueError):
+                self.UUT.decode_address(a)
+
+    @mock.patch("builtins.print")
+    def test_breakpoints_at_same_address(self, _print):
+        self.UUT._break("0x1000")
+        self.UUT._break("0x1000")
+        self.UUT._break("0x2000")
+        self.assertEqual(self.UUT.breakpoints, [ 0x1000, 0x1000, 0x2000 ])
+        self.UUT.deletebreakpoint("0")
+        self.assertEqual(self.UUT.breakpoints, [ None, 0x1000, 0x2000 ])
+        self.assertEqual(self.UUT._breakpoint_set, set([ 0x1000, 0x2000 ]))
+
+    @mock.patch("builtins.print")
+    def test_deletebreakpoint_without_argument(self, _print):
+        self.UUT._break("0x1000")
+        self.UUT._break("0x2000")
+        self.UUT.deletebreakpoint()
+        self.assertEqual(self.UUT.breakpoints, [ 0x1000, None ])
+        self.assertEqual(self.UUT._breakpoint_set, set([ 0x1000 ]))
+
+    @mock.patch("builtins.print")
+    def test_breakpoint_bad_arguments(self, _print):
+        self.UUT._break("0x1000")
+        self.UUT._break("nowhere")
+        self.UUT._break()
+        self.UUT.deletebreakpoint("first")
+        self.UUT.deletebreakpoint("5")
+        self.assertEqual(self.UUT.breakpoints, [ 0x1000 ])
+        self.assertEqual(self.UUT._breakpoint_set, set([ 0x1000 ]))
+
+    @mock.patch("builtins.print")
+    def test_check_breakpoints(self, _print):
+        self.UUT._break("0x1000")
+        self.UUT._break("0x2000")
+        self.UUT._break("0x1000")
+        self.cpu.reg.PC = 0x3000
+        self.assertFalse(self.UUT._check_breakpoints())
+        self.assertEqual(self.UUT._pending_messages, [])
+        self.cpu.reg.PC = 0x1000
+        self.assertTrue(self.UUT._check_breakpoints())
+        self.assertEqual(self.UUT._pending_messages, [ ("breakpoint", 0), ("breakpoint", 2) ])
+        self.UUT._pending_messages = []
+        self.UUT.deletebreakpoint("0")
+        self.assertTrue(self.UUT._check_breakpoints())
+        self.assertEqual(self.UUT._pending_messages, [ ("breakpoint", 2) ])
+
+    def test_resolve_unambiguous_prefix(self):
+        self.assertEqual(self.UUT._resolve("cont"), ("continue", (), ("continue",)))
+        self.assertEqual(self.UUT._resolve("n 5"), ("next", ("5",), ("next",)))
+
+    def test_resolve_exact_name(self):
+        self.assertEqual(self.UUT._resolve("breakpoint 0x1000"), ("breakpoint", ("0x1000",), ("breakpoint",)))
+        self.assertEqual(self.UUT._resolve("stack"), ("stack", (), ("stack",)))
+
+    def test_resolve_ambiguous_prefix(self):
+        self.assertEqual(self.UUT._resolve("d"), (None, (), ("deletebreakpoint", "deletewatchpoint", "disassemble")))
+        self.assertEqual(self.UUT._resolve("s 1"), (None, ("1",), ("showbreakpoints", "showwatchpoints", "stack")))
+        self.assertEqual(self.UUT._resolve("delete"), (None, (), ("deletebreakpoint", "deletewatchpoint")))
+
+    def test_resolve_unknown(self):
+        self.assertEqual(self.UUT._resolve("zzz"), (None, (), ()))
+
+    def test_resolve_empty(self):
+        (C, args, candidates) = self.UUT._resolve("")
+        self.assertEqual(C, "")
+        self.assertEqual(self.UUT.commands[C][0], self.UUT.dolastthing)
+
+    def test_resolve_repeated(self):
+        self.assertEqual(self.UUT._resolve("d"), self.UUT._resolve("d"))
+        self.assertEqual(self.UUT._resolve("print HL"), self.UUT._resolve("print HL"))
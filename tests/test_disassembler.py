@@ -0,0 +1,51 @@
+import unittest
+from pyz80.machinestates import disassemble_instructions, INSTRUCTION_STATES
+
+class TestDisassembler(unittest.TestCase):
+    def test_disassemble_instructions(self):
+        instructions = [ 0x2E, 0x42,                  # LD L,n
+                         0x96,                        # SUB (HL)
+                         0xDD, 0x46, 0x05,            # LD B,(IX+d)
+                         0xDD, 0x73, 0xFB,            # LD (IX+d),E
+                         0xDD, 0xE3,                  # EX (SP),IX
+                         0xDD, 0xCB, 0x07, 0x06,      # RLC (IX+d)
+                         0xFD, 0xCB, 0x10, 0x4E,      # BIT 1,(IY+d)
+                         ] + [ x for op in range(0x30, 0x38) for x in (0xCB, op) ] + [
+                         0xED, 0x70,                  # IN F,(C)
+                         0xED, 0x71,                  # OUT (C),F
+                         0x21, 0x34, 0x12 ]           # LD HL,nn
+        self.assertEqual(disassemble_instructions(instructions),
+                         [ ("LD L,0x42", 2),
+                           ("SUB (HL)", 1),
+                           ("LD B,(IX+0x05)", 3),
+                           ("LD (IX+0xFB),E", 3),
+                           ("EX (SP),IX", 2),
+                           ("RLC (IX+0x07)", 4),
+                           ("BIT 1,(IY+0x10)", 4),
+                           ("SL1 B (undocumented)", 2),
+                           ("SL1 C (undocumented)", 2),
+                           ("SL1 D (undocumented)", 2),
+                           ("SL1 E (undocumented)", 2),
+                           ("SL1 H (undocumented)", 2),
+                           ("SL1 L (undocumented)", 2),
+                           ("SL1 (HL) (undocumented)", 2),
+                           ("SL1 A (undocumented)", 2),
+                           ("IN F,(C) (undocumented)", 2),
+                           ("OUT (C),F (undocumented)", 2),
+                           ("LD HL,0x1234", 3) ])
+
+    def test_undocumented_mnemonics_unchanged(self):
+        for (inst, state) in INSTRUCTION_STATES.items():
+            if "(undocumented)" in state[3]:
+                code = [ inst ] if isinstance(inst, int) else list(inst)
+                if len(code) == 3:
+                    code = [ code[0], code[1], 0x00, code[2] ]
+                [ (mnemonic, length) ] = disassemble_instructions(code)
+                self.assertEqual(length, state[4])
+                self.assertTrue(mnemonic.endswith(" (undocumented)"), mnemonic)
+                self.assertEqual(mnemonic, state[3].replace("+d", "+0x00"))
+
+    def test_truncated_instructions(self):
+        self.assertEqual(disassemble_instructions([ 0xCB ]), [ ("???", 2) ])
+        self.assertEqual(disassemble_instructions([ 0xDD, 0xCB, 0x05 ]), [ ("???", 4) ])
+        self.assertEqual(disassemble_instructions([ 0x21, 0x34 ]), [ ("LD HL,nn", 3) ])
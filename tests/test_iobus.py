@@ -46,6 +46,34 @@ class TestIOBus(unittest.TestCase):
                     if device != devices[n]:
                         device.write.assert_not_called()
 
+    def test_unmapped(self):
+        device = mock.MagicMock(Device, name="device")
+        device.responds_to_port.side_effect = lambda p : p == 0xFE
+
+        UUT = IOBus([ device ])
+
+        for n in range(0,256):
+            if n != 0xFE:
+                self.assertEqual(0x00, UUT.read(n, 0xFF))
+                UUT.write(n, 0xFF, mock.sentinel.data)
+        device.read.assert_not_called()
+        device.write.assert_not_called()
+
+    def test_debug_who_responds(self):
+        devices = [ mock.MagicMock(Device, name="device" + str(n)) for n in range(0,3) ]
+        devices[0].responds_to_port.side_effect = lambda p : (p%2) == 0
+        devices[1].responds_to_port.side_effect = lambda p : p == 0xFE
+        devices[2].responds_to_port.side_effect = lambda p : False
+
+        UUT = IOBus(devices)
+
+        self.assertEqual(UUT.debug_who_responds(0xFE), [ devices[0], devices[1] ])
+        self.assertEqual(UUT.debug_who_responds(0x02), [ devices[0] ])
+        self.assertEqual(UUT.debug_who_responds(0xFF), [])
+        UUT.read(0xFE, 0x00)
+        devices[0].read.assert_called_once_with(0x00)
+        devices[1].read.assert_not_called()
+
 class TestDevice(unittest.TestCase):
     def test_responds_to_port(self):
         UUT = Device()
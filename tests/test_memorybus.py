@@ -36,6 +36,51 @@ class TestMemoryBus(unittest.TestCase):
             else:
                 self.assertEqual(0xFF - (n%0x100), self.UUT.read(n))
 
+    def test_read_range(self):
+        for n in range(0x3FF0,0x4010):
+            self.UUT.write(n, 0x55)
+        for n in range(0x7FF8,0x8008):
+            self.UUT.write(n, n&0xFF)
+        self.assertEqual(self.UUT.read_range(0x3FF8, 16), bytes([ x for x in range(0xF8,0x100) ] + [ 0xFF ]*8))
+        self.assertEqual(self.UUT.read_range(0x7FF8, 16), bytes([ 0xFF ]*8 + [ x for x in range(0,8) ]))
+        self.assertEqual(self.UUT.read_range(0x8000, 0), b'')
+
+    def test_read_fast(self):
+        for n in range(0x7F00,0x8100):
+            self.UUT.write(n, n&0xFF)
+        for n in range(0,0x10000):
+            self.assertEqual(self.UUT.read(n), self.UUT.read_fast(n))
+
+    def test_read_fast_wrapped_address(self):
+        bus = MemoryBus(mappings=[(0x0000, 0x4000, ROM(bytes([ 0xAA ]*0x4000)))])
+        bus.write(-1, 0x12)
+        bus.write(-2, 0x34)
+        self.assertEqual(bus.read(0xFFFF), 0x12)
+        self.assertEqual(bus.read(0xFFFE), 0x34)
+        for n in range(0,0x10000):
+            self.assertEqual(bus.read(n), bus.read_fast(n))
+
+    def test_refresh(self):
+        ram = RAM(0x4000)
+        bus = MemoryBus(mappings=[(0x8000, 0x4000, ram)])
+        ram.data[0x10] = 0x55
+        ram.data[0x3FFF] = 0xAA
+        self.assertEqual(bus.read(0x8010), 0x55)
+        self.assertEqual(bus.read_fast(0x8010), 0x00)
+        bus.refresh(0x8000, 0x100)
+        self.assertEqual(bus.read_fast(0x8010), 0x55)
+        self.assertEqual(bus.read_fast(0xBFFF), 0x00)
+        bus.refresh()
+        for n in range(0,0x10000):
+            self.assertEqual(bus.read(n), bus.read_fast(n))
+
+    def test_read_fast_aliased(self):
+        ram = RAM(0x100)
+        bus = MemoryBus(mappings=[(0x8000, 0x200, ram)])
+        bus.write(0x8010, 0x55)
+        self.assertEqual(bus.read_fast(0x8010), 0x55)
+        self.assertEqual(bus.read_fast(0x8110), 0x55)
+
     def test_memory_map(self):
         outp = self.UUT.memory_map(granularity=0x2000)
         self.assertEqual(outp,
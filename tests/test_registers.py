@@ -91,6 +91,21 @@ class TestRegisterFile(unittest.TestCase):
         with self.assertRaises(AttributeError):
             reg.XY = 0
 
+    def test_accessors(self):
+        reg = RegisterFile()
+        for (r, value) in (("A", 0x12), ("B", 0x34), ("IX", 0x5678), ("SP", 0x9ABC), ("HL", 0xDEF0), ("IYH", 0x11), ("PCL", 0x22)):
+            (get, set) = RegisterFile.accessors(r)
+            set(reg, value)
+            self.assertEqual(getattr(reg, r), value)
+            self.assertEqual(get(reg), value)
+        self.assertEqual(reg.H, 0xDE)
+        self.assertEqual(reg.L, 0xF0)
+        self.assertEqual(reg.IY, 0x1100)
+        self.assertEqual(reg.PC, 0x0022)
+
+        with self.assertRaises(AttributeError):
+            RegisterFile.accessors("XY")
+
     def test_ex(self):
         reg = RegisterFile()
         reg.A = 0xAA